@@ -0,0 +1,90 @@
+from tic_tac_toe.message_handler.server.server_message_handler import ServerMessageHandler
+from tic_tac_toe.message_handler.server.broadcast import Broadcast
+from tic_tac_toe.message.event_type import EventType
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+import sys
+import time
+
+#compares encoding a board update separately for every recipient against framing it once with a
+#Broadcast and sharing the bytes. Run from the repository root with:
+#python -m benchmarks.broadcast_benchmark [-r <rounds>]
+RECIPIENT_COUNTS = (1, 10, 100, 1000, 10000)
+
+def create_handlers(count):
+    #handlers are not attached to a socket, messages are only queued
+    return [ServerMessageHandler(None, None, ("127.0.0.1", port), None) for port in range(count)]
+
+def create_content():
+    board = ["X", "O", " ", " ", "X", " ", "O", " ", " "]
+    return dict(success=True, action=EventType.BOARD_UPDATE.value, internal_request=False, data=board)
+
+#original fan-out where every handler encodes and frames its own copy of the message. The message is queued the
+#same way as in encode_once so that only the encoding differs between the two
+def encode_per_recipient(handlers, content):
+    for handler in handlers:
+        handler.send_broadcast(Broadcast(content))
+        handler._process_request_queue()
+
+def encode_once(handlers, content):
+    broadcast = Broadcast(content)
+
+    for handler in handlers:
+        handler.send_broadcast(broadcast)
+        handler._process_request_queue()
+
+def time_fan_out(fan_out, handlers, rounds):
+    content = create_content()
+    start = time.perf_counter()
+
+    for _ in range(rounds):
+        fan_out(handlers, content)
+
+    elapsed = time.perf_counter() - start
+
+    for handler in handlers:
+        handler._send_queue.clear()
+
+    return elapsed / rounds
+
+#time spent encoding and framing the message, excluding the cost of queueing it
+def time_encoding(count, rounds):
+    content = create_content()
+    start = time.perf_counter()
+
+    for _ in range(rounds):
+        for _ in range(count):
+            ServerMessageHandler.frame_content(content, ProtocolType.JSON)
+
+    per_recipient = (time.perf_counter() - start) / rounds
+    start = time.perf_counter()
+
+    for _ in range(rounds):
+        Broadcast(content).get_message(ProtocolType.JSON)
+
+    once = (time.perf_counter() - start) / rounds
+    return per_recipient, once
+
+def run(rounds):
+    print(f'{"recipients":>10} | {"encode per recipient":>20} | {"encode once":>12} | '
+          f'{"fan-out per recipient":>21} | {"fan-out once":>12}')
+
+    for count in RECIPIENT_COUNTS:
+        handlers = create_handlers(count)
+        encoding_per_recipient, encoding_once = time_encoding(count, rounds)
+        fan_out_per_recipient = time_fan_out(encode_per_recipient, handlers, rounds)
+        fan_out_once = time_fan_out(encode_once, handlers, rounds)
+        print(f'{count:>10} | {encoding_per_recipient * 1e6:>18.1f}us | {encoding_once * 1e6:>10.1f}us | '
+              f'{fan_out_per_recipient * 1e6:>19.1f}us | {fan_out_once * 1e6:>10.1f}us')
+
+def main():
+    rounds = 20
+    arguments_list = sys.argv[1:]
+
+    for argument, value in zip(*[iter(arguments_list)]*2):
+        if argument == '-r':
+            rounds = int(value)
+
+    run(rounds)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+from tic_tac_toe.message_handler.protocol.json_codec import JsonCodec
+from tic_tac_toe.message.event_type import EventType
+import sys
+import io
+import json
+import struct
+import time
+
+#compares how many json frames per second can be encoded and decoded by the original
+#TextIOWrapper based path and by the JsonCodec with each installed json library. Run from the
+#repository root with:
+#python -m benchmarks.codec_benchmark [-n <frames>]
+CONTENT = dict(success=True, action=EventType.BOARD_UPDATE.value, internal_request=False,
+               data=["X", "O", " ", " ", "X", " ", "O", " ", " "])
+
+#original path used by the message handlers before the codec was added
+def legacy_encode(content):
+    content_bytes = json.dumps(content, ensure_ascii=False).encode("utf-8")
+    jsonheader = {
+        "byteorder": sys.byteorder,
+        "content-type": "text/json",
+        "content-encoding": "utf-8",
+        "content-length": len(content_bytes),
+    }
+    jsonheader_bytes = json.dumps(jsonheader, ensure_ascii=False).encode("utf-8")
+    return struct.pack(">H", len(jsonheader_bytes)) + jsonheader_bytes + content_bytes
+
+def legacy_json_decode(json_bytes, encoding):
+    tiow = io.TextIOWrapper(
+        io.BytesIO(json_bytes), encoding=encoding, newline=""
+    )
+    obj = json.load(tiow)
+    tiow.close()
+    return obj
+
+def legacy_decode(message):
+    hdrlen = struct.unpack(">H", message[:2])[0]
+    header = legacy_json_decode(message[2:2 + hdrlen], "utf-8")
+    return legacy_json_decode(message[2 + hdrlen:2 + hdrlen + header["content-length"]], header["content-encoding"])
+
+def codec_decode(json_codec, message):
+    with memoryview(message) as view:
+        hdrlen = struct.unpack_from(">H", view)[0]
+        header = json_codec.decode_header(view[2:2 + hdrlen])
+        return json_codec.decode(view[2 + hdrlen:2 + hdrlen + header["content-length"]])
+
+def frames_per_second(function, argument, count):
+    start = time.perf_counter()
+
+    for _ in range(count):
+        function(argument)
+
+    return count / (time.perf_counter() - start)
+
+def run(count):
+    print(f'{"path":>14} | {"encode frames/s":>16} | {"decode frames/s":>16}')
+    message = legacy_encode(CONTENT)
+    legacy_encode_rate = frames_per_second(legacy_encode, CONTENT, count)
+    legacy_decode_rate = frames_per_second(legacy_decode, message, count)
+    print(f'{"legacy":>14} | {legacy_encode_rate:>16,.0f} | {legacy_decode_rate:>16,.0f}')
+
+    for library in JsonCodec.LIBRARIES:
+        try:
+            json_codec = JsonCodec(library)
+        except ImportError:
+            print(f'{"codec " + library:>14} | {"not installed":>16} | {"not installed":>16}')
+            continue
+
+        message = json_codec.create_message(CONTENT)
+        encode_rate = frames_per_second(json_codec.create_message, CONTENT, count)
+        decode_rate = frames_per_second(lambda frame: codec_decode(json_codec, frame), message, count)
+        print(f'{"codec " + library:>14} | {encode_rate:>16,.0f} | {decode_rate:>16,.0f}')
+
+def main():
+    count = 100000
+    arguments_list = sys.argv[1:]
+
+    for argument, value in zip(*[iter(arguments_list)]*2):
+        if argument == '-n':
+            count = int(value)
+
+    run(count)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+from tic_tac_toe.game.game_state import GameState
+import random
+import sys
+import time
+
+#compares how many moves per second can be played and checked for a win or draw by the bitboard
+#game state and by the original list based board. Run from the repository root with:
+#python -m benchmarks.game_state_benchmark [-g <games>]
+#
+#moves per second are also reported for larger boards, where only the lines through the last cell
+#played are checked for a win
+LARGE_BOARDS = ((7, 4), (15, 5), (25, 5))
+SYMBOLS = ("X", "O")
+
+#original list based win detection used by the server before the game state was added
+def legacy_player_has_won(board, symbol):
+    if (board[0] == symbol and board[1] == symbol and board[2] == symbol) or \
+            (board[3] == symbol and board[4] == symbol and board[5] == symbol) or \
+            (board[6] == symbol and board[7] == symbol and board[8] == symbol) or \
+            (board[0] == symbol and board[3] == symbol and board[6] == symbol) or \
+            (board[1] == symbol and board[4] == symbol and board[7] == symbol) or \
+            (board[2] == symbol and board[5] == symbol and board[8] == symbol) or \
+            (board[0] == symbol and board[4] == symbol and board[8] == symbol) or \
+            (board[2] == symbol and board[4] == symbol and board[6] == symbol):
+        return True
+    else:
+        return False
+
+def legacy_play_game(moves, player_turn_dict):
+    board = [" " for _ in range(9)]
+    evaluated = 0
+
+    for turn, cell in enumerate(moves):
+        symbol = player_turn_dict[turn % 2].split(":")[1]
+        board[cell] = symbol
+        evaluated += 1
+
+        if legacy_player_has_won(board, symbol) or " " not in board:
+            break
+
+    return evaluated
+
+def play_game(moves, size=3, win_length=3):
+    game_state = GameState(size, win_length)
+    evaluated = 0
+
+    for turn, cell in enumerate(moves):
+        evaluated += 1
+
+        if game_state.play(cell, turn % 2) != GameState.IN_PROGRESS:
+            break
+
+    return evaluated
+
+#plays the game with plain integers and the win table, the way a bot searching many positions would
+def play_game_bits(moves):
+    player_cells = [0, 0]
+    occupied_cells = 0
+    winning_positions = GameState.WINNING_POSITIONS
+    full_board = (1 << 9) - 1
+    evaluated = 0
+
+    for turn, cell in enumerate(moves):
+        cell_bit = 1 << cell
+        player_cells[turn & 1] |= cell_bit
+        occupied_cells |= cell_bit
+        evaluated += 1
+
+        if winning_positions[player_cells[turn & 1]] or occupied_cells == full_board:
+            break
+
+    return evaluated
+
+def run(games):
+    random.seed(0)
+    games_moves = [random.sample(range(9), 9) for _ in range(games)]
+    player_turn_dict = {0: "0:X", 1: "1:O"}
+
+    start = time.perf_counter()
+    legacy_moves = sum(legacy_play_game(moves, player_turn_dict) for moves in games_moves)
+    legacy_rate = legacy_moves / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    moves = sum(play_game(moves) for moves in games_moves)
+    rate = moves / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    bits_moves = sum(play_game_bits(moves) for moves in games_moves)
+    bits_rate = bits_moves / (time.perf_counter() - start)
+
+    print(f'{"board":>16} | {"moves":>9} | {"moves/s":>12}')
+    print(f'{"list":>16} | {legacy_moves:>9} | {legacy_rate:>12,.0f}')
+    print(f'{"game state":>16} | {moves:>9} | {rate:>12,.0f}')
+    print(f'{"bitboard table":>16} | {bits_moves:>9} | {bits_rate:>12,.0f}')
+
+    for size, win_length in LARGE_BOARDS:
+        large_games_moves = [random.sample(range(size * size), size * size) for _ in range(max(games // 100, 1))]
+        start = time.perf_counter()
+        large_moves = sum(play_game(moves, size, win_length) for moves in large_games_moves)
+        large_rate = large_moves / (time.perf_counter() - start)
+        print(f'{f"{size}x{size} {win_length} in a row":>16} | {large_moves:>9} | {large_rate:>12,.0f}')
+
+def main():
+    games = 100000
+    arguments_list = sys.argv[1:]
+
+    for argument, value in zip(*[iter(arguments_list)]*2):
+        if argument == '-g':
+            games = int(value)
+
+    run(games)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+from tic_tac_toe.matchmaking.matchmaking_policy import MatchmakingPolicy
+from tic_tac_toe.matchmaking.matchmaking_ticket import MatchmakingTicket
+from tic_tac_toe.matchmaking.rating_band_policy import RatingBandPolicy
+from collections import OrderedDict
+import random
+import sys
+import time
+
+#compares how long it takes to find a match for a player when tens of thousands of rooms are waiting in the rating
+#matchmaking queue, with the original policy that looked at the rooms of each band in the order they started waiting
+#and with the policy that finds the oldest room in a range of ratings with a segment tree. Run from the repository
+#root with:
+#python -m benchmarks.matchmaking_benchmark [-p <players>]
+#
+#the queue is filled with rooms before the players arrive. Each player is placed in the room that the policy picks,
+#or waits in a new room when there is no match, so the queue depth stays about the same while the players arrive.
+#Rooms arrive in a random order of ratings, and in the order of their ratings from the highest down, where the
+#rooms at the front of each band of the original policy are the ones furthest from the players of the band below
+QUEUE_DEPTHS = (1000, 10000, 50000)
+BOARD_SETTINGS = (3, 3)
+SEED = 0
+#ratings are drawn from a normal distribution
+MEAN_RATING = 1500
+RATING_DEVIATION = 300
+
+#original policy that kept the waiting rooms of each band in the order they started waiting. Rooms in the bands next
+#to the player's band were looked at from the front of the band until one was close enough to the player's rating
+class LegacyRatingBandPolicy(MatchmakingPolicy):
+    def __init__(self, band_width=RatingBandPolicy.DEFAULT_BAND_WIDTH):
+        self.band_width = band_width
+        self.queue_dict = dict()
+
+    def add(self, ticket):
+        key = (ticket.board_settings, ticket.rating // self.band_width)
+        self.queue_dict.setdefault(key, OrderedDict())[ticket.room_id] = ticket
+
+    def remove(self, ticket):
+        key = (ticket.board_settings, ticket.rating // self.band_width)
+        queue = self.queue_dict[key]
+        queue.pop(ticket.room_id)
+
+        if not queue:
+            self.queue_dict.pop(key)
+
+    def find_match(self, board_settings, rating, is_joinable=None):
+        band = rating // self.band_width
+        match = None
+
+        for nearby_band in (band - 1, band, band + 1):
+            queue = self.queue_dict.get((board_settings, nearby_band))
+
+            if queue:
+                ticket = next((ticket for ticket in queue.values()
+                               if abs(ticket.rating - rating) <= self.band_width and
+                               (is_joinable is None or is_joinable(ticket.room_id))), None)
+
+                if ticket is not None and (match is None or ticket.enqueue_time < match.enqueue_time):
+                    match = ticket
+
+        return match
+
+def create_ratings(count, rng):
+    return [int(rng.gauss(MEAN_RATING, RATING_DEVIATION)) for _ in range(count)]
+
+#returns the seconds spent finding matches for the players and the rooms that they were placed in, None for the
+#players that had to wait in a new room. The enqueue time of a ticket is its number so both policies are given the
+#same tickets
+def time_matchmaking(policy, room_ratings, player_ratings):
+    for room_number, rating in enumerate(room_ratings):
+        policy.add(MatchmakingTicket(room_number, BOARD_SETTINGS, rating, room_number))
+
+    room_number = len(room_ratings)
+    matches = []
+    elapsed = 0
+
+    for rating in player_ratings:
+        start = time.perf_counter()
+        ticket = policy.find_match(BOARD_SETTINGS, rating)
+        elapsed += time.perf_counter() - start
+
+        if ticket is None:
+            policy.add(MatchmakingTicket(room_number, BOARD_SETTINGS, rating, room_number))
+            room_number += 1
+            matches.append(None)
+        else:
+            policy.remove(ticket)
+            matches.append(ticket.room_id)
+
+    return elapsed, matches
+
+def run(player_count):
+    print(f'{"waiting rooms":>13} | {"arrival order":>13} | {"original":>10} | {"segment tree":>12} | '
+          f'{"matched":>7}')
+
+    for queue_depth in QUEUE_DEPTHS:
+        rng = random.Random(SEED)
+        room_ratings = create_ratings(queue_depth, rng)
+        player_ratings = create_ratings(player_count, rng)
+
+        for arrival_order, ordered_room_ratings in (("random", room_ratings),
+                                                    ("highest first", sorted(room_ratings, reverse=True))):
+            legacy_time, legacy_matches = time_matchmaking(LegacyRatingBandPolicy(), ordered_room_ratings,
+                                                           player_ratings)
+            policy_time, matches = time_matchmaking(RatingBandPolicy(), ordered_room_ratings, player_ratings)
+
+            #both policies pick the room that has been waiting the longest in the band
+            assert matches == legacy_matches
+            match_count = sum(room_id is not None for room_id in matches)
+
+            print(f'{queue_depth:>13} | {arrival_order:>13} | {legacy_time / player_count * 1e6:>8.1f}us | '
+                  f'{policy_time / player_count * 1e6:>10.1f}us | {match_count / player_count:>7.1%}')
+
+def main():
+    player_count = 10000
+    arguments_list = sys.argv[1:]
+
+    for argument, value in zip(*[iter(arguments_list)]*2):
+        if argument == '-p':
+            player_count = int(value)
+
+    run(player_count)
+
+if __name__ == '__main__':
+    main()
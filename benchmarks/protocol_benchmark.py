@@ -0,0 +1,62 @@
+from tic_tac_toe.message_handler.message_handler import MessageHandler
+from tic_tac_toe.message_handler.frame_decoder import FrameDecoder
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+from tic_tac_toe.message.event_type import EventType
+import sys
+import time
+
+#compares the size of each message and the time it takes to encode and decode it with the json and
+#binary protocols. Run from the repository root with:
+#python -m benchmarks.protocol_benchmark [-n <messages>]
+MESSAGES = {
+    "move request": dict(action=EventType.MOVE.value, data=4),
+    "move response": dict(success=True, action=EventType.MOVE.value, internal_request=False, data=""),
+    "board update": dict(success=True, action=EventType.BOARD_UPDATE.value, internal_request=False,
+                         data=["X", "O", " ", " ", "X", " ", "O", " ", " "]),
+    "fin": dict(success=True, action=EventType.FIN.value, internal_request=False, data="alice has won. Game over."),
+}
+
+def time_encode(content, protocol, count):
+    start = time.perf_counter()
+
+    for _ in range(count):
+        MessageHandler.frame_content(content, protocol)
+
+    return (time.perf_counter() - start) / count
+
+def time_decode(message, count):
+    frame_decoder = FrameDecoder()
+    #decode in batches so the buffer does not need to grow
+    batch_size = 100
+    batch = message * batch_size
+    start = time.perf_counter()
+
+    for _ in range(count // batch_size):
+        frame_decoder.feed(batch)
+        frame_decoder.decode_frames()
+
+    return (time.perf_counter() - start) / (count // batch_size * batch_size)
+
+def run(count):
+    print(f'{"message":>14} | {"protocol":>8} | {"bytes":>5} | {"encode":>9} | {"decode":>9}')
+
+    for name, content in MESSAGES.items():
+        for protocol in ProtocolType:
+            message = MessageHandler.frame_content(content, protocol)
+            encode_time = time_encode(content, protocol, count)
+            decode_time = time_decode(message, count)
+            print(f'{name:>14} | {protocol.name:>8} | {len(message):>5} | {encode_time * 1e6:>7.2f}us | '
+                  f'{decode_time * 1e6:>7.2f}us')
+
+def main():
+    count = 100000
+    arguments_list = sys.argv[1:]
+
+    for argument, value in zip(*[iter(arguments_list)]*2):
+        if argument == '-n':
+            count = int(value)
+
+    run(count)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+from tic_tac_toe.message_handler.message_handler import MessageHandler
+from tic_tac_toe.message_handler.frame_decoder import FrameDecoder
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+from tic_tac_toe.message.event_type import EventType
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+#runs the same load test against the selectors and asyncio server engines, and the selectors engine
+#run with several worker processes. Every game connects two clients that register in their own room,
+#start the game and play until X wins. The games can be split between several client processes so that
+#the load test is not limited to one core. Run from the repository root with:
+#python -m benchmarks.server_engine_benchmark [-g <concurrent games>] [-p <port>] [-w <workers>] [-c <client processes>]
+ENGINES = ("selectors", "asyncio")
+#cells played in order, X wins on the last move
+MOVES = (0, 3, 1, 4, 2)
+SERVER_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py")
+
+class BenchmarkClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.frame_decoder = FrameDecoder()
+        self.responses = []
+
+    def send(self, action, data="", **fields):
+        content = dict(action=action, data=data, **fields)
+        self.writer.write(MessageHandler.frame_content(content, ProtocolType.JSON))
+
+    #returns the first response with the action, responses received before it are dropped. Board
+    #updates are also matched on their sequence number
+    async def receive(self, action, seq=None):
+        while True:
+            for index, response in enumerate(self.responses):
+                if response["action"] == action and (seq is None or response["data"]["seq"] == seq):
+                    del self.responses[:index + 1]
+                    return response
+
+            data = await self.reader.read(65536)
+
+            if not data:
+                raise RuntimeError("Server closed the connection.")
+
+            self.frame_decoder.feed(data)
+            self.responses.extend(self.frame_decoder.decode_frames())
+
+async def connect(port, connect_times):
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    connect_times.append(time.perf_counter() - start)
+    return BenchmarkClient(reader, writer)
+
+async def play_game(port, game_index, connect_times, move_times):
+    clients = [await connect(port, connect_times), await connect(port, connect_times)]
+
+    for client_index, client in enumerate(clients):
+        client.send(EventType.REGISTER.value, f'player-{client_index}', room=f'benchmark-{game_index}')
+        await client.receive(EventType.REGISTER.value)
+
+    clients[0].send(EventType.START.value)
+    orders = [await client.receive(EventType.ORDER.value) for client in clients]
+    players = sorted(clients, key=lambda client: orders[clients.index(client)]["data"])
+
+    for move_index, cell in enumerate(MOVES):
+        player = players[move_index % 2]
+        start = time.perf_counter()
+        player.send(EventType.MOVE.value, cell)
+        await player.receive(EventType.BOARD_UPDATE.value, move_index + 1)
+        move_times.append(time.perf_counter() - start)
+
+    for client in clients:
+        await client.receive(EventType.FIN.value)
+        client.writer.close()
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+async def run_load_test(port, game_indexes):
+    connect_times = []
+    move_times = []
+    start = time.perf_counter()
+    await asyncio.gather(*(play_game(port, game_index, connect_times, move_times) for game_index in game_indexes))
+    return time.perf_counter() - start, connect_times, move_times
+
+def run_client_process(port, game_indexes):
+    return asyncio.run(run_load_test(port, game_indexes))
+
+#splits the games between the client processes and combines their results
+def run_clients(port, games, client_count):
+    arguments = [(port, range(index, games, client_count)) for index in range(client_count)]
+
+    with multiprocessing.Pool(client_count) as pool:
+        results = pool.starmap(run_client_process, arguments)
+
+    return (max(elapsed for elapsed, _, _ in results),
+            [connect_time for _, connect_times, _ in results for connect_time in connect_times],
+            [move_time for _, _, move_times in results for move_time in move_times])
+
+def wait_for_server(port, timeout=10):
+    end = time.monotonic() + timeout
+
+    while time.monotonic() < end:
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return
+        except ConnectionRefusedError:
+            time.sleep(0.05)
+
+    raise RuntimeError(f'Server did not start listening on port {port}.')
+
+def run(games, port, worker_count, client_count):
+    configurations = [(engine, 1) for engine in ENGINES]
+
+    if worker_count > 1:
+        configurations.append(("selectors", worker_count))
+
+    print(f'{"engine":>9} | {"workers":>7} | {"games":>5} | {"games/s":>8} | {"connect p50":>11} | '
+          f'{"connect p99":>11} | {"moves/s":>8} | {"move p50":>9} | {"move p99":>9}')
+
+    for engine, workers in configurations:
+        #server log files are written to a temporary directory
+        with tempfile.TemporaryDirectory() as log_dir:
+            server = subprocess.Popen([sys.executable, SERVER_PATH, "-p", str(port), "-e", engine, "-w", str(workers)],
+                                      cwd=log_dir, stdout=subprocess.DEVNULL)
+
+            try:
+                wait_for_server(port)
+                elapsed, connect_times, move_times = run_clients(port, games, client_count)
+            finally:
+                server.terminate()
+                server.wait()
+
+        print(f'{engine:>9} | {workers:>7} | {games:>5} | {games / elapsed:>8.0f} | '
+              f'{percentile(connect_times, 0.5) * 1e3:>9.2f}ms | {percentile(connect_times, 0.99) * 1e3:>9.2f}ms | '
+              f'{len(move_times) / elapsed:>8.0f} | {percentile(move_times, 0.5) * 1e3:>7.2f}ms | '
+              f'{percentile(move_times, 0.99) * 1e3:>7.2f}ms')
+
+def main():
+    games = 200
+    port = 7650
+    worker_count = os.cpu_count() or 1
+    client_count = 1
+    arguments_list = sys.argv[1:]
+
+    for argument, value in zip(*[iter(arguments_list)]*2):
+        if argument == '-g':
+            games = int(value)
+        elif argument == '-p':
+            port = int(value)
+        elif argument == '-w':
+            worker_count = int(value)
+        elif argument == '-c':
+            client_count = int(value)
+
+    run(games, port, worker_count, client_count)
+
+if __name__ == '__main__':
+    main()
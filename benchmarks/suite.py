@@ -0,0 +1,366 @@
+from tic_tac_toe.message_handler.message_handler import MessageHandler
+from tic_tac_toe.message_handler.frame_decoder import FrameDecoder
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+from tic_tac_toe.message_handler.protocol.json_codec import JsonCodec
+from tic_tac_toe.message_handler.server.server_message_handler import ServerMessageHandler
+from tic_tac_toe.message_handler.server.server_synchronizer import ServerSynchronizer
+from tic_tac_toe.message.event_type import EventType
+from tic_tac_toe.game.game_state import GameState
+from tic_tac_toe.game.game_search import GameSearch
+from tic_tac_toe.game.perfect_play_table import PerfectPlayTable
+from tic_tac_toe.tournament.single_elimination_tournament import SingleEliminationTournament
+from tic_tac_toe.tournament.round_robin_tournament import RoundRobinTournament
+from benchmarks.server_engine_benchmark import run_load_test, wait_for_server, percentile, SERVER_PATH
+import asyncio
+import datetime
+import json
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+#runs every benchmark case, writes the results as json and compares them against the results of a
+#previous run. Results that got worse by more than the threshold are reported as regressions and the
+#suite exits with status 1. Only the standard library and a loopback server are used so the suite runs
+#offline. Run from the repository root with:
+#python -m benchmarks.suite [-o <results file>] [-b <baseline results file>] [-t <threshold>] [-r <repeats>]
+#
+#each case is measured several times and the fastest run is kept, since slower runs are caused by other
+#work on the machine and not by the code being measured
+SEED = 0
+BATCH_SIZE = 1000
+#min number of seconds each repeat of a case runs for
+MIN_TIME = 0.2
+E2E_GAMES = 100
+MOVE_REQUEST = dict(action=EventType.MOVE.value, data=4)
+MOVE_RESPONSE = dict(success=True, action=EventType.MOVE.value, internal_request=False, data="")
+#cells played in order in the dispatch and end to end benchmarks, X wins on the last move
+MOVES = (0, 3, 1, 4, 2)
+
+#each case returns a function that runs the code being measured and the number of operations it runs
+
+#original framing path that builds and encodes a new json header for every message
+def create_message_case():
+    content_bytes = JsonCodec.get_default().encode(MOVE_RESPONSE)
+
+    def run():
+        for _ in range(BATCH_SIZE):
+            MessageHandler._create_message(content_bytes=content_bytes, content_type=JsonCodec.CONTENT_TYPE,
+                                           content_encoding=JsonCodec.CONTENT_ENCODING)
+
+    return run, BATCH_SIZE
+
+def frame_content_case(protocol):
+    def create_case():
+        def run():
+            for _ in range(BATCH_SIZE):
+                MessageHandler.frame_content(MOVE_RESPONSE, protocol)
+
+        return run, BATCH_SIZE
+
+    return create_case
+
+#header and body parse path of the frame decoder
+def decode_frames_case(protocol):
+    def create_case():
+        frame_decoder = FrameDecoder()
+        data = MessageHandler.frame_content(MOVE_REQUEST, protocol) * BATCH_SIZE
+
+        def run():
+            frame_decoder.feed(data)
+            frame_decoder.decode_frames()
+
+        return run, BATCH_SIZE
+
+    return create_case
+
+#whole games played through ServerSynchronizer.process_client_request by two handlers that are not
+#attached to sockets
+def dispatch_case():
+    random.seed(SEED)
+    synchronizer = ServerSynchronizer()
+    addrs = [("127.0.0.1", 1), ("127.0.0.1", 2)]
+    handlers = [ServerMessageHandler(None, None, addr, synchronizer) for addr in addrs]
+
+    for addr, handler, player_name in zip(addrs, handlers, ("a", "b")):
+        synchronizer.add_new_connected_client(addr, handler)
+        synchronizer.process_client_request(addr, dict(action=EventType.REGISTER.value, data=player_name,
+                                                       room="benchmark"))
+
+    room = synchronizer.room_dict["benchmark"]
+    games = BATCH_SIZE // (len(MOVES) + 1)
+
+    def run():
+        for _ in range(games):
+            synchronizer.process_client_request(addrs[0], dict(action=EventType.START.value, data=""))
+            players = [room.current_player_turn, addrs[1] if room.current_player_turn == addrs[0] else addrs[0]]
+
+            for index, cell in enumerate(MOVES):
+                synchronizer.process_client_request(players[index % 2], dict(action=EventType.MOVE.value, data=cell))
+
+            for handler in handlers:
+                handler.request_queue.clear()
+
+    return run, games * (len(MOVES) + 1)
+
+#random games played until they are won or drawn, a move is an operation
+def win_detection_case(size, win_length):
+    def create_case():
+        rng = random.Random(SEED)
+        games = []
+        move_count = 0
+
+        while move_count < BATCH_SIZE:
+            cells = list(range(size * size))
+            rng.shuffle(cells)
+            game_state = GameState(size, win_length)
+
+            for index, cell in enumerate(cells):
+                if game_state.play(cell, index % 2) != GameState.IN_PROGRESS:
+                    break
+
+            games.append(cells[:index + 1])
+            move_count += index + 1
+
+        def run():
+            for cells in games:
+                game_state = GameState(size, win_length)
+
+                for index, cell in enumerate(cells):
+                    game_state.play(cell, index % 2)
+
+        return run, move_count
+
+    return create_case
+
+#games played between two bots, a move is an operation. Moves are found with the search and its shared
+#transposition table, or looked up in the perfect play table
+def bot_case(size, win_length, use_table=False):
+    def create_case():
+        game_search = GameSearch.get_game_search(size, win_length)
+
+        if use_table:
+            find_best_move = PerfectPlayTable.get_default().get_best_move
+        else:
+            find_best_move = game_search.find_best_move
+
+        #returns the number of moves played
+        def play_game():
+            game_state = GameState(size, win_length)
+            player_index = 0
+
+            while True:
+                cell = find_best_move(game_state.player_cells[player_index], game_state.player_cells[1 - player_index])
+
+                if game_state.play(cell, player_index) != GameState.IN_PROGRESS:
+                    return game_state.move_count
+
+                player_index = 1 - player_index
+
+        #bots play the same game every time
+        games = max(1, BATCH_SIZE // play_game())
+
+        def run():
+            for _ in range(games):
+                play_game()
+
+        return run, games * play_game()
+
+    return create_case
+
+#whole tournaments scheduled without playing the games, the first player of every series wins it. A series is
+#an operation
+def tournament_case(tournament_class, player_count):
+    def create_case():
+        def run_tournament():
+            tournament = tournament_class("benchmark", (GameState.DEFAULT_SIZE, GameState.DEFAULT_WIN_LENGTH))
+
+            for player in range(player_count):
+                tournament.add_player(player, str(player))
+
+            playable_series = tournament.start()
+            series_count = 0
+
+            while playable_series:
+                series = playable_series.pop()
+                series.record_game(series.players[0])
+                playable_series.extend(tournament.finish_series(series))
+                series_count += 1
+
+            return series_count
+
+        def run():
+            run_tournament()
+
+        return run, run_tournament()
+
+    return create_case
+
+#key: name of the benchmark, value: function that creates the case
+CASES = {
+    "framing.create_message": create_message_case,
+    "framing.json": frame_content_case(ProtocolType.JSON),
+    "framing.binary": frame_content_case(ProtocolType.BINARY),
+    "parse.json": decode_frames_case(ProtocolType.JSON),
+    "parse.binary": decode_frames_case(ProtocolType.BINARY),
+    "dispatch.process_client_request": dispatch_case,
+    "win_detection.3x3": win_detection_case(3, 3),
+    "win_detection.15x15_5": win_detection_case(15, 5),
+    "bot.3x3": bot_case(3, 3),
+    "bot.3x3_table": bot_case(3, 3, use_table=True),
+    "tournament.elimination_4096": tournament_case(SingleEliminationTournament, 4096),
+    "tournament.round_robin_128": tournament_case(RoundRobinTournament, 128),
+}
+
+#returns the best number of operations per second out of the repeats. Each repeat runs the case for
+#at least MIN_TIME seconds so that short cases are not dominated by timer noise
+def measure(create_case, repeats):
+    run, operations = create_case()
+    #first run is not measured so caches and lazily created tables are already warm
+    run()
+    best = 0
+
+    for _ in range(repeats):
+        runs = 0
+        start = time.perf_counter()
+
+        while True:
+            run()
+            runs += 1
+            elapsed = time.perf_counter() - start
+
+            if elapsed >= MIN_TIME:
+                break
+
+        best = max(best, operations * runs / elapsed)
+
+    return best
+
+def find_free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+#games played against a server running on the loopback interface, returns the games per second and the
+#move latency of the best run
+def measure_end_to_end(repeats):
+    port = find_free_port()
+    best = None
+
+    #server log files are written to a temporary directory
+    with tempfile.TemporaryDirectory() as log_dir:
+        server = subprocess.Popen([sys.executable, SERVER_PATH, "-p", str(port)], cwd=log_dir,
+                                  stdout=subprocess.DEVNULL)
+
+        try:
+            wait_for_server(port)
+
+            for repeat in range(repeats + 1):
+                game_indexes = range(repeat * E2E_GAMES, (repeat + 1) * E2E_GAMES)
+                elapsed, _, move_times = asyncio.run(run_load_test(port, game_indexes))
+
+                #first run warms up the server
+                if repeat > 0 and (best is None or elapsed < best[0]):
+                    best = (elapsed, sorted(move_times))
+        finally:
+            server.terminate()
+            server.wait()
+
+    elapsed, move_times = best
+    return {
+        "e2e.games": dict(value=E2E_GAMES / elapsed, unit="games/s", higher_is_better=True),
+        "e2e.move_p50": dict(value=percentile(move_times, 0.5) * 1e3, unit="ms", higher_is_better=False),
+        "e2e.move_p99": dict(value=percentile(move_times, 0.99) * 1e3, unit="ms", higher_is_better=False),
+    }
+
+def get_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(repeats):
+    results = dict()
+
+    for name, create_case in CASES.items():
+        results[name] = dict(value=measure(create_case, repeats), unit="ops/s", higher_is_better=True)
+        print(f'{name:>32} | {results[name]["value"]:>14,.0f} ops/s')
+
+    for name, result in measure_end_to_end(repeats).items():
+        results[name] = result
+        print(f'{name:>32} | {result["value"]:>14,.2f} {result["unit"]}')
+
+    return dict(
+        commit=get_commit(),
+        date=datetime.datetime.now().isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        platform=platform.platform(),
+        json_library=JsonCodec.get_default().library,
+        repeats=repeats,
+        results=results,
+    )
+
+#returns the names of the results that got worse than the baseline by more than the threshold
+def find_regressions(report, baseline, threshold):
+    regressions = []
+
+    for name, baseline_result in baseline["results"].items():
+        result = report["results"].get(name)
+
+        if result is None:
+            continue
+
+        #relative change, positive when the result got worse
+        if baseline_result["higher_is_better"]:
+            change = 1 - result["value"] / baseline_result["value"]
+        else:
+            change = result["value"] / baseline_result["value"] - 1
+
+        if change > threshold:
+            regressions.append(name)
+            print(f'regression: {name} {baseline_result["value"]:,.2f} -> {result["value"]:,.2f} '
+                  f'{result["unit"]} ({change:.0%} worse)')
+
+    return regressions
+
+def main():
+    output_path = "benchmark_results.json"
+    baseline_path = None
+    threshold = 0.1
+    repeats = 5
+    arguments_list = sys.argv[1:]
+
+    for argument, value in zip(*[iter(arguments_list)]*2):
+        if argument == '-o':
+            output_path = value
+        elif argument == '-b':
+            baseline_path = value
+        elif argument == '-t':
+            threshold = float(value)
+        elif argument == '-r':
+            repeats = int(value)
+
+    report = run(repeats)
+
+    with open(output_path, "w") as output_file:
+        json.dump(report, output_file, indent=2)
+
+    print(f'results written to {output_path}')
+
+    if baseline_path is not None:
+        with open(baseline_path) as baseline_file:
+            baseline = json.load(baseline_file)
+
+        regressions = find_regressions(report, baseline, threshold)
+
+        if regressions:
+            sys.exit(f'{len(regressions)} result(s) regressed by more than {threshold:.0%} against {baseline_path}')
+
+        print(f'no regressions against {baseline_path}')
+
+if __name__ == '__main__':
+    main()
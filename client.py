@@ -3,10 +3,13 @@ from tic_tac_toe.message.start import Start
 from tic_tac_toe.message.stop import Stop
 from tic_tac_toe.message.move import Move
 from tic_tac_toe.message.deregister import Deregister
+from tic_tac_toe.message.spectate import Spectate
+from tic_tac_toe.message.resume import Resume
 from tic_tac_toe.application.application_type import ApplicationType
 from tic_tac_toe.message_handler.client.client_message_handler import ClientMessageHandler
 from tic_tac_toe.message.event_type import EventType
-from threading import Thread
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+from threading import Thread, Event
 from queue import Queue
 import selectors
 import traceback
@@ -17,16 +20,43 @@ import datetime
 import time
 
 class Client(ApplicationType):
-    def __init__(self, server_host, server_port):
+    #seconds between attempts to reconnect to the server after the connection was lost
+    RECONNECT_INTERVAL = 1
+
+    def __init__(self, server_host, server_port, room_id=None, protocol=ProtocolType.JSON, board_size=None,
+                 win_length=None, play_against_bot=False, tournament_id=None, tournament_format=None, best_of=None,
+                 spectate_room_id=None, rating=None):
         super().__init__()
         self.server_host = server_host
         self.server_port = server_port
+        #room that the player would like to join, the server picks a room when not provided
+        self.room_id = room_id
+        #protocol used to talk to the server (json or binary)
+        self.protocol = protocol
+        #board size and number of symbols in a row needed to win, only used if a new room is created
+        self.board_size = board_size
+        self.win_length = win_length
+        #asks the server for a bot to play against instead of waiting for another player
+        self.play_against_bot = play_against_bot
+        #tournament that the player would like to join, the format and number of games in each series are only
+        #used if a new tournament is created
+        self.tournament_id = tournament_id
+        self.tournament_format = tournament_format
+        self.best_of = best_of
+        #room that the client watches instead of registering as a player
+        self.spectate_room_id = spectate_room_id
+        #rating used to pair the player with a player of a similar rating when the server matches players by rating
+        self.rating = rating
         self.client_message_handler = None
         self.client_socket_thread = None
         self.client_input_thread = None
         self.client_menu_thread = None
         self.client_output_thread = None
         self.client_input_queue = Queue()
+        #set when the player has entered input or the game state has changed, wakes up the menu thread
+        self.menu_event = Event()
+        #set when the player has exited the game or the connection to the server has been closed
+        self.exit_event = Event()
         self.stop_threads = False
 
     def start(self):
@@ -43,14 +73,13 @@ class Client(ApplicationType):
         self.client_input_thread.daemon = True
         self.client_input_thread.start()
         #start server output thread
-        self.client_output_thread = Thread(target=self._client_output_handler)
+        self.client_output_thread = Thread(target=self._client_output_handler, args=(self.client_message_handler,))
         self.client_output_thread.start()
 
-        #while client is still connected to the server and the player has not de-registered
-        while self.client_message_handler is not None and not self.client_message_handler.player_has_exit_game():
-            one = 1
+        #wait until the client is disconnected from the server or the player has de-registered
+        self.exit_event.wait()
 
-        self.stop_threads = True
+        self._stop_threads()
         self.client_menu_thread.join(timeout=1)
         self.client_socket_thread.join(timeout=1)
         self.client_input_thread.join(timeout=1)
@@ -64,10 +93,20 @@ class Client(ApplicationType):
         # while still connected
         while self.client_message_handler is not None and not self.stop_threads:
             request = None
-            request_sent = False
+
+            # player has de-registered, let the client exit
+            if self.client_message_handler.player_has_exit_game():
+                self.exit_event.set()
+                break
+
+            # spectators watch a room instead of registering
+            elif not initial_register_request_sent and self.spectate_room_id is not None:
+                print(f'Watching room "{self.spectate_room_id}"\n')
+                request = self._create_request(Spectate(self.spectate_room_id))
+                initial_register_request_sent = True
 
             # initial register request
-            if not initial_register_request_sent:
+            elif not initial_register_request_sent:
                 print("What would you like your player name to be?\n")
                 request = self._handle_register_event()
                 initial_register_request_sent = True
@@ -90,11 +129,14 @@ class Client(ApplicationType):
                 new_state_detected = False
 
                 # exit if new game state detected
-                while not user_input_is_valid and not new_state_detected:
+                while not user_input_is_valid and not new_state_detected and not self.stop_threads:
                     try:
-                        user_input = None
+                        user_input = self._retrieve_user_input()
+                        new_state_detected = self.client_message_handler.new_state_detected()
 
-                        while user_input is None and not new_state_detected:
+                        # sleep until the player enters input or the game state changes
+                        while user_input is None and not new_state_detected and not self.stop_threads:
+                            self._wait_for_menu_event()
                             user_input = self._retrieve_user_input()
                             new_state_detected = self.client_message_handler.new_state_detected()
 
@@ -117,59 +159,41 @@ class Client(ApplicationType):
             if request is not None:
                 self.client_message_handler.send_request(request)
 
-            # wait for menu updates after input has been made
-            if request_sent:
-                menu_timeout = 0
-                while not self.client_message_handler.new_state_detected() and menu_timeout != 30:
-                    menu_timeout += 1
-                    time.sleep(1)
-
-                    if menu_timeout % 5 == 0:
-                        print("Waiting for updates from server")
-
-                    if menu_timeout == 30:
-                        print(
-                            "Timed out waiting for new updates from server, would you like to keep waiting for updates? (y/n)")
-                        valid_y_n = False
-
-                        # check if user wants to keep waiting for server updates
-                        while not valid_y_n:
-                            user_input = None
-                            while user_input is None:
-                                user_input = self._retrieve_user_input
-
-                            if user_input.lower() == 'y':
-                                menu_timeout = 0
-                                valid_y_n = True
-                            elif user_input.lower() == 'n':
-                                valid_y_n = True
-                            else:
-                                print("Invalid option, select y for yes or n for no")
-
     #threaded method to get user input to prevent it from blocking server messages from being sent to the user
     def _client_input_handler(self):
         while self.client_message_handler is not None and not self.stop_threads:
             self.client_input_queue.put(input())
+            self.menu_event.set()
 
-    #threaded method to print out server messages without input blocking
-    def _client_output_handler(self):
-        while self.client_message_handler is not None and not self.stop_threads:
-            server_output = self.client_message_handler.get_server_output()
+    #threaded method to print out server messages without input blocking. The handler is passed in since
+    #the socket thread clears self.client_message_handler when the connection is closed
+    def _client_output_handler(self, client_message_handler):
+        while not self.stop_threads:
+            #blocks until there is output, None is returned when the client is stopping
+            server_output = client_message_handler.get_server_output(block=True)
 
             #prints out server output
             if server_output is not None:
                 print(server_output)
 
-    #connect to server
-    def _start_connection(self, host, port):
+    #connect to server. A socket that is already connected and the synchronizer of the previous connection are
+    #passed in when the client reconnects
+    def _start_connection(self, host, port, sock=None, client_synchronizer=None):
         addr = (host, port)
-        self.logger.info(f'starting connection to {addr}')
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.setblocking(False)
-        sock.connect_ex(addr)
-        events = selectors.EVENT_READ | selectors.EVENT_WRITE
-        self.client_message_handler = ClientMessageHandler(self.sel, sock, addr)
-        self.sel.register(sock, events, data=self.client_message_handler)
+
+        if sock is None:
+            self.logger.info(f'starting connection to {addr}')
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setblocking(False)
+            sock.connect_ex(addr)
+
+        self.client_message_handler = ClientMessageHandler(self.sel, sock, addr, self.protocol, self.menu_event,
+                                                           client_synchronizer)
+        #socket becomes writable once the non-blocking connect has finished, after that it is only watched
+        #for EVENT_WRITE while there are requests to send
+        self.client_message_handler.set_selector_events(selectors.EVENT_READ | selectors.EVENT_WRITE)
+        #menu thread wakes up the socket thread when it sends a request
+        self.client_message_handler.enable_selector_wakeup()
         self.logger.info("connection established with the server")
 
     def _process_socket_traffic(self):
@@ -179,19 +203,60 @@ class Client(ApplicationType):
                 for key, mask in events:
                     message = key.data
                     try:
-                        message.process_events()
+                        message.process_events(mask)
                     except Exception:
                         self.logger.error(f'client: error: exception for {message.addr}:\n{traceback.format_exc()}')
                         message.close()
                 # Check for a socket being monitored to continue.
-                if not self.sel.get_map():
+                if not self.sel.get_map() and not self._reconnect():
                     break
 
         except KeyboardInterrupt:
             self.logger.error("caught keyboard interrupt, exiting")
         finally:
             self.sel.close()
+            self.client_message_handler.stop_server_output()
             self.client_message_handler = None
+            self.exit_event.set()
+
+    #reconnects to the server after the connection was lost during a game and asks for the player's seat back.
+    #Returns False when the player has no session or the server could not be reached before the seat was freed
+    def _reconnect(self):
+        client_synchronizer = self.client_message_handler.client_synchronizer
+        session = client_synchronizer.get_session()
+
+        if session is None or client_synchronizer.player_has_exit_game() or self.stop_threads:
+            return False
+
+        token, room_id, grace_period = session
+        deadline = time.monotonic() + grace_period
+        print("The connection to the server was lost, reconnecting\n")
+
+        #exit event is set when the player exits while the client is reconnecting
+        while time.monotonic() < deadline and not self.exit_event.wait(self.RECONNECT_INTERVAL):
+            try:
+                sock = socket.create_connection((self.server_host, self.server_port), timeout=self.RECONNECT_INTERVAL)
+            except OSError as e:
+                self.logger.error(f'could not reconnect to the server: {repr(e)}')
+                continue
+
+            sock.setblocking(False)
+            self._start_connection(self.server_host, self.server_port, sock, client_synchronizer)
+            self.client_message_handler.send_request(self._create_request(Resume(token, room_id)))
+            return True
+
+        return False
+
+    #lets every thread know that the client is stopping and wakes up the threads that are waiting for events
+    def _stop_threads(self):
+        self.stop_threads = True
+        self.menu_event.set()
+        #socket thread clears the handler once the connection is closed
+        client_message_handler = self.client_message_handler
+
+        if client_message_handler is not None:
+            client_message_handler.stop_server_output()
+            client_message_handler.wake_up_selector()
 
     #processes different types of commands that the player has selected
     def _create_request_from_command(self, command):
@@ -212,9 +277,11 @@ class Client(ApplicationType):
 
     #handle register event for initial register of if player de-registers and re-registers
     def _handle_register_event(self):
-        player_name = None
-        while player_name is None:
-            player_name = self._retrieve_user_input()
+        player_name = self._wait_for_user_input()
+
+        #client is stopping
+        if player_name is None:
+            return None
 
         return self._create_request(Register(player_name))
 
@@ -237,10 +304,11 @@ class Client(ApplicationType):
         #retrieve the next move from the player
         while not valid_move_picked:
             print("Select a spot that you would like to place your next move:")
-            player_move = None
+            player_move = self._wait_for_user_input()
 
-            while player_move is None:
-                player_move = self._retrieve_user_input()
+            #client is stopping
+            if player_move is None:
+                return None
 
             player_move = "".join(player_move.split())
 
@@ -250,16 +318,40 @@ class Client(ApplicationType):
             else:
                 print("That's not a valid move, please try again")
 
-        return self._create_request(Move(player_move))
+        return self._create_request(Move(int(player_move)))
 
     def _handle_deregister_event(self):
         return self._create_request(Deregister())
 
     def _create_request(self, event):
+        content = dict(action=event.event_type.value, data=event.data)
+
+        #let the server know which room the player would like to join and the board they would like to play on
+        if event.event_type == EventType.REGISTER:
+            if self.room_id is not None:
+                content["room"] = self.room_id
+            if self.board_size is not None:
+                content["board_size"] = self.board_size
+            if self.win_length is not None:
+                content["win_length"] = self.win_length
+            if self.play_against_bot:
+                content["bot"] = True
+            if self.tournament_id is not None:
+                content["tournament"] = self.tournament_id
+            if self.tournament_format is not None:
+                content["tournament_format"] = self.tournament_format
+            if self.best_of is not None:
+                content["best_of"] = self.best_of
+            if self.rating is not None:
+                content["rating"] = self.rating
+        #let the server know which room holds the player's seat
+        elif event.event_type == EventType.RESUME:
+            content["room"] = event.room_id
+
         return dict(
             type="text/json",
             encoding="utf-8",
-            content=dict(action=event.event_type.value, data=event.data),
+            content=content,
         )
 
     #dequeues input made by users
@@ -277,9 +369,27 @@ class Client(ApplicationType):
 
         return user_input
 
+    #blocks until the player has entered input, None is returned if the client is stopping
+    def _wait_for_user_input(self):
+        user_input = self._retrieve_user_input()
+
+        while user_input is None and not self.stop_threads:
+            self._wait_for_menu_event()
+            user_input = self._retrieve_user_input()
+
+        return user_input
+
+    #blocks until the player has entered input, the game state has changed or the client is stopping.
+    #The event is cleared before the caller checks what has changed so that no update is missed
+    def _wait_for_menu_event(self):
+        self.menu_event.wait()
+        self.menu_event.clear()
+
 def main():
     if len(sys.argv) < 2:
-        sys.exit('Not enough arguments: -h for help or -i <server ip> -p <server port>')
+        sys.exit('Not enough arguments: -h for help or -i <server ip> -p <server port> [-r <room id>] [-m <json|binary>] '
+                 '[-s <board size>] [-k <win length>] [-o <player|bot>] [-t <tournament id>] '
+                 '[-f <elimination|round_robin>] [-b <best of>] [-v <room id>] [-R <rating>]')
 
     #create app logger
     logger = logging.getLogger('app')
@@ -294,6 +404,16 @@ def main():
         arguments_list = sys.argv[1:]
         server_ip = None
         server_port = None
+        room_id = None
+        protocol = ProtocolType.JSON
+        board_size = None
+        win_length = None
+        play_against_bot = False
+        tournament_id = None
+        tournament_format = None
+        best_of = None
+        spectate_room_id = None
+        rating = None
         print_help_and_exit = False
 
         if len(sys.argv) > 2:
@@ -302,6 +422,26 @@ def main():
                     server_ip = value
                 elif argument == '-p':
                     server_port = int(value)
+                elif argument == '-r':
+                    room_id = value
+                elif argument == '-m':
+                    protocol = ProtocolType[value.upper()]
+                elif argument == '-s':
+                    board_size = int(value)
+                elif argument == '-k':
+                    win_length = int(value)
+                elif argument == '-o':
+                    play_against_bot = value.lower() == "bot"
+                elif argument == '-t':
+                    tournament_id = value
+                elif argument == '-f':
+                    tournament_format = value.lower()
+                elif argument == '-b':
+                    best_of = int(value)
+                elif argument == '-v':
+                    spectate_room_id = value
+                elif argument == '-R':
+                    rating = int(value)
                 elif argument == '-h':
                     print_help_and_exit = True
         elif arguments_list[0] == '-h':
@@ -309,11 +449,19 @@ def main():
 
         if print_help_and_exit:
             sys.exit('To run the client, provide the ip address of the server with the -i option and provide the port '
-                     'that the server is listening on with the -p option.')
+                     'that the server is listening on with the -p option. Optionally provide the room that you would '
+                     'like to play in with the -r option, the protocol to use (json or binary) with the -m option, the '
+                     'board size with the -s option, the number of symbols in a row needed to win with the -k option, '
+                     'the opponent to play against (player or bot) with the -o option and the tournament to join with '
+                     'the -t option. A new tournament uses the format (elimination or round_robin) given with the -f '
+                     'option and series of the number of games given with the -b option. Use the -v option to watch a room '
+                     'instead of playing. The rating used to pair you with a player of a similar rating when the '
+                     'server matches players by rating is given with the -R option.')
         elif server_ip is None or server_port is None:
             sys.exit('Server ip and port must be specified')
         else:
-            client = Client(server_ip, server_port)
+            client = Client(server_ip, server_port, room_id, protocol, board_size, win_length, play_against_bot,
+                            tournament_id, tournament_format, best_of, spectate_room_id, rating)
             client.start()
             sys.exit('Client has been closed')
     except Exception as e:
@@ -0,0 +1,234 @@
+from tic_tac_toe.application.application_type import ApplicationType
+from tic_tac_toe.message_handler.client.simulated_client_message_handler import SimulatedClientMessageHandler
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+import os
+import socket
+import sys
+import time
+import traceback
+import logging
+import datetime
+
+#puts load on the server with many simulated clients from a single process. Clients connect without
+#blocking, are paired into games that each have their own room and play until they have finished their games.
+#When ratings are provided the clients don't ask for a room and are paired by the server's matchmaking queue instead,
+#clients that are not paired wait until the end of the run
+class LoadGenerator(ApplicationType):
+    #max number of connections opened in each pass of the event loop
+    CONNECT_BATCH_SIZE = 100
+
+    def __init__(self, server_host, server_port, client_count, game_count=1, move_list=None,
+                 protocol=ProtocolType.JSON, board_size=None, win_length=None, duration=60, ratings=None):
+        super().__init__()
+        self.server_host = server_host
+        self.server_port = server_port
+        #clients are paired into games so the count is rounded up to an even number
+        self.client_count = client_count + client_count % 2
+        #number of games played by each pair of clients
+        self.game_count = game_count
+        #cells that the clients try to play in order, clients play random moves when not provided
+        self.move_list = move_list
+        self.protocol = protocol
+        self.board_size = board_size
+        self.win_length = win_length
+        #max number of seconds the load test runs for
+        self.duration = duration
+        #ratings of the clients, given to the clients in turn
+        self.ratings = ratings
+        self.clients = []
+        #clients that were closed because of an error
+        self.failed_clients = []
+
+    def start(self):
+        self.logger.info("Starting tic-tac-toe load generator")
+        self._raise_open_file_limit()
+        start_time = time.perf_counter()
+        end_time = start_time + self.duration
+        #rooms of previous runs may still be open on the server
+        room_prefix = f'load-{os.getpid()}-{int(time.time())}'
+
+        try:
+            while time.perf_counter() < end_time:
+                #open connections in batches so the server's listen backlog does not overflow
+                while len(self.clients) < self.client_count:
+                    self._start_connection(len(self.clients), room_prefix)
+
+                    if len(self.clients) % self.CONNECT_BATCH_SIZE == 0:
+                        break
+
+                events = self.sel.select(timeout=0 if len(self.clients) < self.client_count else 1)
+
+                for key, mask in events:
+                    client = key.data
+                    try:
+                        client.process_events(mask)
+                    except Exception:
+                        self.logger.error(f'load generator: error: exception for {client.addr}:\n{traceback.format_exc()}')
+                        self.failed_clients.append(client)
+                        client.close()
+
+                if len(self.clients) == self.client_count and all(client.is_done() or client.sock is None
+                                                                  for client in self.clients):
+                    break
+        except KeyboardInterrupt:
+            self.logger.error("caught keyboard interrupt, stopping load test")
+
+        elapsed = time.perf_counter() - start_time
+        self._print_report(elapsed)
+
+        for client in self.clients:
+            if client.sock is not None:
+                client.close()
+
+        self.sel.close()
+
+    def _start_connection(self, client_index, room_prefix):
+        addr = (self.server_host, self.server_port)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setblocking(False)
+        sock.connect_ex(addr)
+        if self.ratings is None:
+            #the first client of each pair starts the games
+            room_id, starts_games, rating = f'{room_prefix}-{client_index // 2}', client_index % 2 == 0, None
+        else:
+            room_id, starts_games, rating = None, None, self.ratings[client_index % len(self.ratings)]
+
+        client = SimulatedClientMessageHandler(self.sel, sock, addr, f'player-{client_index}', room_id, starts_games,
+                                               self.game_count, self.move_list, self.protocol, self.board_size,
+                                               self.win_length, rating)
+        self.clients.append(client)
+
+    #every client uses a socket so the limit on open files is raised as high as it is allowed to go
+    @staticmethod
+    def _raise_open_file_limit():
+        try:
+            import resource
+        except ImportError:
+            #resource limits are not available on Windows
+            return
+
+        soft_limit, hard_limit = resource.getrlimit(resource.RLIMIT_NOFILE)
+
+        if soft_limit != hard_limit:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard_limit, hard_limit))
+
+    def _print_report(self, elapsed):
+        connect_times = [client.connect_time for client in self.clients if client.connect_time is not None]
+        move_times = [move_time for client in self.clients for move_time in client.move_times]
+        #each game is finished by both of its clients
+        games_finished = sum(client.games_finished for client in self.clients) // 2
+        errors = sum(client.errors for client in self.clients)
+
+        print(f'clients: {len(connect_times)}/{self.client_count} connected, {len(self.failed_clients)} failed, '
+              f'{errors} error responses')
+        print(f'elapsed: {elapsed:.2f}s')
+
+        if self.ratings is not None:
+            paired_clients = [client for client in self.clients if client.is_paired]
+            print(f'matchmaking: {len(paired_clients)}/{len(self.clients)} clients paired')
+
+            for rating in sorted(set(self.ratings)):
+                rating_clients = [client for client in self.clients if client.rating == rating]
+                print(f'rating {rating}: {sum(client.is_paired for client in rating_clients)}/{len(rating_clients)} '
+                      f'clients paired')
+
+        if connect_times:
+            connect_duration = max(client.connect_start_time + client.connect_time for client in self.clients
+                                   if client.connect_time is not None) - \
+                               min(client.connect_start_time for client in self.clients)
+            print(f'connection rate: {len(connect_times) / connect_duration:.0f} connections/s')
+            print(f'connect latency: {format_percentiles(connect_times)}')
+
+        print(f'games: {games_finished} finished, {games_finished / elapsed:.1f} games/s')
+        print(f'moves: {len(move_times)} played, {len(move_times) / elapsed:.0f} moves/s')
+
+        if move_times:
+            print(f'move latency: {format_percentiles(move_times)}')
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+#p50, p99 and p999 of the times in milliseconds
+def format_percentiles(times):
+    times = sorted(times)
+    return ", ".join(f'{name} {percentile(times, fraction) * 1e3:.2f}ms'
+                     for name, fraction in (("p50", 0.5), ("p99", 0.99), ("p999", 0.999)))
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit('Not enough arguments: -h for help or -i <server ip> -p <server port> [-c <clients>] '
+                 '[-g <games per pair>] [-l <random|cell list>] [-m <json|binary>] [-s <board size>] '
+                 '[-k <win length>] [-d <duration>] [-R <rating list>]')
+
+    #create app logger, only errors are logged so logging does not slow down the load test
+    logger = logging.getLogger('app')
+    logger.setLevel(logging.ERROR)
+    log_name = datetime.datetime.now().strftime('load_generator_%d_%m_%Y_%H_%M_%S.log')
+    fh = logging.FileHandler(log_name, delay=True)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    fh.setFormatter(formatter)
+    logger.addHandler(fh)
+
+    try:
+        arguments_list = sys.argv[1:]
+        server_ip = None
+        server_port = None
+        client_count = 1000
+        game_count = 1
+        move_list = None
+        protocol = ProtocolType.JSON
+        board_size = None
+        win_length = None
+        duration = 60
+        ratings = None
+        print_help_and_exit = False
+
+        if len(sys.argv) > 2:
+            for argument, value in zip(*[iter(arguments_list)]*2):
+                if argument == '-i':
+                    server_ip = value
+                elif argument == '-p':
+                    server_port = int(value)
+                elif argument == '-c':
+                    client_count = int(value)
+                elif argument == '-g':
+                    game_count = int(value)
+                elif argument == '-l':
+                    move_list = None if value == "random" else [int(cell) for cell in value.split(",")]
+                elif argument == '-m':
+                    protocol = ProtocolType[value.upper()]
+                elif argument == '-s':
+                    board_size = int(value)
+                elif argument == '-k':
+                    win_length = int(value)
+                elif argument == '-d':
+                    duration = float(value)
+                elif argument == '-R':
+                    ratings = [int(rating) for rating in value.split(",")]
+                elif argument == '-h':
+                    print_help_and_exit = True
+        elif arguments_list[0] == '-h':
+            print_help_and_exit = True
+
+        if print_help_and_exit:
+            sys.exit('To run the load generator, provide the ip address of the server with the -i option and the port '
+                     'that the server is listening on with the -p option. Optionally provide the number of clients '
+                     'with the -c option, the number of games each pair of clients plays with the -g option, the '
+                     'moves to play with the -l option (random or a comma separated list of cells in order of '
+                     'preference), the protocol (json or binary) with the -m option, the board size with the -s '
+                     'option, the number of symbols in a row needed to win with the -k option and the max number of '
+                     'seconds to run for with the -d option. To have the clients paired by the matchmaking queue of '
+                     'the server instead of placing them in rooms in pairs, provide their ratings as a comma separated '
+                     'list with the -R option, the ratings are given to the clients in turn.')
+        elif server_ip is None or server_port is None:
+            sys.exit('Server ip and port must be specified')
+        else:
+            load_generator = LoadGenerator(server_ip, server_port, client_count, game_count, move_list, protocol,
+                                           board_size, win_length, duration, ratings)
+            load_generator.start()
+    except Exception as e:
+        print(e)
+        sys.exit('Unhandled exception thrown, exiting load generator')
+
+if __name__ == '__main__':
+    main()
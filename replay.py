@@ -0,0 +1,199 @@
+from tic_tac_toe.game.game_state import GameState
+from tic_tac_toe.record.game_record import GameRecord
+from tic_tac_toe.record.game_record_log import GameRecordLog
+from collections import Counter
+import datetime
+import logging
+import sys
+import time
+
+#replays the games recorded by the server and reports statistics about them. The logs of every worker under the
+#record directory are scanned with memory-mapped reads and only the header and first move of each record are read,
+#so the statistics of millions of games are reported in a few seconds
+class Replay:
+    def __init__(self, record_directory, board_size=None):
+        self.logger = logging.getLogger('app')
+        self.record_directory = record_directory
+        #only games played on boards of this size are counted, every game is counted when None
+        self.board_size = board_size
+
+    #prints each move of a game and the board after it
+    def replay_game(self, game_number):
+        for record_number, game_record in GameRecordLog.iter_records(self.record_directory, game_number):
+            if record_number != game_number:
+                break
+
+            start_time = datetime.datetime.fromtimestamp(game_record.start_time).strftime('%d/%m/%Y %H:%M:%S')
+            first_symbol = GameState.SYMBOLS[game_record.first_player]
+            print(f'Game {game_number} started {start_time} on a {game_record.board_size}x{game_record.board_size} '
+                  f'board, {game_record.win_length} in a row to win')
+            print(f'X: "{game_record.player_names[0]}", O: "{game_record.player_names[1]}", {first_symbol} moved first')
+            game_state = GameState(game_record.board_size, game_record.win_length)
+
+            for move_number, cell in enumerate(game_record.moves):
+                player_index = game_record.first_player if move_number % 2 == 0 else 1 - game_record.first_player
+                game_state.play(cell, player_index)
+                print(f'\nMove {move_number + 1}: {GameState.SYMBOLS[player_index]} played {cell}')
+                print(self._format_board(game_state.board, game_record.board_size), end="")
+
+            print(f'\nResult: {self._format_result(game_record.end_reason, game_record.winner)}')
+            return
+
+        sys.exit(f'Game {game_number} is not in the game record log')
+
+    #prints statistics about every recorded game, grouped by board settings
+    def print_stats(self):
+        log_directories = GameRecordLog.find_logs(self.record_directory)
+
+        if not log_directories:
+            sys.exit(f'No game records found in "{self.record_directory}"')
+
+        scan_start = time.perf_counter()
+        #key: game summary, value: number of games with the summary
+        summary_counter = Counter()
+
+        for log_directory in log_directories:
+            summary_counter.update(GameRecordLog.iter_summaries(log_directory))
+
+        scan_time = time.perf_counter() - scan_start
+        game_count = sum(summary_counter.values())
+        print(f'Scanned {game_count} games from {len(log_directories)} log(s) in {scan_time:.2f}s '
+              f'({game_count / max(scan_time, 1e-9):.0f} games/s)')
+
+        #key: (board size, win length), value: counters of the games played with the settings
+        settings_dict = dict()
+
+        for summary, count in summary_counter.items():
+            board_size, win_length, first_player, winner, end_reason, move_count, first_move = summary
+
+            if self.board_size is not None and board_size != self.board_size:
+                continue
+
+            stats = settings_dict.setdefault((board_size, win_length), dict(
+                games=0, moves=0, end_reasons=Counter(), winners=Counter(), first_player_results=Counter(),
+                first_moves=dict()))
+            #result of the game for the player that moved first
+            if winner == GameRecord.NO_WINNER:
+                result = "none"
+            elif winner == first_player:
+                result = "won"
+            else:
+                result = "lost"
+
+            stats["games"] += count
+            stats["moves"] += move_count * count
+            stats["end_reasons"][end_reason] += count
+            stats["winners"][winner] += count
+            stats["first_player_results"][result] += count
+
+            if first_move is not None:
+                stats["first_moves"].setdefault(first_move, Counter())[result] += count
+
+        for (board_size, win_length), stats in sorted(settings_dict.items()):
+            self._print_settings_stats(board_size, win_length, stats)
+
+    def _print_settings_stats(self, board_size, win_length, stats):
+        games = stats["games"]
+        print(f'\n{board_size}x{board_size} board, {win_length} in a row: {games} games, '
+              f'{stats["moves"] / games:.1f} moves per game')
+        print('Ended by: ' + ", ".join(f'{GameRecord.END_REASON_NAMES[end_reason]} '
+                                       f'{self._format_rate(count, games)}'
+                                       for end_reason, count in sorted(stats["end_reasons"].items())))
+        print(f'Won by X: {self._format_rate(stats["winners"][0], games)}, '
+              f'won by O: {self._format_rate(stats["winners"][1], games)}, '
+              f'nobody won: {self._format_rate(stats["winners"][GameRecord.NO_WINNER], games)}')
+        print(f'Player that moved first won {self._format_rate(stats["first_player_results"]["won"], games)}, '
+              f'lost {self._format_rate(stats["first_player_results"]["lost"], games)}, '
+              f'nobody won {self._format_rate(stats["first_player_results"]["none"], games)}')
+        print(f'{"First move":>10} {"Games":>10} {"Won":>7} {"Lost":>7} {"No winner":>10}')
+
+        for first_move, results in sorted(stats["first_moves"].items()):
+            first_move_games = sum(results.values())
+            print(f'{first_move:>10} {first_move_games:>10} {self._format_rate(results["won"], first_move_games):>7} '
+                  f'{self._format_rate(results["lost"], first_move_games):>7} '
+                  f'{self._format_rate(results["none"], first_move_games):>10}')
+
+    @staticmethod
+    def _format_rate(count, total):
+        return f'{100 * count / total:.1f}%'
+
+    @staticmethod
+    def _format_result(end_reason, winner):
+        if winner == GameRecord.NO_WINNER:
+            return "draw" if end_reason == GameRecord.END_DRAW else "stopped, nobody won"
+
+        winner_symbol = GameState.SYMBOLS[winner]
+
+        if end_reason == GameRecord.END_TIME:
+            return f'{winner_symbol} won, the other player ran out of time'
+        elif end_reason == GameRecord.END_LEFT:
+            return f'{winner_symbol} won, the other player left'
+        else:
+            return f'{winner_symbol} won'
+
+    @staticmethod
+    def _format_board(board, board_size):
+        formatted_board = ""
+
+        for i in range(len(board)):
+            formatted_board += f'| {board[i]} |'
+
+            if (i + 1) % board_size == 0:
+                formatted_board += "\n"
+
+        return formatted_board
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit('Not enough arguments: -h for help or -d <record directory> [-g <game number>] [-s <board size>]')
+
+    #create app logger, only errors are logged
+    logger = logging.getLogger('app')
+    logger.setLevel(logging.ERROR)
+    log_name = datetime.datetime.now().strftime('replay_%d_%m_%Y_%H_%M_%S.log')
+    fh = logging.FileHandler(log_name, delay=True)
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    fh.setFormatter(formatter)
+    logger.addHandler(fh)
+
+    try:
+        arguments_list = sys.argv[1:]
+        record_directory = None
+        game_number = None
+        board_size = None
+        print_help_and_exit = False
+
+        if len(sys.argv) > 2:
+            for argument, value in zip(*[iter(arguments_list)]*2):
+                if argument == '-d':
+                    record_directory = value
+                elif argument == '-g':
+                    game_number = int(value)
+                elif argument == '-s':
+                    board_size = int(value)
+                elif argument == '-h':
+                    print_help_and_exit = True
+        elif arguments_list[0] == '-h':
+            print_help_and_exit = True
+
+        if print_help_and_exit:
+            sys.exit('To report statistics about the games recorded by the server, provide the record directory that '
+                     'was given to the server with the -d option. Only games played on a board of the size given with '
+                     'the -s option are counted when it is provided. To replay a single game move by move, provide '
+                     'its number with the -g option and the directory of the log it is in with the -d option, each '
+                     'worker of the server writes its games to its own log in a worker directory.')
+        elif record_directory is None:
+            sys.exit('Record directory must be specified')
+
+        replay = Replay(record_directory, board_size)
+
+        if game_number is None:
+            replay.print_stats()
+        else:
+            replay.replay_game(game_number)
+    except (OSError, ValueError) as e:
+        sys.exit(f'Could not read the game records: {e}')
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,19 @@
 from tic_tac_toe.application.application_type import ApplicationType
 from tic_tac_toe.message_handler.server.server_message_handler import ServerMessageHandler
 from tic_tac_toe.message_handler.server.server_synchronizer import ServerSynchronizer
+from tic_tac_toe.message_handler.server.async_server_message_handler import AsyncServerMessageHandler
+from tic_tac_toe.message_handler.server.room_router import RoomRouter
+from tic_tac_toe.message_handler.server.send_buffer_limits import SendBufferLimits
+from tic_tac_toe.message_handler.server.timer_wheel import TimerWheel
+from tic_tac_toe.message_handler.server.connection_monitor import ConnectionMonitor
+from tic_tac_toe.message_handler.server.player_session import PlayerSession
+from tic_tac_toe.record.game_record_log import GameRecordLog
+from tic_tac_toe.matchmaking.matchmaker import Matchmaker
+from tic_tac_toe.matchmaking.fifo_policy import FifoPolicy
+from tic_tac_toe.matchmaking.rating_band_policy import RatingBandPolicy
+import asyncio
+import os
+import signal
 import socket
 import selectors
 import traceback
@@ -9,11 +22,28 @@ import logging
 import datetime
 
 class Server(ApplicationType):
-    def __init__(self, listening_port):
+    def __init__(self, listening_port, room_router=None, matchmaking_policy=None, send_buffer_limits=None,
+                 move_time_limit=None, heartbeat_interval=None, idle_timeout=None, session_grace_period=None,
+                 record_directory=None):
         super().__init__()
         self.listening_port = listening_port
+        #routes players between worker processes, only used when the server is run with several workers
+        self.room_router = room_router
+        #watermarks on the number of bytes waiting to be sent to each client
+        self.send_buffer_limits = SendBufferLimits() if send_buffer_limits is None else send_buffer_limits
+        #timers of the move clocks and of the connection checks, advanced by the event loop
+        self.timer_wheel = TimerWheel()
+        room_id_prefix = "room-" if room_router is None else room_router.get_room_id_prefix()
+        #finished games are written to the log in the record directory, games are not recorded when None
+        self.game_record_log = None if record_directory is None else GameRecordLog(record_directory)
+
         #singleton server request handler to keep all states in sync
-        self.server_request_handler = ServerSynchronizer()
+        self.server_request_handler = ServerSynchronizer(room_id_prefix, Matchmaker(matchmaking_policy),
+                                                         self.timer_wheel, move_time_limit, session_grace_period,
+                                                         self.game_record_log)
+        #sends heartbeats to the clients and evicts the ones that are idle or no longer answer
+        self.connection_monitor = ConnectionMonitor(self.timer_wheel, self.server_request_handler,
+                                                    heartbeat_interval, idle_timeout)
 
     def start(self):
         self.logger.info("Starting tic-tac-toe server")
@@ -21,6 +51,9 @@ class Server(ApplicationType):
         lsock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         # Avoid bind() exception: OSError: [Errno 48] Address already in use
         lsock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        #every worker listens on the same port and the kernel spreads new connections between them
+        if self.room_router is not None:
+            lsock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
         lsock.bind((host, self.listening_port))
         lsock.listen()
         self.logger.info(f'listening on {(host, self.listening_port)}')
@@ -28,17 +61,24 @@ class Server(ApplicationType):
         lsock.setblocking(False)
         self.sel.register(lsock, selectors.EVENT_READ, data=None)
 
+        if self.room_router is not None:
+            self.sel.register(self.room_router.inbox, selectors.EVENT_READ, data=self.room_router)
+
         try:
             while True:
-                events = self.sel.select(timeout=None)
+                #wait until the next timer is due when there are timers waiting
+                events = self.sel.select(timeout=self.timer_wheel.get_timeout())
                 for key, mask in events:
                     #only ran when a new socket is created with a new client
                     if key.data is None:
                         self._accept_wrapper(key.fileobj)
+                    #client handed off by another worker
+                    elif key.data is self.room_router:
+                        self._accept_hand_off()
                     else:
                         message = key.data
                         try:
-                            message.process_events()
+                            message.process_events(mask)
                         except ConnectionResetError:
                             self.logger.error(f'server: error, client {message.addr} has unexpectedly closed its connection')
                             self.server_request_handler.remove_connected_client(message.addr)
@@ -46,23 +86,235 @@ class Server(ApplicationType):
 
                         except Exception:
                             self.logger.error(f'server: error: exception for {message.addr}:\n{traceback.format_exc()}')
+                            #stop sending updates to a client that is no longer connected
+                            self.server_request_handler.remove_connected_client(message.addr)
                             message.close()
 
+                self.timer_wheel.advance()
 
         except KeyboardInterrupt:
             self.logger.error("caught keyboard interrupt, exiting")
         finally:
             self.sel.close()
 
+            if self.game_record_log is not None:
+                self.game_record_log.close()
+
     def _accept_wrapper(self, sock):
         conn, addr = sock.accept()  # Should be ready to read
         self.logger.info(f'accepted connection from {addr}')
         conn.setblocking(False)
-        server_message_handler = ServerMessageHandler(self.sel, conn, addr, self.server_request_handler)
-        self.sel.register(conn, selectors.EVENT_READ | selectors.EVENT_WRITE, data=server_message_handler)
+        server_message_handler = ServerMessageHandler(self.sel, conn, addr, self.server_request_handler,
+                                                      self.room_router, self.send_buffer_limits)
+        #connections are only watched for EVENT_WRITE when there is data that needs to be sent to them
+        server_message_handler.set_selector_events(selectors.EVENT_READ)
+        self.server_request_handler.add_new_connected_client(addr, server_message_handler)
+        self.connection_monitor.add(server_message_handler)
+
+    #takes over a client from another worker and processes the requests that the worker did not process
+    def _accept_hand_off(self):
+        conn, protocol, requests, pending_data, buffered_data = self.room_router.receive_hand_off()
+        conn.setblocking(False)
+
+        try:
+            addr = conn.getpeername()
+        except OSError:
+            self.logger.error('server: error, client closed its connection while it was being handed off')
+            conn.close()
+            return
+
+        self.logger.info(f'accepted connection from {addr} handed off by another worker')
+        server_message_handler = ServerMessageHandler(self.sel, conn, addr, self.server_request_handler,
+                                                      self.room_router, self.send_buffer_limits)
+        server_message_handler.set_selector_events(selectors.EVENT_READ)
         self.server_request_handler.add_new_connected_client(addr, server_message_handler)
+        self.connection_monitor.add(server_message_handler)
+
+        try:
+            server_message_handler.resume(protocol, requests, pending_data, buffered_data)
+        except Exception:
+            self.logger.error(f'server: error: exception for {addr}:\n{traceback.format_exc()}')
+            self.server_request_handler.remove_connected_client(addr)
+            server_message_handler.close()
+
+
+#runs the selectors server in several worker processes that share the listening port. Each worker has
+#its own event loop and server synchronizer, players are handed off to the worker that owns their room.
+#Each worker writes its games to its own log in a directory of the record directory
+def start_workers(listening_port, worker_count, matchmaking_policy=None, send_buffer_limits=None, move_time_limit=None,
+                  heartbeat_interval=None, idle_timeout=None, session_grace_period=None, record_directory=None):
+    #the workers bind with SO_REUSEPORT, which would let them join another server already listening on the port
+    #instead of failing, so the port is bound once without it before the workers are started
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe_socket:
+            probe_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            probe_socket.bind(('', listening_port))
+    except OSError as e:
+        sys.exit(f'Port {listening_port} can\'t be used by the server: {e.strerror}')
+
+    inbox_sockets = RoomRouter.create_inbox_sockets(worker_count)
+    worker_pids = []
+
+    for worker_index in range(worker_count):
+        pid = os.fork()
+
+        if pid == 0:
+            exit_code = 0
+
+            try:
+                worker_record_directory = (None if record_directory is None else
+                                           os.path.join(record_directory, f'worker-{worker_index}'))
+                server = Server(listening_port, RoomRouter(worker_index, inbox_sockets), matchmaking_policy,
+                                send_buffer_limits, move_time_limit, heartbeat_interval, idle_timeout,
+                                session_grace_period, worker_record_directory)
+                server.start()
+            except Exception:
+                logging.getLogger('app').error(f'server: error: exception in worker {worker_index}:\n{traceback.format_exc()}')
+                exit_code = 1
+            finally:
+                #workers must not return into the code of the parent process
+                os._exit(exit_code)
+
+        worker_pids.append(pid)
+
+    #ctrl-c is sent to every worker by the terminal, other signals that stop the server are passed on
+    def stop_workers(signal_number, frame):
+        for worker_pid in worker_pids:
+            os.kill(worker_pid, signal_number)
+
+    signal.signal(signal.SIGTERM, stop_workers)
+
+    for worker_pid in worker_pids:
+        while True:
+            try:
+                os.waitpid(worker_pid, 0)
+                break
+            except KeyboardInterrupt:
+                pass
+
+#server that runs on an asyncio event loop instead of the selectors loop. Clients are handled with asyncio
+#streams and requests are processed by the same server synchronizer as the selectors server
+class AsyncServer(ApplicationType):
+    #seconds that clients are given to receive their last messages when a connection is closed
+    CLOSE_TIMEOUT = 5
+
+    def __init__(self, listening_port, idle_timeout=None, matchmaking_policy=None, send_buffer_limits=None,
+                 move_time_limit=None, heartbeat_interval=None, session_grace_period=None, record_directory=None):
+        super().__init__()
+        self.listening_port = listening_port
+        #watermarks on the number of bytes waiting to be sent to each client
+        self.send_buffer_limits = SendBufferLimits() if send_buffer_limits is None else send_buffer_limits
+        #timers of the move clocks and of the connection checks, advanced by a task of the event loop
+        self.timer_wheel = TimerWheel()
+        #finished games are written to the log in the record directory, games are not recorded when None
+        self.game_record_log = None if record_directory is None else GameRecordLog(record_directory)
+        #singleton server request handler to keep all states in sync
+        self.server_request_handler = ServerSynchronizer(matchmaker=Matchmaker(matchmaking_policy),
+                                                         timer_wheel=self.timer_wheel, move_time_limit=move_time_limit,
+                                                         session_grace_period=session_grace_period,
+                                                         game_record_log=self.game_record_log)
+        #sends heartbeats to the clients and evicts the ones that are idle or no longer answer
+        self.connection_monitor = ConnectionMonitor(self.timer_wheel, self.server_request_handler,
+                                                    heartbeat_interval, idle_timeout)
+        #key: message handler of a connected client, value: task reading requests from the client
+        self.client_task_dict = dict()
+        #set when the server has been asked to shut down
+        self.shutdown_event = None
+
+    def start(self):
+        self.logger.info("Starting tic-tac-toe asyncio server")
+
+        try:
+            asyncio.run(self._serve())
+        except KeyboardInterrupt:
+            self.logger.error("caught keyboard interrupt, exiting")
+        finally:
+            self.sel.close()
+
+            if self.game_record_log is not None:
+                self.game_record_log.close()
+
+    async def _serve(self):
+        host = ''
+        self.shutdown_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        #shut down gracefully on ctrl-c or when the process is terminated
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, self.shutdown_event.set)
+            except NotImplementedError:
+                #signal handlers can't be added on Windows, ctrl-c raises KeyboardInterrupt instead
+                pass
+
+        server = await asyncio.start_server(self._handle_client, host, self.listening_port, reuse_address=True)
+        self.logger.info(f'listening on {(host, self.listening_port)}')
+        print("Server has started")
+
+        timer_task = asyncio.ensure_future(self._run_timer_wheel())
+
+        async with server:
+            await self.shutdown_event.wait()
+            self.logger.info("shutting down server")
+            #stop accepting new clients before closing the connected ones
+            server.close()
+            await self._close_clients()
+
+        timer_task.cancel()
+
+    #advances the timer wheel when its next timer is due. Timers can be scheduled by the clients' tasks while this
+    #task is sleeping, so it sleeps for at most a tick to pick up timers that are due before the next one it knew of
+    async def _run_timer_wheel(self):
+        while True:
+            timeout = self.timer_wheel.get_timeout()
+            await asyncio.sleep(self.timer_wheel.tick if timeout is None else min(timeout, self.timer_wheel.tick))
+            self.timer_wheel.advance()
+
+    async def _handle_client(self, reader, writer):
+        message = AsyncServerMessageHandler(reader, writer, self.server_request_handler, self.send_buffer_limits)
+        self.logger.info(f'accepted connection from {message.addr}')
+        self.server_request_handler.add_new_connected_client(message.addr, message)
+        self.connection_monitor.add(message)
+        self.client_task_dict[message] = asyncio.current_task()
+
+        try:
+            await message.run()
+        except asyncio.CancelledError:
+            self.logger.error(f'server: error, connection to {message.addr} did not close in time')
+        except ConnectionResetError:
+            self.logger.error(f'server: error, client {message.addr} has unexpectedly closed its connection')
+        except Exception:
+            self.logger.error(f'server: error: exception for {message.addr}:\n{traceback.format_exc()}')
+        finally:
+            #stop sending updates to a client that is no longer connected
+            self.server_request_handler.remove_connected_client(message.addr)
+            await message.close(self.CLOSE_TIMEOUT)
+            self.client_task_dict.pop(message)
+
+    #stops reading requests from every client and closes the connections once the messages that were
+    #queued for the clients have been sent. Connections that don't close in time are cancelled
+    async def _close_clients(self):
+        for message in self.client_task_dict:
+            message.stop()
+
+        tasks = list(self.client_task_dict.values())
+
+        if tasks:
+            _, pending_tasks = await asyncio.wait(tasks, timeout=self.CLOSE_TIMEOUT)
+
+            for task in pending_tasks:
+                task.cancel()
+
+            if pending_tasks:
+                await asyncio.wait(pending_tasks)
 
 
+#key: name of the matchmaking policy picked with the -m option, value: policy class
+MATCHMAKING_POLICIES = {
+    "fifo": FifoPolicy,
+    "rating": RatingBandPolicy,
+}
+
 def main():
     if len(sys.argv) < 2:
         sys.exit('Not enough arguments: -h for help or -p <listening port>')
@@ -79,24 +331,97 @@ def main():
     try:
         arguments_list = sys.argv[1:]
         server_port = None
+        engine = "selectors"
+        idle_timeout = None
+        move_time_limit = None
+        heartbeat_interval = ConnectionMonitor.DEFAULT_HEARTBEAT_INTERVAL
+        session_grace_period = PlayerSession.DEFAULT_GRACE_PERIOD
+        worker_count = 1
+        matchmaking = "fifo"
+        high_watermark = SendBufferLimits.DEFAULT_HIGH_WATERMARK
+        low_watermark = None
+        overflow_policy = "coalesce"
+        record_directory = None
         print_help_and_exit = False
 
         if len(sys.argv) > 2:
             for argument, value in zip(*[iter(arguments_list)]*2):
                 if argument == '-p':
                     server_port = int(value)
+                elif argument == '-e':
+                    engine = value
+                elif argument == '-t':
+                    idle_timeout = float(value)
+                elif argument == '-w':
+                    worker_count = int(value)
+                elif argument == '-c':
+                    move_time_limit = float(value)
+                elif argument == '-i':
+                    #heartbeats are turned off with an interval of 0
+                    heartbeat_interval = float(value) or None
+                elif argument == '-g':
+                    #seats are not held with a grace period of 0
+                    session_grace_period = float(value) or None
+                elif argument == '-m':
+                    matchmaking = value
+                elif argument == '-H':
+                    high_watermark = int(value)
+                elif argument == '-L':
+                    low_watermark = int(value)
+                elif argument == '-o':
+                    overflow_policy = value
+                elif argument == '-r':
+                    record_directory = value
                 elif argument == '-h':
                     print_help_and_exit = True
         elif arguments_list[0] == '-h':
             print_help_and_exit = True
 
         if print_help_and_exit:
-            sys.exit('To run the server, provide the port that the server will be listening on with the -p option.')
+            sys.exit('To run the server, provide the port that the server will be listening on with the -p option. '
+                     'The engine used to run the server can be picked with the -e option (selectors or asyncio). '
+                     'Clients that have been idle for the number of seconds given with the -t option are '
+                     'disconnected, clients that have not sent anything are sent a heartbeat every number of seconds '
+                     'given with the -i option (30 by default, 0 turns heartbeats off) and are disconnected when '
+                     'they don\'t answer it, and players lose the game when they take longer to move than the number '
+                     'of seconds given with the -c option. Players that lose their connection can reconnect to their '
+                     'seat for the number of seconds given with the -g option (30 by default, 0 frees the seat '
+                     'straight away). The selectors engine can be run in several worker '
+                     'processes with the -w option. Players that don\'t pick a room are matched with the player that has waited the '
+                     'longest, or with a player with a similar rating, picked with the -m option (fifo or rating). '
+                     'Clients with more than the number of bytes given with the -H option waiting to be sent to them '
+                     'have their board updates coalesced until they are back under the number of bytes given with '
+                     'the -L option, or are disconnected when the -o option is disconnect instead of coalesce. '
+                     'Finished games are recorded in the directory given with the -r option, the records can be '
+                     'replayed and analysed with replay.py.')
         elif server_port is None:
             sys.exit('Server port must be specified')
-        else:
-            server = Server(server_port)
+        elif matchmaking not in MATCHMAKING_POLICIES:
+            sys.exit(f'Invalid matchmaking policy "{matchmaking}", must be fifo or rating')
+
+        try:
+            send_buffer_limits = SendBufferLimits(high_watermark, low_watermark, overflow_policy)
+        except ValueError as e:
+            sys.exit(str(e))
+
+        if worker_count > 1:
+            if engine != "selectors":
+                sys.exit('Worker processes can only be used with the selectors engine')
+            elif not hasattr(socket, "SO_REUSEPORT") or not hasattr(os, "fork"):
+                sys.exit('Worker processes are not supported on this platform')
+
+            start_workers(server_port, worker_count, MATCHMAKING_POLICIES[matchmaking](), send_buffer_limits,
+                          move_time_limit, heartbeat_interval, idle_timeout, session_grace_period, record_directory)
+        elif engine == "selectors":
+            server = Server(server_port, None, MATCHMAKING_POLICIES[matchmaking](), send_buffer_limits,
+                            move_time_limit, heartbeat_interval, idle_timeout, session_grace_period, record_directory)
             server.start()
+        elif engine == "asyncio":
+            server = AsyncServer(server_port, idle_timeout, MATCHMAKING_POLICIES[matchmaking](), send_buffer_limits,
+                                 move_time_limit, heartbeat_interval, session_grace_period, record_directory)
+            server.start()
+        else:
+            sys.exit(f'Invalid server engine "{engine}", must be selectors or asyncio')
     except Exception:
         print(Exception)
         sys.exit('Unhandled exception thrown, exiting server')
@@ -1,3 +1,4 @@
 from .application import *
+from .game import *
 from .message import *
 from .message_handler import *
\ No newline at end of file
@@ -0,0 +1,30 @@
+from tic_tac_toe.game.game_search import GameSearch
+from tic_tac_toe.game.perfect_play_table import PerfectPlayTable
+
+#player controlled by the server that fills an empty seat in a room. It takes the place of a message handler
+#in the server synchronizer so messages sent to the room are ignored, the bot reads the board from the game
+#state when it is its turn instead
+class BotPlayer:
+    def __init__(self, addr, player_name, max_depth=None):
+        self.addr = addr
+        self.player_name = player_name
+        #number of moves searched ahead on large boards, the default depth of the search is used when not provided
+        self.max_depth = max_depth
+
+    def add_internal_request(self, request):
+        pass
+
+    def send_broadcast(self, broadcast):
+        pass
+
+    #returns the cell that the bot plays with the player index that it has been given in the game. Moves on
+    #the standard board are looked up in the perfect play table, other boards are searched
+    def choose_move(self, game_state, player_index):
+        player_cells = game_state.player_cells[player_index]
+        opponent_cells = game_state.player_cells[1 - player_index]
+
+        if game_state.size == PerfectPlayTable.SIZE and game_state.win_length == PerfectPlayTable.WIN_LENGTH:
+            return PerfectPlayTable.get_default().get_best_move(player_cells, opponent_cells)
+
+        game_search = GameSearch.get_game_search(game_state.size, game_state.win_length)
+        return game_search.find_best_move(player_cells, opponent_cells, self.max_depth)
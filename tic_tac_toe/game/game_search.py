@@ -0,0 +1,290 @@
+from tic_tac_toe.game.game_state import GameState
+
+#max number of cells that are transformed with a single table lookup when boards are reflected and rotated
+_MAX_CHUNK_BITS = 9
+
+#returns the cell that each cell is moved to by the 8 rotations and reflections of a size x size board
+def _create_symmetries(size):
+    symmetries = []
+
+    for transform in (lambda row, column: (row, column),
+                      lambda row, column: (column, size - 1 - row),
+                      lambda row, column: (size - 1 - row, size - 1 - column),
+                      lambda row, column: (size - 1 - column, row),
+                      lambda row, column: (row, size - 1 - column),
+                      lambda row, column: (size - 1 - row, column),
+                      lambda row, column: (column, row),
+                      lambda row, column: (size - 1 - column, size - 1 - row)):
+        symmetry = []
+
+        for cell in range(size * size):
+            new_row, new_column = transform(*divmod(cell, size))
+            symmetry.append(new_row * size + new_column)
+
+        symmetries.append(tuple(symmetry))
+
+    return tuple(symmetries)
+
+#creates lookup tables that move a chunk of cells of a bitboard to where the symmetry puts them. Index 0 is the
+#chunk, index 1 is the bits of the chunk and the value is the transformed bits on the whole board
+def _create_symmetry_tables(symmetry, chunk_bits):
+    tables = []
+
+    for chunk_start in range(0, len(symmetry), chunk_bits):
+        chunk_cells = symmetry[chunk_start:chunk_start + chunk_bits]
+        table = []
+
+        for bits in range(1 << len(chunk_cells)):
+            transformed = 0
+
+            for index, cell in enumerate(chunk_cells):
+                if bits >> index & 1:
+                    transformed |= 1 << cell
+
+            table.append(transformed)
+
+        tables.append(tuple(table))
+
+    return tuple(tables)
+
+#searches for the best move with negamax and alpha-beta pruning. Positions that have been searched are kept in a
+#transposition table that is shared by every game with the same board settings, so bots playing many games in
+#the same process only search each position once. Positions are stored under the smallest of the keys of their 8
+#rotations and reflections since they all have the same value. The standard board is searched until the end of
+#the game, larger boards are searched a limited number of moves ahead and only near the cells that have been played
+class GameSearch:
+    #score of a position that the player to move has won
+    WIN_SCORE = 1 << 60
+    #boards with more cells than this are searched with a depth limit
+    MAX_EXHAUSTIVE_CELLS = 9
+    #number of moves searched ahead on boards that are not searched until the end of the game
+    DEFAULT_MAX_DEPTH = 2
+    #transposition table is cleared once it holds this many positions
+    MAX_TABLE_SIZE = 1 << 20
+
+    #kinds of values stored in the transposition table, alpha-beta pruning can stop the search of a
+    #position early so its value is only known to be at least or at most the value found
+    EXACT = 0
+    LOWER_BOUND = 1
+    UPPER_BOUND = 2
+
+    #key: (size, win length), value: game search shared by every game with the board settings
+    _game_search_dict = dict()
+
+    def __init__(self, size, win_length):
+        self.size = size
+        self.win_length = win_length
+        self.cell_count = size * size
+        self.full_board = (1 << self.cell_count) - 1
+        self.cell_win_masks = GameState.get_cell_win_masks(size, win_length)
+        self.win_masks = tuple({mask for masks in self.cell_win_masks for mask in masks})
+        self.is_exhaustive = self.cell_count <= self.MAX_EXHAUSTIVE_CELLS
+        self.uses_winning_positions = size == GameState.DEFAULT_SIZE and win_length == GameState.DEFAULT_WIN_LENGTH
+
+        #index: number of the player's symbols in a line that the opponent has not blocked, value: score of the line
+        self.line_scores = tuple(0 if count == 0 else 4 ** count for count in range(win_length + 1))
+
+        #cells closest to the center are searched first since they are usually the best moves
+        center = (size - 1) / 2
+        self.move_order = tuple(sorted(range(self.cell_count),
+                                       key=lambda cell: abs(cell // size - center) + abs(cell % size - center)))
+
+        #used to find the cells next to the cells that have been played without wrapping around the board edges
+        first_column = sum(1 << (row * size) for row in range(size))
+        self.not_first_column = self.full_board & ~first_column
+        self.not_last_column = self.full_board & ~(first_column << (size - 1))
+
+        #small boards are transformed with a single lookup, larger boards a byte at a time
+        self.chunk_bits = self.cell_count if self.cell_count <= _MAX_CHUNK_BITS else 8
+        self.chunk_mask = (1 << self.chunk_bits) - 1
+        self.symmetry_tables = tuple(_create_symmetry_tables(symmetry, self.chunk_bits)
+                                     for symmetry in _create_symmetries(size))
+
+        #key: canonical key of the position, value: (depth searched, kind of value, value)
+        self.transposition_table = dict()
+
+    #returns the search for the board settings, created once for each board size and win length
+    @classmethod
+    def get_game_search(cls, size, win_length):
+        key = (size, win_length)
+        game_search = cls._game_search_dict.get(key)
+
+        if game_search is None:
+            game_search = cls(size, win_length)
+            cls._game_search_dict[key] = game_search
+
+        return game_search
+
+    #returns the best cell for the player to play. max_depth is the number of moves to search ahead, the
+    #default depth is used when it is not provided
+    def find_best_move(self, player_cells, opponent_cells, max_depth=None):
+        occupied_cells = player_cells | opponent_cells
+        empty_cell_count = self.cell_count - bin(occupied_cells).count("1")
+
+        if max_depth is None:
+            max_depth = empty_cell_count if self.is_exhaustive else self.DEFAULT_MAX_DEPTH
+
+        depth = min(max_depth, empty_cell_count)
+        moves = self._get_candidate_moves(occupied_cells)
+
+        for cell in moves:
+            if self._is_winning_move(player_cells | 1 << cell, cell):
+                return cell
+
+        #heuristic score is only needed when the search stops before the end of the game
+        score = None if depth == empty_cell_count else self._evaluate(player_cells, opponent_cells)
+        best_cell = None
+        best_value = -self.WIN_SCORE - 1
+        alpha = best_value
+
+        for cell in moves:
+            value = -self._negamax(opponent_cells, player_cells | 1 << cell, depth - 1, -self.WIN_SCORE - 1, -alpha,
+                                   self._get_child_score(player_cells, opponent_cells, cell, score))
+
+            if value > best_value:
+                best_value = value
+                best_cell = cell
+                alpha = value
+
+        return best_cell
+
+    #returns the value of the position for the player to move. The opponent has just played and has not won
+    def _negamax(self, player_cells, opponent_cells, depth, alpha, beta, score):
+        occupied_cells = player_cells | opponent_cells
+
+        if occupied_cells == self.full_board:
+            return 0
+        elif depth == 0:
+            return score
+
+        key = self._get_canonical_key(player_cells, opponent_cells)
+        entry = self.transposition_table.get(key)
+
+        if entry is not None and entry[0] >= depth:
+            _, kind, value = entry
+
+            if kind == self.EXACT:
+                return value
+            elif kind == self.LOWER_BOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+
+            if alpha >= beta:
+                return value
+
+        moves = self._get_candidate_moves(occupied_cells)
+
+        for cell in moves:
+            if self._is_winning_move(player_cells | 1 << cell, cell):
+                self._store(key, depth, self.EXACT, self.WIN_SCORE)
+                return self.WIN_SCORE
+
+        original_alpha = alpha
+        best_value = -self.WIN_SCORE - 1
+
+        for cell in moves:
+            value = -self._negamax(opponent_cells, player_cells | 1 << cell, depth - 1, -beta, -alpha,
+                                   self._get_child_score(player_cells, opponent_cells, cell, score))
+
+            if value > best_value:
+                best_value = value
+
+                if value > alpha:
+                    alpha = value
+
+                    if alpha >= beta:
+                        break
+
+        if best_value <= original_alpha:
+            kind = self.UPPER_BOUND
+        elif best_value >= beta:
+            kind = self.LOWER_BOUND
+        else:
+            kind = self.EXACT
+
+        self._store(key, depth, kind, best_value)
+        return best_value
+
+    def _store(self, key, depth, kind, value):
+        if len(self.transposition_table) >= self.MAX_TABLE_SIZE:
+            self.transposition_table.clear()
+
+        self.transposition_table[key] = (depth, kind, value)
+
+    #the standard board uses the table of every winning position, larger boards only check the lines
+    #through the cell that was played
+    def _is_winning_move(self, cells, cell):
+        if self.uses_winning_positions:
+            return GameState.is_winning_position(cells)
+
+        for mask in self.cell_win_masks[cell]:
+            if cells & mask == mask:
+                return True
+
+        return False
+
+    #every empty cell on small boards, on larger boards only the empty cells next to a cell that has been played
+    def _get_candidate_moves(self, occupied_cells):
+        if self.is_exhaustive:
+            candidates = self.full_board & ~occupied_cells
+        elif occupied_cells == 0:
+            return [self.move_order[0]]
+        else:
+            nearby_cells = occupied_cells | occupied_cells << self.size | occupied_cells >> self.size
+            nearby_cells |= (nearby_cells << 1 & self.not_first_column) | (nearby_cells >> 1 & self.not_last_column)
+            candidates = nearby_cells & self.full_board & ~occupied_cells
+
+        return [cell for cell in self.move_order if candidates >> cell & 1]
+
+    #smallest key of the position out of its rotations and reflections
+    def _get_canonical_key(self, player_cells, opponent_cells):
+        shift = self.cell_count
+
+        if len(self.symmetry_tables[0]) == 1:
+            return min(tables[0][player_cells] | tables[0][opponent_cells] << shift for tables in self.symmetry_tables)
+
+        return min(self._transform(player_cells, tables) | self._transform(opponent_cells, tables) << shift
+                   for tables in self.symmetry_tables)
+
+    def _transform(self, cells, tables):
+        transformed = 0
+
+        for table in tables:
+            if cells & self.chunk_mask:
+                transformed |= table[cells & self.chunk_mask]
+
+            cells >>= self.chunk_bits
+
+        return transformed
+
+    #heuristic score of a position for the player, lines that only hold the player's symbols add to
+    #the score and lines that only hold the opponent's symbols take away from it
+    def _evaluate(self, player_cells, opponent_cells):
+        score = 0
+
+        for mask in self.win_masks:
+            player_line = player_cells & mask
+            opponent_line = opponent_cells & mask
+
+            if not opponent_line:
+                score += self.line_scores[bin(player_line).count("1")]
+            elif not player_line:
+                score -= self.line_scores[bin(opponent_line).count("1")]
+
+        return score
+
+    #score of the position for the opponent after the player plays the cell. Only the lines through the cell
+    #change so the score is updated instead of evaluating the whole board
+    def _get_child_score(self, player_cells, opponent_cells, cell, score):
+        if score is None:
+            return None
+
+        for mask in self.cell_win_masks[cell]:
+            if not opponent_cells & mask:
+                count = bin(player_cells & mask).count("1")
+                score += self.line_scores[count + 1] - self.line_scores[count]
+            elif not player_cells & mask:
+                score += self.line_scores[bin(opponent_cells & mask).count("1")]
+
+        return -score
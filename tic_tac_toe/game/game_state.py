@@ -0,0 +1,136 @@
+#creates a table that holds whether each possible set of a player's cells contains a winning line
+def _create_winning_positions_table(win_masks, cell_count):
+    return tuple(any(cells & mask == mask for mask in win_masks) for cells in range(1 << cell_count))
+
+#creates the bit masks of every line of win_length cells on a size x size board
+def _create_win_masks(size, win_length):
+    win_masks = []
+
+    #right, down, down-right and down-left
+    for row_step, column_step in ((0, 1), (1, 0), (1, 1), (1, -1)):
+        for row in range(size):
+            for column in range(size):
+                end_row = row + row_step * (win_length - 1)
+                end_column = column + column_step * (win_length - 1)
+
+                if 0 <= end_row < size and 0 <= end_column < size:
+                    mask = 0
+
+                    for step in range(win_length):
+                        mask |= 1 << ((row + row_step * step) * size + column + column_step * step)
+
+                    win_masks.append(mask)
+
+    return tuple(win_masks)
+
+#state of a tic-tac-toe game stored as bitboards. Each player's cells are kept in an integer where
+#bit n is set when the player has placed their symbol in cell n of the board. Boards can be any
+#size x size with win_length cells in a row needed to win (for example 15x15 with 5 in a row)
+class GameState:
+    SYMBOLS = ("X", "O")
+    EMPTY_CELL = " "
+    DEFAULT_SIZE = 3
+    DEFAULT_WIN_LENGTH = 3
+
+    #results of playing a move
+    IN_PROGRESS = 0
+    WIN = 1
+    DRAW = 2
+
+    #bit masks of the 8 lines that win the game on the standard board
+    WIN_MASKS = _create_win_masks(DEFAULT_SIZE, DEFAULT_WIN_LENGTH)
+
+    #index: player's cells, value: True when the cells contain a winning line on the standard board
+    WINNING_POSITIONS = _create_winning_positions_table(WIN_MASKS, DEFAULT_SIZE * DEFAULT_SIZE)
+
+    #key: (size, win length), value: win masks of the lines that go through each cell
+    _cell_win_masks_dict = dict()
+
+    def __init__(self, size=DEFAULT_SIZE, win_length=DEFAULT_WIN_LENGTH):
+        self.size = size
+        self.win_length = win_length
+        self.cell_count = size * size
+        self.full_board = (1 << self.cell_count) - 1
+        #only the lines that go through the last cell played need to be checked for a win
+        self.cell_win_masks = self.get_cell_win_masks(size, win_length)
+        #the standard board uses a table of every winning position instead
+        if size == self.DEFAULT_SIZE and win_length == self.DEFAULT_WIN_LENGTH:
+            self.winning_positions = self.WINNING_POSITIONS
+        else:
+            self.winning_positions = None
+
+        #cells taken by each player, index 0 is X and index 1 is O
+        self.player_cells = [0, 0]
+        self.occupied_cells = 0
+        #number of moves played, used as the sequence number of board updates
+        self.move_count = 0
+        #board in the list format that is sent to the clients, kept up to date as moves are played
+        self.board = [self.EMPTY_CELL] * self.cell_count
+
+    #returns the index of the player (0 or 1) that uses the symbol
+    @classmethod
+    def get_player_index(cls, symbol):
+        return cls.SYMBOLS.index(symbol)
+
+    #returns the win masks of the lines through each cell, created once for each board size and win length
+    @classmethod
+    def get_cell_win_masks(cls, size, win_length):
+        key = (size, win_length)
+        cell_win_masks = cls._cell_win_masks_dict.get(key)
+
+        if cell_win_masks is None:
+            win_masks = _create_win_masks(size, win_length)
+            cell_win_masks = tuple(tuple(mask for mask in win_masks if mask >> cell & 1)
+                                   for cell in range(size * size))
+            cls._cell_win_masks_dict[key] = cell_win_masks
+
+        return cell_win_masks
+
+    def is_valid_move(self, cell):
+        return 0 <= cell < self.cell_count and not self.occupied_cells & (1 << cell)
+
+    #places the player's symbol in the cell and returns if the move won the game, drew the game or
+    #if the game is still in progress. The move must be valid
+    def play(self, cell, player_index):
+        cell_bit = 1 << cell
+        cells = self.player_cells[player_index] | cell_bit
+        self.player_cells[player_index] = cells
+        self.occupied_cells |= cell_bit
+        self.board[cell] = self.SYMBOLS[player_index]
+        self.move_count += 1
+
+        if self._is_winning_move(cells, cell):
+            return self.WIN
+        elif self.occupied_cells == self.full_board:
+            return self.DRAW
+        else:
+            return self.IN_PROGRESS
+
+    #only the lines through the cell that was just played can have been completed by the move
+    def _is_winning_move(self, cells, cell):
+        if self.winning_positions is not None:
+            return self.winning_positions[cells]
+
+        for mask in self.cell_win_masks[cell]:
+            if cells & mask == mask:
+                return True
+
+        return False
+
+    def has_won(self, player_index):
+        cells = self.player_cells[player_index]
+
+        if self.winning_positions is not None:
+            return self.winning_positions[cells]
+
+        return any(cells & mask == mask for masks in self.cell_win_masks for mask in masks)
+
+    #checks if a set of cells contains a winning line on the standard board without creating a game
+    #state, used when evaluating many positions
+    @classmethod
+    def is_winning_position(cls, cells):
+        return cls.WINNING_POSITIONS[cells]
+
+    #game is a draw when every cell is taken. Should be checked after checking for a win
+    def is_draw(self):
+        return self.occupied_cells == self.full_board
\ No newline at end of file
@@ -0,0 +1,259 @@
+from tic_tac_toe.game.game_state import GameState
+from tic_tac_toe.game.game_search import GameSearch
+import logging
+import mmap
+import os
+import struct
+import sys
+
+#creates a table that converts a player's cells to a base 3 number with a 1 in the place of each of the player's cells
+def _create_base3_table(cell_count):
+    return tuple(sum(3 ** cell for cell in range(cell_count) if cells >> cell & 1) for cells in range(1 << cell_count))
+
+#table of the result and best move of every position of the standard 3x3 board with perfect play. The table
+#is built once and written to a small binary file that is memory-mapped when it is loaded, so the pages are
+#shared by every process on the machine. Positions are looked up from the bitboards of the player to move and
+#their opponent, the same cells kept in GameState.player_cells, so the server can look up a room's board
+#without converting it. Build or validate the table from the root of the repository with:
+#python -m tic_tac_toe.game.perfect_play_table <build|validate> [<table file>]
+#
+#the file starts with a header followed by one byte per position. Each position's index is its base 3 number
+#where a cell is 0 when empty, 1 for the player to move and 2 for the opponent. The high 4 bits of the byte
+#hold the result for the player to move and the low 4 bits hold the best cell to play (NO_MOVE when the game is over)
+class PerfectPlayTable:
+    MAGIC = b"TTTP"
+    VERSION = 1
+    #magic, version, board size, win length
+    HEADER = struct.Struct(">4sBBB")
+    SIZE = GameState.DEFAULT_SIZE
+    WIN_LENGTH = GameState.DEFAULT_WIN_LENGTH
+    CELL_COUNT = SIZE * SIZE
+    POSITION_COUNT = 3 ** CELL_COUNT
+    DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfect_play_3x3.bin")
+
+    #results for the player to move, UNREACHABLE is used for positions that can't happen in a game
+    UNREACHABLE = 0
+    WIN = 1
+    DRAW = 2
+    LOSS = 3
+    NO_MOVE = 0xF
+    #key: result for the opponent after a move, value: result for the player that made the move
+    OPPOSITE_RESULTS = {WIN: LOSS, DRAW: DRAW, LOSS: WIN}
+
+    #index: player's cells, value: base 3 number with a 1 for each of the player's cells
+    BASE3_TABLE = _create_base3_table(CELL_COUNT)
+
+    _default_table = None
+
+    def __init__(self, data, path=None):
+        self.logger = logging.getLogger('app')
+        #memory-mapped file, or bytes when the table was built without being written to a file
+        self.data = data
+        self.path = path
+
+        magic, version, size, win_length = self.HEADER.unpack_from(data)
+
+        if magic != self.MAGIC or version != self.VERSION or size != self.SIZE or win_length != self.WIN_LENGTH or \
+                len(data) != self.HEADER.size + self.POSITION_COUNT:
+            raise ValueError(f'{path} is not a version {self.VERSION} {self.SIZE}x{self.SIZE} perfect play table')
+
+    #returns the table shared by the process, the table file is built the first time it is needed
+    @classmethod
+    def get_default(cls):
+        if cls._default_table is None:
+            cls._default_table = cls.load_or_build(cls.DEFAULT_PATH)
+
+        return cls._default_table
+
+    #memory-maps the table file
+    @classmethod
+    def load(cls, path=DEFAULT_PATH):
+        with open(path, "rb") as table_file:
+            return cls(mmap.mmap(table_file.fileno(), 0, access=mmap.ACCESS_READ), path)
+
+    #loads the table file, building it first if it does not exist or can't be used. The table is kept in memory when the
+    #file can't be written
+    @classmethod
+    def load_or_build(cls, path=DEFAULT_PATH):
+        try:
+            return cls.load(path)
+        except FileNotFoundError:
+            pass
+        except ValueError as e:
+            #file was written by another version or has been corrupted
+            logging.getLogger('app').error(f'error: rebuilding perfect play table: {repr(e)}')
+
+        data = cls.build()
+
+        try:
+            cls.write(data, path)
+        except OSError as e:
+            logging.getLogger('app').error(f'error: could not write perfect play table to {path}: {repr(e)}')
+            return cls(data)
+
+        return cls.load(path)
+
+    #enumerates every position that can be reached from the empty board and returns the contents of the table file
+    @classmethod
+    def build(cls):
+        entries = bytearray([cls.UNREACHABLE << 4 | cls.NO_MOVE]) * cls.POSITION_COUNT
+        #key: index of the position, value: (result, number of moves until the game is over)
+        solved_dict = dict()
+        full_board = (1 << cls.CELL_COUNT) - 1
+
+        #returns the result for the player to move and the number of moves left with perfect play. Wins are
+        #played as quickly as possible and losses as slowly as possible
+        def solve(player_cells, opponent_cells):
+            index = cls.get_index(player_cells, opponent_cells)
+            solved = solved_dict.get(index)
+
+            if solved is not None:
+                return solved
+
+            best_move = cls.NO_MOVE
+
+            if GameState.is_winning_position(opponent_cells):
+                solved = (cls.LOSS, 0)
+            elif player_cells | opponent_cells == full_board:
+                solved = (cls.DRAW, 0)
+            else:
+                best_rank = None
+
+                for cell in range(cls.CELL_COUNT):
+                    if (player_cells | opponent_cells) >> cell & 1:
+                        continue
+
+                    opponent_result, moves_left = solve(opponent_cells, player_cells | 1 << cell)
+                    result = cls.OPPOSITE_RESULTS[opponent_result]
+
+                    #wins are ranked highest and quicker wins above slower ones, slower losses above quicker ones
+                    if result == cls.WIN:
+                        rank = 2 * cls.CELL_COUNT - moves_left
+                    elif result == cls.DRAW:
+                        rank = 0
+                    else:
+                        rank = moves_left - cls.CELL_COUNT
+
+                    if best_rank is None or rank > best_rank:
+                        best_rank = rank
+                        best_move = cell
+                        solved = (result, moves_left + 1)
+
+            entries[index] = solved[0] << 4 | best_move
+            solved_dict[index] = solved
+            return solved
+
+        solve(0, 0)
+        return cls.HEADER.pack(cls.MAGIC, cls.VERSION, cls.SIZE, cls.WIN_LENGTH) + bytes(entries)
+
+    #writes the table to a temporary file first so that processes loading the table never see a partial file
+    @staticmethod
+    def write(data, path=DEFAULT_PATH):
+        temp_path = f'{path}.{os.getpid()}.tmp'
+
+        with open(temp_path, "wb") as table_file:
+            table_file.write(data)
+
+        os.replace(temp_path, path)
+
+    @classmethod
+    def get_index(cls, player_cells, opponent_cells):
+        return cls.BASE3_TABLE[player_cells] + 2 * cls.BASE3_TABLE[opponent_cells]
+
+    #result for the player to move: WIN, DRAW, LOSS or UNREACHABLE
+    def get_result(self, player_cells, opponent_cells):
+        return self.data[self.HEADER.size + self.get_index(player_cells, opponent_cells)] >> 4
+
+    #best cell for the player to move, None when the game is over or the position can't be reached
+    def get_best_move(self, player_cells, opponent_cells):
+        best_move = self.data[self.HEADER.size + self.get_index(player_cells, opponent_cells)] & 0xF
+        return None if best_move == self.NO_MOVE else best_move
+
+    #checks every position in the table against a search of the whole game tree that does not use the table.
+    #Returns the number of positions checked and a list of errors
+    def validate(self):
+        errors = []
+        game_search = GameSearch.get_game_search(self.SIZE, self.WIN_LENGTH)
+        full_board = (1 << self.CELL_COUNT) - 1
+        reachable_indexes = set()
+
+        #plain minimax without memoization or pruning, returns 1 for a win, 0 for a draw and -1 for a loss
+        def brute_force(player_cells, opponent_cells):
+            if GameState.is_winning_position(opponent_cells):
+                return -1
+            elif player_cells | opponent_cells == full_board:
+                return 0
+
+            return max(-brute_force(opponent_cells, player_cells | 1 << cell) for cell in range(self.CELL_COUNT)
+                       if not (player_cells | opponent_cells) >> cell & 1)
+
+        #every position is checked once, with the values of its moves found by the brute force search
+        def check(player_cells, opponent_cells):
+            index = self.get_index(player_cells, opponent_cells)
+
+            if index in reachable_indexes:
+                return
+
+            reachable_indexes.add(index)
+            result = self.get_result(player_cells, opponent_cells)
+            best_move = self.get_best_move(player_cells, opponent_cells)
+            game_over = GameState.is_winning_position(opponent_cells) or player_cells | opponent_cells == full_board
+
+            if game_over:
+                expected_result = self.LOSS if GameState.is_winning_position(opponent_cells) else self.DRAW
+
+                if result != expected_result or best_move is not None:
+                    errors.append(f'position {index}: game is over but table holds result {result} move {best_move}')
+
+                return
+
+            move_values = dict((cell, -brute_force(opponent_cells, player_cells | 1 << cell))
+                               for cell in range(self.CELL_COUNT) if not (player_cells | opponent_cells) >> cell & 1)
+            value = max(move_values.values())
+            expected_result = {1: self.WIN, 0: self.DRAW, -1: self.LOSS}[value]
+
+            if result != expected_result:
+                errors.append(f'position {index}: table holds result {result}, search found {expected_result}')
+            elif best_move not in move_values or move_values[best_move] != value:
+                errors.append(f'position {index}: table move {best_move} does not keep result {expected_result}')
+
+            #the negamax search used by the bots has to agree on the value of its move
+            search_move = game_search.find_best_move(player_cells, opponent_cells)
+
+            if move_values[search_move] != value:
+                errors.append(f'position {index}: search move {search_move} does not keep result {expected_result}')
+
+            for cell in move_values:
+                check(opponent_cells, player_cells | 1 << cell)
+
+        check(0, 0)
+
+        for index in range(self.POSITION_COUNT):
+            if index not in reachable_indexes and self.data[self.HEADER.size + index] >> 4 != self.UNREACHABLE:
+                errors.append(f'position {index}: can not be reached but has a result in the table')
+
+        return len(reachable_indexes), errors
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ("build", "validate"):
+        sys.exit('Usage: python -m tic_tac_toe.game.perfect_play_table <build|validate> [<table file>]')
+
+    path = sys.argv[2] if len(sys.argv) > 2 else PerfectPlayTable.DEFAULT_PATH
+
+    if sys.argv[1] == "build":
+        data = PerfectPlayTable.build()
+        PerfectPlayTable.write(data, path)
+        print(f'wrote {len(data)} bytes to {path}')
+    else:
+        position_count, errors = PerfectPlayTable.load(path).validate()
+
+        for error in errors:
+            print(error)
+
+        if errors:
+            sys.exit(f'{len(errors)} error(s) found in {path}')
+
+        print(f'{position_count} positions in {path} match the brute force search')
+
+if __name__ == '__main__':
+    main()
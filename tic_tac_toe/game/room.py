@@ -0,0 +1,137 @@
+from collections import deque
+import itertools
+from tic_tac_toe.game.game_state import GameState
+
+#keeps track of the state of a single game hosted by the server. Each room has its own
+#players, turn order and tic-tac-toe board so that many games can be played at the same time
+class Room:
+    MAX_PLAYERS = 2
+    MIN_BOARD_SIZE = 3
+    MAX_BOARD_SIZE = 25
+    #number of events kept in the event log of the room
+    EVENT_LOG_SIZE = 256
+
+    def __init__(self, room_id, board_size=GameState.DEFAULT_SIZE, win_length=GameState.DEFAULT_WIN_LENGTH,
+                 is_matchmaking_room=False, series=None):
+        self.room_id = room_id
+        #room was created by the server for players that did not ask for a room, it waits in the matchmaking
+        #queue while it has a free seat
+        self.is_matchmaking_room = is_matchmaking_room
+        #tournament series played in the room, None when the room is not part of a tournament. Games in the
+        #series are started by the server and the room is closed once the series is over
+        self.series = series
+        #feed of the room's game updates that is shared by the spectators watching the room, None when nobody
+        #is watching
+        self.spectator_feed = None
+        #timer that ends the game when the player whose turn it is takes too long to move, None when moves are
+        #not timed or no game is being played
+        self.move_timer = None
+        #record of the game being played that is written to the game record log when the game is over, None when
+        #games are not recorded or no game is being played
+        self.game_record = None
+        #messages sent to the players of the room, replayed to a player that reconnects after losing their
+        #connection. Each entry is the broadcast and the name of the player it was not sent to, only the latest
+        #EVENT_LOG_SIZE events are kept
+        self.event_log = deque(maxlen=self.EVENT_LOG_SIZE)
+        #number of events that have been logged since the room was created
+        self.event_count = 0
+
+        #size of the board (board_size x board_size) and number of symbols in a row needed to win
+        self.board_size = board_size
+        self.win_length = win_length
+
+        #dictionary keeping track of clients that are registered to play in this room
+        #key: player that is registered (ip addr, port), value: player name
+        self.registered_player_dict = dict()
+
+        #dictionary keeping track of the turn order for each client (0 or 1)
+        self.player_turn_dict = dict()
+
+        #dictionary keeping track of the symbol each client is using
+        #key: player (ip addr, port), value: index of the player's symbol in the game state
+        self.player_index_dict = dict()
+
+        #dictionary keeping track of the rating that each player registered with, used for matchmaking
+        #key: player (ip addr, port), value: rating
+        self.player_rating_dict = dict()
+
+        #keeps track if the game has started
+        self.game_has_started = False
+
+        #keeps track of the current player's turn. It is updated each time a move is
+        #received from a player
+        self.current_player_turn = 0
+
+        #current state of tic tac board
+        self.game_state = self.create_game_state()
+
+    #creates the state for a new game with the room's board settings
+    def create_game_state(self):
+        return GameState(self.board_size, self.win_length)
+
+    #checks that the board settings can be used to create a room, returns an error message when they are invalid
+    @classmethod
+    def validate_board_settings(cls, board_size, win_length):
+        if not cls.MIN_BOARD_SIZE <= board_size <= cls.MAX_BOARD_SIZE:
+            return f'Board size must be between {cls.MIN_BOARD_SIZE} and {cls.MAX_BOARD_SIZE}.'
+        elif not cls.MIN_BOARD_SIZE <= win_length <= board_size:
+            return f'Number of symbols in a row needed to win must be between {cls.MIN_BOARD_SIZE} and {board_size}.'
+
+        return None
+
+    #symbol of the player whose turn it is, empty when the game is not being played
+    def get_next_symbol(self):
+        if not self.game_has_started or self.current_player_turn not in self.player_index_dict:
+            return ""
+
+        return GameState.SYMBOLS[self.player_index_dict[self.current_player_turn]]
+
+    #board update with only the cell that was played. seq is the number of moves played so that
+    #clients can detect when they have missed an update
+    def create_board_delta(self, cell):
+        return dict(seq=self.game_state.move_count, cell=cell, symbol=self.game_state.board[cell],
+                    next=self.get_next_symbol())
+
+    #full copy of the board, sent when the game starts or when a client has missed an update
+    def create_board_snapshot(self):
+        return dict(seq=self.game_state.move_count, board=list(self.game_state.board), next=self.get_next_symbol())
+
+    def log_event(self, broadcast, excluded_player_name=None):
+        self.event_log.append((broadcast, excluded_player_name))
+        self.event_count += 1
+
+    #events logged after the first event_count events, None when some of them have already been dropped from the log
+    def get_events_since(self, event_count):
+        missed_count = self.event_count - event_count
+
+        if missed_count > len(self.event_log):
+            return None
+
+        return list(itertools.islice(self.event_log, len(self.event_log) - missed_count, None))
+
+    #moves a player to a new key, used when a player reconnects from another (ip addr, port). The order of the
+    #players is kept since the first player registered is assigned the first symbol
+    def replace_player(self, player, new_player):
+        for player_dict in (self.registered_player_dict, self.player_turn_dict, self.player_index_dict,
+                            self.player_rating_dict):
+            if player in player_dict:
+                items = [(new_player if key == player else key, value) for key, value in player_dict.items()]
+                player_dict.clear()
+                player_dict.update(items)
+
+        if self.current_player_turn == player:
+            self.current_player_turn = new_player
+
+    #board settings used to match players with rooms
+    def get_board_settings(self):
+        return self.board_size, self.win_length
+
+    def is_full(self):
+        return len(self.registered_player_dict) >= self.MAX_PLAYERS
+
+    def is_empty(self):
+        return len(self.registered_player_dict) == 0
+
+    #checks if the player name has already been taken by another player in the room
+    def has_player_name(self, player_name):
+        return player_name in self.registered_player_dict.values()
\ No newline at end of file
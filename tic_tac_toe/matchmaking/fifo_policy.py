@@ -0,0 +1,33 @@
+from collections import OrderedDict
+from tic_tac_toe.matchmaking.matchmaking_policy import MatchmakingPolicy
+
+#pairs players with the room that has been waiting the longest for the same board settings
+class FifoPolicy(MatchmakingPolicy):
+    def __init__(self):
+        #key: board settings, value: tickets of the waiting rooms in the order they started waiting
+        self.queue_dict = dict()
+
+    def add(self, ticket):
+        queue = self.queue_dict.get(ticket.board_settings)
+
+        if queue is None:
+            queue = OrderedDict()
+            self.queue_dict[ticket.board_settings] = queue
+
+        queue[ticket.room_id] = ticket
+
+    def remove(self, ticket):
+        queue = self.queue_dict[ticket.board_settings]
+        queue.pop(ticket.room_id)
+
+        if not queue:
+            self.queue_dict.pop(ticket.board_settings)
+
+    def find_match(self, board_settings, rating, is_joinable=None):
+        queue = self.queue_dict.get(board_settings)
+
+        if not queue:
+            return None
+
+        return next((ticket for ticket in queue.values() if is_joinable is None or is_joinable(ticket.room_id)),
+                    None)
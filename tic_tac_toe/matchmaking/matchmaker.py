@@ -0,0 +1,76 @@
+from collections import OrderedDict, deque
+from tic_tac_toe.matchmaking.fifo_policy import FifoPolicy
+from tic_tac_toe.matchmaking.matchmaking_ticket import MatchmakingTicket
+import time
+
+#queue of the rooms that are waiting for a second player. Players that register without a room id are placed
+#in the room picked by the matchmaking policy, or in a new room that waits in the queue when there is no match.
+#Keeps track of the queue depth and of how long rooms waited before they were matched
+class Matchmaker:
+    #number of the most recent wait times kept for the wait time percentiles
+    WAIT_TIME_SAMPLES = 1000
+    #rating of players that don't provide one when they register
+    DEFAULT_RATING = 1500
+
+    def __init__(self, policy=None):
+        self.policy = FifoPolicy() if policy is None else policy
+        #key: room id, value: ticket of the room, in the order the rooms started waiting
+        self.ticket_dict = OrderedDict()
+        #seconds that the most recently matched rooms waited for
+        self.wait_times = deque(maxlen=self.WAIT_TIME_SAMPLES)
+        self.match_count = 0
+
+    def is_waiting(self, room_id):
+        return room_id in self.ticket_dict
+
+    #adds a room with one player to the queue
+    def enqueue(self, room_id, board_settings, rating):
+        if room_id in self.ticket_dict:
+            return
+
+        ticket = MatchmakingTicket(room_id, board_settings, rating, time.monotonic())
+        self.ticket_dict[room_id] = ticket
+        self.policy.add(ticket)
+
+    #returns the id of the room that the player should join, or None when there is no match. The room stays
+    #in the queue until it is removed with dequeue. Rooms that is_joinable returns False for are skipped
+    def find_match(self, board_settings, rating, is_joinable=None):
+        ticket = self.policy.find_match(board_settings, rating, is_joinable)
+        return None if ticket is None else ticket.room_id
+
+    #removes a room from the queue and returns the number of seconds it waited. matched is True when the room
+    #has been filled by another player and False when its player has left
+    def dequeue(self, room_id, matched=False):
+        ticket = self.ticket_dict.pop(room_id, None)
+
+        if ticket is None:
+            return None
+
+        self.policy.remove(ticket)
+        wait_time = time.monotonic() - ticket.enqueue_time
+
+        if matched:
+            self.match_count += 1
+            self.wait_times.append(wait_time)
+
+        return wait_time
+
+    def get_queue_depth(self):
+        return len(self.ticket_dict)
+
+    #queue depth, number of matches, how long the oldest room has been waiting and the p50/p99 wait time
+    #of the most recently matched rooms in seconds
+    def get_metrics(self):
+        wait_times = sorted(self.wait_times)
+        oldest_wait_time = 0
+
+        if self.ticket_dict:
+            oldest_wait_time = time.monotonic() - next(iter(self.ticket_dict.values())).enqueue_time
+
+        return dict(
+            queue_depth=len(self.ticket_dict),
+            matches=self.match_count,
+            oldest_wait=oldest_wait_time,
+            wait_p50=wait_times[len(wait_times) // 2] if wait_times else 0,
+            wait_p99=wait_times[min(len(wait_times) - 1, int(len(wait_times) * 0.99))] if wait_times else 0,
+        )
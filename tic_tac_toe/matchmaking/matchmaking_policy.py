@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+
+#decides which waiting room a player that registers without a room id is placed in. Policies keep the waiting
+#rooms indexed so that a match is found by only looking at a few rooms, no matter how many rooms are waiting
+class MatchmakingPolicy(ABC):
+    @abstractmethod
+    def add(self, ticket):
+        ...
+
+    @abstractmethod
+    def remove(self, ticket):
+        ...
+
+    #returns the ticket of the room that the player should join, or None when the player should wait in a new
+    #room for another player. Rooms that is_joinable returns False for are skipped, every room is joinable when
+    #it is None
+    @abstractmethod
+    def find_match(self, board_settings, rating, is_joinable=None):
+        ...
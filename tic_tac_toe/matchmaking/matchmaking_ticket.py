@@ -0,0 +1,10 @@
+#room that is waiting in the matchmaking queue for another player to join
+class MatchmakingTicket:
+    def __init__(self, room_id, board_settings, rating, enqueue_time):
+        self.room_id = room_id
+        #(board size, win length), players are only paired with rooms using the board settings they asked for
+        self.board_settings = board_settings
+        #rating of the player waiting in the room
+        self.rating = rating
+        #time.monotonic() when the room started waiting
+        self.enqueue_time = enqueue_time
@@ -0,0 +1,103 @@
+from collections import OrderedDict
+
+#rooms waiting in the matchmaking queue with a rating in a band of ratings. The rooms of each rating are kept in the
+#order they started waiting, and a segment tree over the ratings of the band holds the room that has been waiting the
+#longest in each range of ratings. The room that has been waiting the longest with a rating in any range of the band
+#is found by looking at a few nodes of the tree, no matter how many rooms are waiting or what their ratings are
+class RatingBand:
+    def __init__(self, first_rating, width):
+        self.first_rating = first_rating
+        self.width = width
+        #number of leaves of the tree, one for each rating of the band rounded up to a power of two
+        self.leaf_count = 1 << (width - 1).bit_length()
+        #key: rating, value: tickets of the waiting rooms in the order they started waiting
+        self.queue_dict = dict()
+        #ticket that has been waiting the longest in the ratings under each node, None when no room is waiting with
+        #those ratings. The root is at index 1 and the leaf of a rating at leaf_count + rating - first_rating
+        self.tree = [None] * (2 * self.leaf_count)
+
+    def is_empty(self):
+        return not self.queue_dict
+
+    def add(self, ticket):
+        queue = self.queue_dict.get(ticket.rating)
+
+        if queue is None:
+            queue = OrderedDict()
+            self.queue_dict[ticket.rating] = queue
+
+        queue[ticket.room_id] = ticket
+
+        if len(queue) == 1:
+            self._update(ticket.rating)
+
+    def remove(self, ticket):
+        queue = self.queue_dict[ticket.rating]
+        #the tree only holds the ticket that has been waiting the longest with each rating
+        is_oldest = next(iter(queue)) == ticket.room_id
+        queue.pop(ticket.room_id)
+
+        if not queue:
+            self.queue_dict.pop(ticket.rating)
+
+        if is_oldest:
+            self._update(ticket.rating)
+
+    #returns the ticket that has been waiting the longest with a rating from low_rating to high_rating, or None when
+    #no room is waiting with those ratings. Rooms that is_joinable returns False for are skipped
+    def find_oldest(self, low_rating, high_rating, is_joinable=None):
+        low = max(low_rating - self.first_rating, 0) + self.leaf_count
+        high = min(high_rating - self.first_rating, self.width - 1) + self.leaf_count + 1
+        tree = self.tree
+        oldest = None
+
+        #the range covers the whole band, the root holds the ticket that has been waiting the longest in the band
+        if low == self.leaf_count and high == self.leaf_count + self.width:
+            oldest = tree[1]
+            low = high
+
+        while low < high:
+            if low & 1:
+                oldest = self._get_older(oldest, tree[low])
+                low += 1
+
+            if high & 1:
+                high -= 1
+                oldest = self._get_older(oldest, tree[high])
+
+            low >>= 1
+            high >>= 1
+
+        if oldest is None or is_joinable is None or is_joinable(oldest.room_id):
+            return oldest
+
+        #rooms that can't be joined are rare, every room in the range is only looked at when the room that has been
+        #waiting the longest can't be joined
+        oldest = None
+
+        for rating, queue in self.queue_dict.items():
+            if low_rating <= rating <= high_rating:
+                ticket = next((ticket for ticket in queue.values() if is_joinable(ticket.room_id)), None)
+                oldest = self._get_older(oldest, ticket)
+
+        return oldest
+
+    def _update(self, rating):
+        index = rating - self.first_rating + self.leaf_count
+        queue = self.queue_dict.get(rating)
+        tree = self.tree
+        tree[index] = None if queue is None else next(iter(queue.values()))
+        index >>= 1
+
+        while index:
+            tree[index] = self._get_older(tree[2 * index], tree[2 * index + 1])
+            index >>= 1
+
+    @staticmethod
+    def _get_older(ticket, other_ticket):
+        if ticket is None:
+            return other_ticket
+        elif other_ticket is None or ticket.enqueue_time <= other_ticket.enqueue_time:
+            return ticket
+        else:
+            return other_ticket
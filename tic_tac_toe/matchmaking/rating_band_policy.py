@@ -0,0 +1,50 @@
+from tic_tac_toe.matchmaking.matchmaking_policy import MatchmakingPolicy
+from tic_tac_toe.matchmaking.rating_band import RatingBand
+
+#pairs players with rooms whose player has a similar rating, paired players are at most band_width points apart.
+#Ratings are split into bands of band_width points so only the rooms in the player's own band and in the bands next
+#to it have to be looked at. Each band finds the room that has been waiting the longest within a range of ratings
+#without looking at the rooms outside of the range, and the room that has been waiting the longest out of those
+#rooms is picked
+class RatingBandPolicy(MatchmakingPolicy):
+    DEFAULT_BAND_WIDTH = 100
+
+    def __init__(self, band_width=DEFAULT_BAND_WIDTH):
+        self.band_width = band_width
+        #key: (board settings, band), value: rating band holding the tickets of the waiting rooms
+        self.band_dict = dict()
+
+    def add(self, ticket):
+        band = ticket.rating // self.band_width
+        key = (ticket.board_settings, band)
+        rating_band = self.band_dict.get(key)
+
+        if rating_band is None:
+            rating_band = RatingBand(band * self.band_width, self.band_width)
+            self.band_dict[key] = rating_band
+
+        rating_band.add(ticket)
+
+    def remove(self, ticket):
+        key = (ticket.board_settings, ticket.rating // self.band_width)
+        rating_band = self.band_dict[key]
+        rating_band.remove(ticket)
+
+        if rating_band.is_empty():
+            self.band_dict.pop(key)
+
+    def find_match(self, board_settings, rating, is_joinable=None):
+        band = rating // self.band_width
+        match = None
+
+        for nearby_band in (band - 1, band, band + 1):
+            rating_band = self.band_dict.get((board_settings, nearby_band))
+
+            if rating_band is not None:
+                #rooms in the bands next to the player's band can be up to 2 * band_width points away
+                ticket = rating_band.find_oldest(rating - self.band_width, rating + self.band_width, is_joinable)
+
+                if ticket is not None and (match is None or ticket.enqueue_time < match.enqueue_time):
+                    match = ticket
+
+        return match
@@ -0,0 +1,6 @@
+from tic_tac_toe.message.event import Event
+from tic_tac_toe.message.event_type import EventType
+
+class BoardSnapshot(Event):
+    def __init__(self, snapshot):
+        super().__init__(EventType.BOARD_SNAPSHOT, snapshot)
\ No newline at end of file
@@ -10,4 +10,12 @@ class EventType(Enum):
     BOARD_UPDATE = 7
     FIN = 8
     PLAYER_JOINED = 9
-    PLAYER_LEFT = 10
\ No newline at end of file
+    PLAYER_LEFT = 10
+    BOARD_SNAPSHOT = 11
+    RESYNC = 12
+    TOURNAMENT = 13
+    SPECTATE = 14
+    PING = 15
+    PONG = 16
+    SESSION = 17
+    RESUME = 18
\ No newline at end of file
@@ -0,0 +1,9 @@
+from tic_tac_toe.message.event import Event
+from tic_tac_toe.message.event_type import EventType
+
+#sent with the session token of a player that has lost their connection. The room id lets the server hand the
+#player off to the worker that hosts their room
+class Resume(Event):
+    def __init__(self, token, room_id):
+        super().__init__(EventType.RESUME, token)
+        self.room_id = room_id
\ No newline at end of file
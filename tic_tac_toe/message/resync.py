@@ -0,0 +1,6 @@
+from tic_tac_toe.message.event import Event
+from tic_tac_toe.message.event_type import EventType
+
+class Resync(Event):
+    def __init__(self):
+        super().__init__(EventType.RESYNC, "")
\ No newline at end of file
@@ -0,0 +1,6 @@
+from tic_tac_toe.message.event import Event
+from tic_tac_toe.message.event_type import EventType
+
+class Session(Event):
+    def __init__(self, session_info):
+        super().__init__(EventType.SESSION, session_info)
\ No newline at end of file
@@ -0,0 +1,6 @@
+from tic_tac_toe.message.event import Event
+from tic_tac_toe.message.event_type import EventType
+
+class Spectate(Event):
+    def __init__(self, room_id):
+        super().__init__(EventType.SPECTATE, room_id)
\ No newline at end of file
@@ -0,0 +1,6 @@
+from tic_tac_toe.message.event import Event
+from tic_tac_toe.message.event_type import EventType
+
+class TournamentUpdate(Event):
+    def __init__(self, message):
+        super().__init__(EventType.TOURNAMENT, message)
\ No newline at end of file
@@ -1,16 +1,39 @@
 from queue import Queue
+import selectors
 from tic_tac_toe.message_handler.message_handler import MessageHandler
+from tic_tac_toe.message_handler.selector_wakeup import SelectorWakeup
 from tic_tac_toe.message_handler.client.client_synchronizer import ClientSynchronizer
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+from tic_tac_toe.message_handler.protocol.json_codec import JsonCodec
+from tic_tac_toe.message.event_type import EventType
 
 class ClientMessageHandler(MessageHandler):
-    def __init__(self, selector, sock, addr):
-        super().__init__(selector, sock, addr)
+    def __init__(self, selector, sock, addr, protocol=ProtocolType.JSON, state_updated_event=None,
+                 client_synchronizer=None):
+        super().__init__(selector, sock, addr, protocol)
         self.request_queue = Queue()
-        self.client_synchronizer = ClientSynchronizer()
+        #the synchronizer of the previous connection is passed in when the client reconnects so the game state is kept
+        self.client_synchronizer = (ClientSynchronizer(state_updated_event) if client_synchronizer is None
+                                    else client_synchronizer)
+        #wakes up the selector when a request is sent from a thread other than the one running the selector
+        self.selector_wakeup = None
+
+    #lets send_request be called from other threads while the selector is waiting in select()
+    def enable_selector_wakeup(self):
+        self.selector_wakeup = SelectorWakeup(self.selector, self._update_selector_events)
 
     #sends requests to the server
     def send_request(self, request):
         self.request_queue.put(request)
+        self.wake_up_selector()
+
+    #wakes up the selector so the thread running it sends queued requests or checks if it should stop
+    def wake_up_selector(self):
+        #the wakeup can be closed by the selector thread at any time
+        selector_wakeup = self.selector_wakeup
+
+        if selector_wakeup is not None:
+            selector_wakeup.wake_up()
 
     #checks to see if the player has successfully registered
     def is_registered(self):
@@ -24,9 +47,13 @@ class ClientMessageHandler(MessageHandler):
         return self.client_synchronizer.get_valid_commands()
 
     #reads from server response queue and returns any responses that need to be
-    #print out to the player
-    def get_server_output(self):
-        return self.client_synchronizer.get_server_output()
+    #print out to the player, blocks until there is a response when block is True
+    def get_server_output(self, block=False):
+        return self.client_synchronizer.get_server_output(block)
+
+    #wakes up a thread that is blocked in get_server_output
+    def stop_server_output(self):
+        self.client_synchronizer.stop_server_output()
 
     #determines the possible moves that a player can make on the board
     def get_possible_moves_list(self):
@@ -43,17 +70,54 @@ class ClientMessageHandler(MessageHandler):
     def player_has_exit_game(self):
         return self.client_synchronizer.player_has_exit_game()
 
+    def get_session(self):
+        return self.client_synchronizer.get_session()
+
     def write(self):
-        if not self.request_queue.empty():
-            #write request to buffer
+        #write every queued request to the buffer so they are sent together
+        while not self.request_queue.empty():
             self._dequeue_request()
 
-    def read(self):
-        super().read()
+        self._write()
+        self._update_selector_events()
+
+    #only watch for the socket to be writable while there is something to send
+    def _update_selector_events(self):
+        if self._has_pending_messages() or not self.request_queue.empty():
+            self.set_selector_events(selectors.EVENT_READ | selectors.EVENT_WRITE)
+        else:
+            self.set_selector_events(selectors.EVENT_READ)
 
-        #process server response
-        if self.json_header:
-            self._process_response()
+    def close(self):
+        super().close()
+
+        if self.selector_wakeup is not None:
+            self.selector_wakeup.close()
+            self.selector_wakeup = None
+
+    def read(self):
+        #process server responses
+        for response in super().read():
+            self.logger.info(f'received response {repr(response)} from {self.addr}')
+
+            #heartbeats are answered straight away so that the server knows the connection is still alive
+            if int(response.get("action")) == EventType.PING.value:
+                self.send_request(dict(
+                    type=JsonCodec.CONTENT_TYPE,
+                    encoding=JsonCodec.CONTENT_ENCODING,
+                    content=dict(action=EventType.PONG.value, data=""),
+                ))
+                continue
+
+            self._process_response_json_content(response)
+
+        #request the full board if a board update was missed
+        if self.client_synchronizer.needs_resync():
+            self.send_request(dict(
+                type=JsonCodec.CONTENT_TYPE,
+                encoding=JsonCodec.CONTENT_ENCODING,
+                content=dict(action=EventType.RESYNC.value, data=""),
+            ))
 
     #reads from request queue and sends it to server
     def _dequeue_request(self):
@@ -63,32 +127,20 @@ class ClientMessageHandler(MessageHandler):
         content_type = request["type"]
         content_encoding = request["encoding"]
 
-        req = {
-            "content_bytes": self._json_encode(content, content_encoding),
-            "content_type": content_type,
-            "content_encoding": content_encoding,
-        }
-
-        message = self._create_message(**req)
-        self._send_buffer += message
-        self._write()
-
-    #processes messages received from the server
-    def _process_response(self):
-        content_len = self.json_header["content-length"]
-        if not len(self._recv_buffer) >= content_len:
-            return
-
-        data = self._recv_buffer[:content_len]
-        self._recv_buffer = self._recv_buffer[content_len:]
+        #server responds with the same protocol that the request was sent with
+        if self.protocol == ProtocolType.BINARY or (content_type == JsonCodec.CONTENT_TYPE and
+                                                    content_encoding == JsonCodec.CONTENT_ENCODING):
+            message = self.frame_content(content, self.protocol)
+        else:
+            req = {
+                "content_bytes": self._json_encode(content, content_encoding),
+                "content_type": content_type,
+                "content_encoding": content_encoding,
+            }
 
-        # process json response
-        encoding = self.json_header["content-encoding"]
-        response = self._json_decode(data, encoding)
-        self.logger.info(f'received response {repr(response)} from {self.addr}')
-        self._process_response_json_content(response)
+            message = self._create_message(**req)
 
-        self.json_header = None
+        self._queue_message(message)
 
     def _process_response_json_content(self, response):
         self.client_synchronizer.process_server_message(response)
\ No newline at end of file
@@ -1,10 +1,11 @@
 from queue import Queue
 from tic_tac_toe.message.event_type import EventType
 import logging
+import math
 
 #singleton class to handle messages sent from the server
 class ClientSynchronizer:
-    def __init__(self):
+    def __init__(self, state_updated_event=None):
         self.logger = logging.getLogger('app')
         #track if the player has successfully registered
         self.successfully_registered = False
@@ -22,12 +23,24 @@ class ClientSynchronizer:
         self.server_responses = Queue()
         #game state updated (lets menu know that it may need to refresh itself)
         self.state_updated = False
+        #optional threading.Event that is set whenever the game state is updated so the menu can wait
+        #for updates instead of polling new_state_detected
+        self.state_updated_event = state_updated_event
         #keep state of tic-tac-toe board
         self.tic_tac_toe_board = None
+        #sequence number of the last board update that was applied to the board
+        self.board_seq = None
+        #a board update was missed and the full board needs to be requested from the server
+        self.board_out_of_sync = False
         #game can be started when another player has joined
         self.game_can_be_started = False
         #keeps track if player has sent exit game request
         self.exit_game = False
+        #client is watching a room instead of playing
+        self.is_spectator = False
+        #session sent by the server when the player registers in a room, used to get the player's seat back if
+        #the connection to the server is lost. None when the player does not have a session
+        self.session = None
 
     #checks to see if the player has successfully registered
     def is_registered(self):
@@ -40,7 +53,9 @@ class ClientSynchronizer:
     def get_valid_commands(self):
         valid_commands = []
 
-        if self.successfully_registered:
+        if self.is_spectator:
+            valid_commands.append(EventType.DEREGISTER.name)
+        elif self.successfully_registered:
             if self.game_has_started:
                 if self.tic_tac_toe_board is not None and self.current_turn:
                     valid_commands.append(EventType.MOVE.name)
@@ -56,13 +71,18 @@ class ClientSynchronizer:
         return valid_commands
 
     #reads from server response queue and returns any responses that need to be
-    #print out to the player
-    def get_server_output(self):
-        if not self.server_responses.empty():
+    #print out to the player. When block is True, waits until there is a response, None
+    #is returned once stop_server_output has been called
+    def get_server_output(self, block=False):
+        if block or not self.server_responses.empty():
             return self.server_responses.get()
         else:
             return None
 
+    #wakes up a thread that is blocked in get_server_output
+    def stop_server_output(self):
+        self.server_responses.put(None)
+
     #method to detect if anything has changed the state of the game to display the most
     #accurate menu information to the user since the input/output is multithreaded
     def new_state_detected(self):
@@ -74,13 +94,31 @@ class ClientSynchronizer:
 
         return new_state_detected
 
+    #lets the menu know that the game state has changed
+    def _set_state_updated(self):
+        self.state_updated = True
+
+        if self.state_updated_event is not None:
+            self.state_updated_event.set()
+
+    #checks if a board update was missed. The flag is cleared once it has been queried so that
+    #the full board is only requested once
+    def needs_resync(self):
+        needs_resync = self.board_out_of_sync
+        self.board_out_of_sync = False
+        return needs_resync
+
     #retrieves if the player has exited the game or not
     def player_has_exit_game(self):
         return self.exit_game
 
+    #session token, room id and number of seconds the seat is held for, or None when the player has no session
+    def get_session(self):
+        return self.session
+
     #determines the possible moves that a player can make on the board
     def get_possible_moves_list(self):
-        possible_moves_list = self.tic_tac_toe_board
+        possible_moves_list = list(self.tic_tac_toe_board)
 
         # replace empty board entries with indexes to show the player what valid
         # moves they can choose from
@@ -90,14 +128,17 @@ class ClientSynchronizer:
 
         return possible_moves_list
 
-    #formats board with data provided
+    #formats board with data provided, boards are always square
     def format_board(self, data):
         formatted_board = ""
+        board_size = math.isqrt(len(data))
+        #pad each cell so columns line up when the board has more than 10 cells
+        cell_width = len(str(len(data) - 1))
 
-        for i in range(9):
-            formatted_board += "| {} |".format(data[i])
+        for i in range(len(data)):
+            formatted_board += "| {} |".format(str(data[i]).rjust(cell_width))
 
-            if (i + 1) % 3 == 0:
+            if (i + 1) % board_size == 0:
                 formatted_board += "\n"
 
         return formatted_board
@@ -115,6 +156,8 @@ class ClientSynchronizer:
             self._handle_start_msg(success, data)
         elif EventType.BOARD_UPDATE.value == action:
             self._handle_board_update_msg(data)
+        elif EventType.BOARD_SNAPSHOT.value == action or EventType.RESYNC.value == action:
+            self._handle_board_snapshot_msg(success, data)
         elif EventType.FIN.value == action:
             self._handle_fin_msg(data)
         elif EventType.ORDER.value == action:
@@ -125,6 +168,14 @@ class ClientSynchronizer:
             self._handle_player_joined_msg(data)
         elif EventType.PLAYER_LEFT.value == action:
             self._handle_player_left_msg(data)
+        elif EventType.TOURNAMENT.value == action:
+            self._handle_tournament_msg(data)
+        elif EventType.SPECTATE.value == action:
+            self._handle_spectate_msg(success, data)
+        elif EventType.SESSION.value == action:
+            self._handle_session_msg(data)
+        elif EventType.RESUME.value == action:
+            self._handle_resume_msg(success, data)
         else:
             self.logger.error(f'Error: invalid action "{action}".')
 
@@ -136,7 +187,7 @@ class ClientSynchronizer:
             self.server_responses.put(data)
 
         self.register_response_received_from_server = True
-        self.state_updated = True
+        self._set_state_updated()
 
     #game has started but do not update menu options until order
     # and board_update msg has been received
@@ -146,7 +197,7 @@ class ClientSynchronizer:
         else:
             self.server_responses.put(data + "\n")
             self.game_can_be_started = False
-            self.state_updated = True
+            self._set_state_updated()
 
     def _handle_fin_msg(self, data):
         #reset client game state
@@ -154,36 +205,54 @@ class ClientSynchronizer:
         self.player_game_symbol = None
         self.current_turn = False
         self.tic_tac_toe_board = None
-        self.state_updated = True
+        self.board_seq = None
+        self._set_state_updated()
         self.server_responses.put(data + "\n")
 
-    #format new board update for player
+    #applies the cell that was played to the board. Updates are numbered so that a missed update is
+    #detected and the full board is requested from the server
     def _handle_board_update_msg(self, data):
-        #if the board has already been initialized then a board update means
-        # we need to update whose turn it is
-        if self.tic_tac_toe_board is not None:
-            #if board is not fully taken up, display MOVE option to user
-            if " " in self.tic_tac_toe_board:
-                if self.current_turn:
-                    self.current_turn = False
-                else:
-                    self.current_turn = True
-            else:
-                self.current_turn = False
+        seq = data["seq"]
+
+        #update has already been applied from a snapshot
+        if self.board_seq is not None and seq <= self.board_seq:
+            return
+
+        if self.tic_tac_toe_board is None or seq != self.board_seq + 1:
+            self.logger.error(f'Missed board update, expected {self.board_seq} + 1 but received {seq}')
+            self.board_out_of_sync = True
+            return
+
+        self.tic_tac_toe_board[data["cell"]] = data["symbol"]
+        self.board_seq = seq
+        self._update_board(data["next"])
+
+    #replaces the whole board, sent when the game starts or after a missed update
+    def _handle_board_snapshot_msg(self, success, data):
+        if not success:
+            self.server_responses.put(data + "\n")
+            return
+
+        self.tic_tac_toe_board = list(data["board"])
+        self.board_seq = data["seq"]
+        self._update_board(data["next"])
+
+    #server lets the client know whose turn it is next with each board update
+    def _update_board(self, next_symbol):
+        self.current_turn = next_symbol != "" and next_symbol == self.player_game_symbol
 
-        self.tic_tac_toe_board = data
         board_update_msg = "Updated board received:\n"
-        board_update_msg += self.format_board(data)
+        board_update_msg += self.format_board(self.tic_tac_toe_board)
 
         #notify player that it is their turn
         if self.current_turn:
             board_update_msg += "It is your turn"
 
         self.server_responses.put(board_update_msg + "\n")
-        self.state_updated = True
+        self._set_state_updated()
 
     #save player order
-    #order message is sent before board update so state has not been fully updated here yet
+    #order message is sent before the board snapshot so state has not been fully updated here yet
     def _handle_order_msg(self, data):
         player_turn, self.player_game_symbol = data.split(":")
         self.server_responses.put("You were assigned symbol: " + self.player_game_symbol + "\n")
@@ -195,22 +264,62 @@ class ClientSynchronizer:
     def _handle_deregister_msg(self, success, data):
         if success:
             self.successfully_registered = False
+            self.session = None
         else:
             self.successfully_registered = True
 
         self.server_responses.put(data + "\n")
         self.register_response_received_from_server = False
-        self.state_updated = True
         self.exit_game = True
+        self._set_state_updated()
 
     #player has joined, update game state
     def _handle_player_joined_msg(self, data):
         self.game_can_be_started = True
         self.server_responses.put(data + "\n")
-        self.state_updated = True
+        self._set_state_updated()
 
     #player left, update game state
     def _handle_player_left_msg(self, data):
         self.game_can_be_started = False
         self.server_responses.put(data + "\n")
-        self.state_updated = True
\ No newline at end of file
+        self._set_state_updated()
+
+    #tournament updates are sent while the player is waiting between series, the server starts the
+    #games of the tournament so the player can't start a game until the next series has started
+    def _handle_tournament_msg(self, data):
+        self.game_has_started = False
+        self.game_can_be_started = False
+        self.server_responses.put(data + "\n")
+        self._set_state_updated()
+
+    #the server responds with the board when a game is being played in the room, the client exits if
+    #the room can't be watched
+    def _handle_spectate_msg(self, success, data):
+        if success:
+            self.successfully_registered = True
+            self.is_spectator = True
+
+            if isinstance(data, dict):
+                self._handle_board_snapshot_msg(success, data)
+            else:
+                self.server_responses.put(data + "\n")
+        else:
+            self.server_responses.put(data + "\n")
+            self.exit_game = True
+
+        self.register_response_received_from_server = True
+        self._set_state_updated()
+
+    def _handle_session_msg(self, data):
+        self.session = (data["token"], data["room"], float(data["grace_period"]))
+
+    #the player has their seat back after reconnecting, the client exits if the seat was not held long enough
+    def _handle_resume_msg(self, success, data):
+        if not success:
+            self.session = None
+            self.successfully_registered = False
+            self.exit_game = True
+
+        self.server_responses.put(data + "\n")
+        self._set_state_updated()
\ No newline at end of file
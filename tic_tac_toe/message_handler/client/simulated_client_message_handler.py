@@ -0,0 +1,136 @@
+from tic_tac_toe.message.register import Register
+from tic_tac_toe.message.start import Start
+from tic_tac_toe.message.move import Move
+from tic_tac_toe.message.event_type import EventType
+from tic_tac_toe.message_handler.client.client_message_handler import ClientMessageHandler
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+from tic_tac_toe.message_handler.protocol.json_codec import JsonCodec
+import random
+import selectors
+import socket
+import time
+
+#client that plays games without a player, used to put load on the server. Messages are framed the same
+#way as the interactive client but responses are handled here instead of by the client synchronizer so
+#that the time it takes the server to respond can be measured
+class SimulatedClientMessageHandler(ClientMessageHandler):
+    def __init__(self, selector, sock, addr, player_name, room_id, starts_games, game_count, move_list=None,
+                 protocol=ProtocolType.JSON, board_size=None, win_length=None, rating=None):
+        super().__init__(selector, sock, addr, protocol)
+        self.player_name = player_name
+        #the server's matchmaking queue pairs the client with another player when no room is provided
+        self.room_id = room_id
+        self.board_size = board_size
+        self.win_length = win_length
+        #rating sent to the server, used to pair players of a similar rating when the server matches players by rating
+        self.rating = rating
+        #one client of each pair starts the games. Players paired by the matchmaking queue are not told which of
+        #them joined the room first, so when None the player whose name sorts first starts the games
+        self.starts_games = starts_games
+        #set once another player has joined the client's room
+        self.is_paired = False
+        #number of games left to play
+        self.games_left = game_count
+        #cells to play in order of preference, a random free cell is played when no list is provided
+        self.move_list = move_list
+
+        #state of the current game
+        self.player_symbol = None
+        self.board = None
+        #cell of the move waiting for its board update and the time it was sent
+        self.pending_move = None
+        self.move_sent_time = None
+
+        #measurements collected while playing
+        self.connect_start_time = time.perf_counter()
+        self.connect_time = None
+        self.move_times = []
+        self.games_finished = 0
+        self.errors = 0
+
+        self.send_event(Register(player_name))
+
+    #client has played all of its games
+    def is_done(self):
+        return self.games_left <= 0
+
+    def send_event(self, event):
+        content = dict(action=event.event_type.value, data=event.data)
+
+        if event.event_type == EventType.REGISTER:
+            if self.room_id is not None:
+                content["room"] = self.room_id
+            if self.board_size is not None:
+                content["board_size"] = self.board_size
+            if self.win_length is not None:
+                content["win_length"] = self.win_length
+            if self.rating is not None:
+                content["rating"] = self.rating
+
+        self.send_request(dict(type=JsonCodec.CONTENT_TYPE, encoding=JsonCodec.CONTENT_ENCODING, content=content))
+        self._update_selector_events()
+
+    def process_events(self, mask=selectors.EVENT_READ | selectors.EVENT_WRITE):
+        #socket becomes writable once the non-blocking connect has finished
+        if self.connect_time is None:
+            error = self.sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+
+            if error:
+                raise ConnectionError(error, f'Could not connect to {self.addr}')
+
+            self.connect_time = time.perf_counter() - self.connect_start_time
+
+        super().process_events(mask)
+
+    def _process_response_json_content(self, response):
+        action = int(response.get("action"))
+        data = response.get("data")
+
+        if not response.get("success"):
+            self.errors += 1
+            self.logger.error(f'{self.player_name} received an error from the server: {data}')
+        #other player has joined the room
+        elif EventType.PLAYER_JOINED.value == action:
+            self.is_paired = True
+
+            if self.starts_games is None:
+                self.starts_games = self.player_name < data.split('"')[1]
+
+            if self.starts_games:
+                self.send_event(Start())
+        elif EventType.ORDER.value == action:
+            self.player_symbol = data.split(":")[1]
+        elif EventType.BOARD_SNAPSHOT.value == action or EventType.RESYNC.value == action:
+            self.board = list(data["board"])
+            self._play_if_turn(data["next"])
+        elif EventType.BOARD_UPDATE.value == action and self.board is not None:
+            self.board[data["cell"]] = data["symbol"]
+
+            if data["cell"] == self.pending_move:
+                self.move_times.append(time.perf_counter() - self.move_sent_time)
+                self.pending_move = None
+
+            self._play_if_turn(data["next"])
+        elif EventType.FIN.value == action:
+            self.board = None
+            self.pending_move = None
+            self.games_finished += 1
+            self.games_left -= 1
+
+            if self.starts_games and not self.is_done():
+                self.send_event(Start())
+
+    def _play_if_turn(self, next_symbol):
+        if next_symbol == self.player_symbol and self.pending_move is None:
+            self.pending_move = self._pick_move()
+            self.move_sent_time = time.perf_counter()
+            self.send_event(Move(self.pending_move))
+
+    #first free cell of the move list, or a random free cell
+    def _pick_move(self):
+        if self.move_list is not None:
+            for cell in self.move_list:
+                if cell < len(self.board) and self.board[cell] == " ":
+                    return cell
+
+        return random.choice([cell for cell, symbol in enumerate(self.board) if symbol == " "])
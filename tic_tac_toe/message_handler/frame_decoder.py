@@ -0,0 +1,161 @@
+from tic_tac_toe.message_handler.receive_buffer import ReceiveBuffer
+from tic_tac_toe.message_handler.protocol.binary_codec import BinaryCodec
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+from tic_tac_toe.message_handler.protocol.json_codec import JsonCodec
+import json
+import struct
+
+#incrementally decodes messages received from a socket. Data can be fed to the decoder in any
+#sized chunks and every complete message in the buffer is decoded at once. The state of a message
+#that has only been partially received is kept until the rest of it arrives. Both json and binary
+#messages are decoded, the protocol of the last decoded message is saved so the same protocol can be used to respond
+class FrameDecoder:
+    PROTOHEADER_LEN = 2
+    REQUIRED_HEADERS = (
+        "byteorder",
+        "content-length",
+        "content-type",
+        "content-encoding",
+    )
+
+    def __init__(self, json_codec=None):
+        self.json_codec = json_codec if json_codec is not None else JsonCodec.get_default()
+        self._recv_buffer = ReceiveBuffer()
+        self._json_header_len = None
+        self.json_header = None
+        #action, flags and payload length of a binary message
+        self._binary_header = None
+        #protocol of the last message that was decoded
+        self.protocol = None
+
+    #reads data from the socket into the buffer and returns the number of bytes read
+    def recv_from(self, sock):
+        return self._recv_buffer.recv_from(sock)
+
+    #adds data that has already been received to the buffer
+    def feed(self, data):
+        self._recv_buffer.feed(data)
+
+    #returns a list with the content of every complete message in the buffer
+    def decode_frames(self):
+        frames = []
+
+        while True:
+            if self._json_header_len is None and self._binary_header is None:
+                if not len(self._recv_buffer):
+                    break
+
+                #first byte of the message determines which protocol it was sent with
+                if BinaryCodec.is_binary_message(self._recv_buffer.unpack(">B")[0]):
+                    self.process_binary_header()
+
+                    if self._binary_header is None:
+                        break
+                else:
+                    self.process_protoheader()
+
+                    if self._json_header_len is None:
+                        break
+
+            if self._binary_header is not None:
+                content = self.process_binary_content()
+            else:
+                if self.json_header is None:
+                    self.process_jsonheader()
+
+                    if self.json_header is None:
+                        break
+
+                content = self.process_content()
+
+            if content is None:
+                break
+
+            frames.append(content)
+
+        return frames
+
+    #returns the data that has been received but not decoded yet and empties the buffer. Headers of a
+    #partially received message that have already been decoded are encoded again, so the data can be
+    #fed to another decoder to continue decoding
+    def take_buffered_data(self):
+        if self._binary_header is not None:
+            buffered_data = BinaryCodec.HEADER.pack(BinaryCodec.MAGIC, *self._binary_header)
+        elif self.json_header is not None:
+            json_header_bytes = json.dumps(self.json_header, ensure_ascii=False).encode("utf-8")
+            buffered_data = struct.pack(">H", len(json_header_bytes)) + json_header_bytes
+        elif self._json_header_len is not None:
+            buffered_data = struct.pack(">H", self._json_header_len)
+        else:
+            buffered_data = b""
+
+        unread = len(self._recv_buffer)
+
+        with self._recv_buffer.peek(unread) as data:
+            buffered_data += data
+
+        self._recv_buffer.consume(unread)
+        self._json_header_len = None
+        self.json_header = None
+        self._binary_header = None
+        return buffered_data
+
+    def process_protoheader(self):
+        hdrlen = self.PROTOHEADER_LEN
+        if len(self._recv_buffer) >= hdrlen:
+            self._json_header_len = self._recv_buffer.unpack(">H")[0]
+            self._recv_buffer.consume(hdrlen)
+
+    def process_jsonheader(self):
+        hdrlen = self._json_header_len
+        if len(self._recv_buffer) >= hdrlen:
+            with self._recv_buffer.peek(hdrlen) as json_header_bytes:
+                json_header = self.json_codec.decode_header(json_header_bytes)
+            self._recv_buffer.consume(hdrlen)
+            for reqhdr in self.REQUIRED_HEADERS:
+                if reqhdr not in json_header:
+                    raise ValueError(f'Missing required header "{reqhdr}".')
+
+            self.json_header = json_header
+
+    #decodes the message content once all of it has been received and resets the
+    #header state so that the next message can be read
+    def process_content(self):
+        content_len = self.json_header["content-length"]
+        if not len(self._recv_buffer) >= content_len:
+            return None
+
+        encoding = self.json_header["content-encoding"]
+        with self._recv_buffer.peek(content_len) as data:
+            content = self._json_decode(data, encoding)
+        self._recv_buffer.consume(content_len)
+
+        self._json_header_len = None
+        self.json_header = None
+        self.protocol = ProtocolType.JSON
+        return content
+
+    def process_binary_header(self):
+        if len(self._recv_buffer) >= BinaryCodec.HEADER_LEN:
+            self._binary_header = self._recv_buffer.unpack(BinaryCodec.HEADER.format)[1:]
+            self._recv_buffer.consume(BinaryCodec.HEADER_LEN)
+
+    def process_binary_content(self):
+        action, flags, payload_len = self._binary_header
+        if not len(self._recv_buffer) >= payload_len:
+            return None
+
+        with self._recv_buffer.peek(payload_len) as payload:
+            content = BinaryCodec.decode_content(action, flags, payload)
+        self._recv_buffer.consume(payload_len)
+
+        self._binary_header = None
+        self.protocol = ProtocolType.BINARY
+        return content
+
+    #json_bytes is a view of the receive buffer so it is decoded without copying it first
+    def _json_decode(self, json_bytes, encoding):
+        if encoding == JsonCodec.CONTENT_ENCODING:
+            return self.json_codec.decode(json_bytes)
+
+        return json.loads(str(json_bytes, encoding))
\ No newline at end of file
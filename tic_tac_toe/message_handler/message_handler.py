@@ -1,38 +1,56 @@
 from abc import ABC, abstractmethod
 import sys
+from collections import deque
+from itertools import islice
 import selectors
+import socket
 import json
-import io
 import struct
 import logging
+import os
+from tic_tac_toe.message_handler.frame_decoder import FrameDecoder
+from tic_tac_toe.message_handler.protocol.binary_codec import BinaryCodec
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+from tic_tac_toe.message_handler.protocol.json_codec import JsonCodec
 
 class MessageHandler(ABC):
-    def __init__(self, selector, sock, addr):
+    #max number of buffers that can be sent in a single sendmsg call
+    try:
+        IOV_MAX = os.sysconf("SC_IOV_MAX")
+    except (AttributeError, ValueError, OSError):
+        IOV_MAX = 1024
+
+    #sendmsg is not available on every platform (Windows)
+    HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+
+    def __init__(self, selector, sock, addr, protocol=ProtocolType.JSON):
         self.logger = logging.getLogger('app')
         self.selector = selector
         self.sock = sock
         self.addr = addr
-        self._recv_buffer = b""
-        self._send_buffer = b""
-        self._json_header_len = None
-        self.json_header = None
-
-    def process_events(self):
-        self.read()
+        #protocol used to send messages to the socket
+        self.protocol = protocol
+        #queue of framed messages waiting to be sent to the socket
+        self._send_queue = deque()
+        #number of bytes of the first message in the send queue that have already been sent
+        self._send_offset = 0
+        #total number of bytes of the messages in the send queue
+        self._send_queue_size = 0
+        #decodes the messages received from the socket
+        self.frame_decoder = FrameDecoder()
+        #events that the socket is currently registered for in the selector
+        self._selector_events = None
+
+    #mask is the set of events that the selector reported as ready for the socket
+    def process_events(self, mask=selectors.EVENT_READ | selectors.EVENT_WRITE):
+        if mask & selectors.EVENT_READ:
+            self.read()
         self.write()
 
+    #reads from the socket and returns the content of every complete message that has been received
     def read(self):
         self._read()
-
-        if self._json_header_len is None:
-            self.process_protoheader()
-
-        if self._json_header_len is not None:
-            if self.json_header is None:
-                self.process_jsonheader()
-
-        # Reset json header length now that headers have been read
-        self._json_header_len = None
+        return self.frame_decoder.decode_frames()
 
     @abstractmethod
     def write(self):
@@ -40,31 +58,91 @@ class MessageHandler(ABC):
 
     def _read(self):
         try:
-            # Should be ready to read
-            data = self.sock.recv(4096)
+            # Should be ready to read, data is read straight into the decoder's buffer
+            received = self.frame_decoder.recv_from(self.sock)
         except BlockingIOError:
             # Resource temporarily unavailable (errno EWOULDBLOCK)
             pass
         else:
-            if data:
-                self._recv_buffer += data
-            else:
+            if not received:
                 raise RuntimeError("Peer closed.")
 
+    #adds a framed message to the send queue. Messages are not copied into a single buffer, they are
+    #sent together with one sendmsg call when the socket is writable
+    def _queue_message(self, message):
+        self._send_queue.append(message)
+        self._send_queue_size += len(message)
+
+    def _has_pending_messages(self):
+        return len(self._send_queue) > 0
+
+    #number of bytes that are waiting to be sent to the socket
+    def get_buffered_size(self):
+        return self._send_queue_size - self._send_offset
+
+    def _clear_send_queue(self):
+        self._send_queue.clear()
+        self._send_offset = 0
+        self._send_queue_size = 0
+
     def _write(self):
-        if self._send_buffer:
-            self.logger.info(f'sending {repr(self._send_buffer)} to {self.addr}')
+        if self._send_queue:
+            buffers = list(islice(self._send_queue, self.IOV_MAX))
+
+            #skip the part of the first message that was sent by a previous partial write
+            if self._send_offset:
+                buffers[0] = memoryview(buffers[0])[self._send_offset:]
+
+            self.logger.info(f'sending {len(buffers)} message(s) to {self.addr}')
             try:
                 # Should be ready to write
-                sent = self.sock.send(self._send_buffer)
+                if self.HAS_SENDMSG:
+                    sent = self.sock.sendmsg(buffers)
+                else:
+                    sent = self.sock.send(b"".join(buffers))
             except BlockingIOError:
                 # Resource temporarily unavailable (errno EWOULDBLOCK)
                 pass
             else:
-                self._send_buffer = self._send_buffer[sent:]
+                self._advance_send_queue(sent)
+
+    #removes messages that have been completely sent from the send queue and keeps track of how much
+    #of a partially sent message has been sent
+    def _advance_send_queue(self, sent):
+        sent += self._send_offset
+
+        while self._send_queue and sent >= len(self._send_queue[0]):
+            message_size = len(self._send_queue.popleft())
+            sent -= message_size
+            self._send_queue_size -= message_size
 
+        self._send_offset = sent
+
+    #updates the events that the selector is watching for on the socket. Sockets are only watched
+    #for EVENT_WRITE when there is something to send so that idle connections don't wake up the selector
+    def set_selector_events(self, events):
+        if self.sock is None or events == self._selector_events:
+            return
+
+        if self._selector_events is None:
+            self.selector.register(self.sock, events, data=self)
+        else:
+            self.selector.modify(self.sock, events, data=self)
+
+        self._selector_events = events
+
+    #encodes the message content with the protocol provided and returns the framed message. Static so
+    #that a message can be framed once and sent to many clients
+    @staticmethod
+    def frame_content(content, protocol):
+        if protocol == ProtocolType.BINARY:
+            return BinaryCodec.create_message(content)
+
+        return JsonCodec.get_default().create_message(content)
+
+    @staticmethod
     def _create_message(
-        self, *, content_bytes, content_type, content_encoding
+        *, content_bytes, content_type, content_encoding
     ):
         jsonheader = {
             "byteorder": sys.byteorder,
@@ -72,47 +150,16 @@ class MessageHandler(ABC):
             "content-encoding": content_encoding,
             "content-length": len(content_bytes),
         }
-        jsonheader_bytes = self._json_encode(jsonheader, "utf-8")
+        jsonheader_bytes = MessageHandler._json_encode(jsonheader, "utf-8")
         message_hdr = struct.pack(">H", len(jsonheader_bytes))
         message = message_hdr + jsonheader_bytes + content_bytes
         return message
 
 
-    def process_protoheader(self):
-        hdrlen = 2
-        if len(self._recv_buffer) >= hdrlen:
-            self._json_header_len = struct.unpack(
-                ">H", self._recv_buffer[:hdrlen]
-            )[0]
-            self._recv_buffer = self._recv_buffer[hdrlen:]
-
-    def process_jsonheader(self):
-        hdrlen = self._json_header_len
-        if len(self._recv_buffer) >= hdrlen:
-            self.json_header = self._json_decode(
-                self._recv_buffer[:hdrlen], "utf-8"
-            )
-            self._recv_buffer = self._recv_buffer[hdrlen:]
-            for reqhdr in (
-                "byteorder",
-                "content-length",
-                "content-type",
-                "content-encoding",
-            ):
-                if reqhdr not in self.json_header:
-                    raise ValueError(f'Missing required header "{reqhdr}".')
-
-    def _json_encode(self, obj, encoding):
+    @staticmethod
+    def _json_encode(obj, encoding):
         return json.dumps(obj, ensure_ascii=False).encode(encoding)
 
-    def _json_decode(self, json_bytes, encoding):
-        tiow = io.TextIOWrapper(
-            io.BytesIO(json_bytes), encoding=encoding, newline=""
-        )
-        obj = json.load(tiow)
-        tiow.close()
-        return obj
-
     def close(self):
         self.logger.info(f'closing connection to {self.addr}')
         try:
@@ -0,0 +1,160 @@
+import json
+import struct
+
+#creates a table of the 4 cells held in each possible packed board byte
+def _create_packed_cells_table(cell_symbols):
+    return [tuple(cell_symbols[(byte >> shift) & 3] for shift in (0, 2, 4, 6)) for byte in range(256)]
+
+#compact binary protocol that can be used instead of the json protocol. Every message starts with
+#a fixed 5 byte header followed by the payload:
+#magic (1 byte) | action (1 byte) | flags (1 byte) | payload length (2 bytes)
+#
+#the first byte of a json message is the high byte of the json header length, json headers are never
+#large enough for it to be 0xFF so the magic byte lets the receiver tell the two protocols apart.
+#bit 0 of the flags holds the success field and the upper 4 bits hold the type of data in the payload
+class BinaryCodec:
+    MAGIC = 0xFF
+    HEADER = struct.Struct(">BBBH")
+    HEADER_LEN = HEADER.size
+    MAX_PAYLOAD_LEN = 0xFFFF
+
+    SUCCESS_FLAG = 0x01
+    DATA_TYPE_SHIFT = 4
+
+    #types of data that can be sent in the payload
+    DATA_NONE = 0
+    DATA_STRING = 1
+    DATA_INT = 2
+    DATA_BOARD = 3
+    DATA_JSON = 4
+    #the whole message is sent as json when it has fields that the binary header can't hold
+    CONTENT_JSON = 5
+    DATA_BOARD_DELTA = 6
+    DATA_BOARD_SNAPSHOT = 7
+
+    #board cells are packed into 2 bits each
+    CELL_CODES = {" ": 0, "X": 1, "O": 2}
+    #code 3 is unused and is decoded as an empty cell
+    CELL_SYMBOLS = (" ", "X", "O", " ")
+    BOARD_SIZE = struct.Struct(">H")
+    #seq, cell, symbol and next symbol of a board update
+    BOARD_DELTA = struct.Struct(">IHBB")
+    BOARD_DELTA_FIELDS = {"seq", "cell", "symbol", "next"}
+    #seq and next symbol of a board snapshot, followed by the packed board
+    BOARD_SNAPSHOT = struct.Struct(">IB")
+    BOARD_SNAPSHOT_FIELDS = {"seq", "board", "next"}
+    #index: packed byte, value: the 4 cells it holds
+    PACKED_CELLS = _create_packed_cells_table(CELL_SYMBOLS)
+
+    CONTENT_FIELDS = ("action", "data", "success", "internal_request")
+
+    #checks if the first byte of a message belongs to the binary protocol
+    @staticmethod
+    def is_binary_message(first_byte):
+        return first_byte == BinaryCodec.MAGIC
+
+    #encodes the message content and returns the framed message
+    @staticmethod
+    def create_message(content):
+        flags = BinaryCodec.SUCCESS_FLAG if content.get("success", True) else 0
+
+        if any(field not in BinaryCodec.CONTENT_FIELDS for field in content):
+            data_type = BinaryCodec.CONTENT_JSON
+            payload = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        else:
+            data_type, payload = BinaryCodec._encode_data(content.get("data"))
+
+        if len(payload) > BinaryCodec.MAX_PAYLOAD_LEN:
+            raise ValueError(f'Binary message payload is too large ({len(payload)} bytes).')
+
+        flags |= data_type << BinaryCodec.DATA_TYPE_SHIFT
+        header = BinaryCodec.HEADER.pack(BinaryCodec.MAGIC, int(content["action"]), flags, len(payload))
+        return header + payload
+
+    #decodes the payload into the same message content that the json protocol uses
+    @staticmethod
+    def decode_content(action, flags, payload):
+        data_type = flags >> BinaryCodec.DATA_TYPE_SHIFT
+
+        if data_type == BinaryCodec.CONTENT_JSON:
+            return json.loads(str(payload, "utf-8"))
+
+        return dict(
+            success=bool(flags & BinaryCodec.SUCCESS_FLAG),
+            action=action,
+            data=BinaryCodec._decode_data(data_type, payload),
+        )
+
+    @staticmethod
+    def _encode_data(data):
+        if data is None or data == "":
+            return BinaryCodec.DATA_NONE, b""
+        elif isinstance(data, bool):
+            return BinaryCodec.DATA_JSON, json.dumps(data).encode("utf-8")
+        elif isinstance(data, int):
+            #smallest number of bytes needed for a signed integer
+            return BinaryCodec.DATA_INT, data.to_bytes((data.bit_length() + 8) // 8, "big", signed=True)
+        elif isinstance(data, str):
+            return BinaryCodec.DATA_STRING, data.encode("utf-8")
+        elif isinstance(data, list) and BinaryCodec._is_board(data):
+            return BinaryCodec.DATA_BOARD, BinaryCodec.pack_board(data)
+        elif isinstance(data, dict) and data.keys() == BinaryCodec.BOARD_DELTA_FIELDS:
+            cell_codes = BinaryCodec.CELL_CODES
+            return BinaryCodec.DATA_BOARD_DELTA, BinaryCodec.BOARD_DELTA.pack(
+                data["seq"], data["cell"], cell_codes[data["symbol"]], cell_codes[data["next"] or " "])
+        elif (isinstance(data, dict) and data.keys() == BinaryCodec.BOARD_SNAPSHOT_FIELDS and
+              BinaryCodec._is_board(data["board"])):
+            header = BinaryCodec.BOARD_SNAPSHOT.pack(data["seq"], BinaryCodec.CELL_CODES[data["next"] or " "])
+            return BinaryCodec.DATA_BOARD_SNAPSHOT, header + BinaryCodec.pack_board(data["board"])
+        else:
+            return BinaryCodec.DATA_JSON, json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    @staticmethod
+    def _decode_data(data_type, payload):
+        if data_type == BinaryCodec.DATA_NONE:
+            return ""
+        elif data_type == BinaryCodec.DATA_INT:
+            return int.from_bytes(payload, "big", signed=True)
+        elif data_type == BinaryCodec.DATA_STRING:
+            return str(payload, "utf-8")
+        elif data_type == BinaryCodec.DATA_BOARD:
+            return BinaryCodec.unpack_board(payload)
+        elif data_type == BinaryCodec.DATA_JSON:
+            return json.loads(str(payload, "utf-8"))
+        elif data_type == BinaryCodec.DATA_BOARD_DELTA:
+            seq, cell, symbol, next_symbol = BinaryCodec.BOARD_DELTA.unpack_from(payload)
+            return dict(seq=seq, cell=cell, symbol=BinaryCodec.CELL_SYMBOLS[symbol],
+                        next=BinaryCodec.CELL_SYMBOLS[next_symbol].strip())
+        elif data_type == BinaryCodec.DATA_BOARD_SNAPSHOT:
+            seq, next_symbol = BinaryCodec.BOARD_SNAPSHOT.unpack_from(payload)
+            return dict(seq=seq, board=BinaryCodec.unpack_board(payload[BinaryCodec.BOARD_SNAPSHOT.size:]),
+                        next=BinaryCodec.CELL_SYMBOLS[next_symbol].strip())
+        else:
+            raise ValueError(f'Invalid binary data type "{data_type}".')
+
+    @staticmethod
+    def _is_board(data):
+        return all(isinstance(cell, str) and cell in BinaryCodec.CELL_CODES for cell in data)
+
+    #packs the board into the number of cells followed by 4 cells per byte
+    @staticmethod
+    def pack_board(board):
+        cell_codes = BinaryCodec.CELL_CODES
+        codes = [cell_codes[cell] for cell in board]
+        #pad the board so the last byte has 4 cells
+        codes.extend([0] * (-len(codes) % 4))
+        packed = bytes(a | b << 2 | c << 4 | d << 6
+                       for a, b, c, d in zip(codes[0::4], codes[1::4], codes[2::4], codes[3::4]))
+        return BinaryCodec.BOARD_SIZE.pack(len(board)) + packed
+
+    @staticmethod
+    def unpack_board(payload):
+        cell_count = BinaryCodec.BOARD_SIZE.unpack_from(payload)[0]
+        packed_cells = BinaryCodec.PACKED_CELLS
+        board = []
+
+        for byte in payload[BinaryCodec.BOARD_SIZE.size:]:
+            board.extend(packed_cells[byte])
+
+        del board[cell_count:]
+        return board
\ No newline at end of file
@@ -0,0 +1,112 @@
+import json
+import struct
+import sys
+
+#encodes and decodes json messages. A faster json library is used when one is installed, otherwise
+#the json module from the standard library is used. Headers for messages with the default content
+#type and encoding only differ by their content length, so encoded and decoded headers are cached
+class JsonCodec:
+    #json libraries in order of preference
+    LIBRARIES = ("orjson", "ujson", "json")
+    CONTENT_TYPE = "text/json"
+    CONTENT_ENCODING = "utf-8"
+    #max number of headers kept in each cache
+    MAX_CACHED_HEADERS = 4096
+
+    _default_codec = None
+
+    def __init__(self, library=None):
+        self.library = library if library is not None else self._find_library()
+        self._dumps, self._loads = self._load_library(self.library)
+
+        #key: content length, value: protoheader and json header
+        self._encoded_header_dict = dict()
+        #key: json header bytes, value: decoded json header
+        self._decoded_header_dict = dict()
+
+        #json header with the content length left out so it can be added without encoding the whole header
+        header = json.dumps({
+            "byteorder": sys.byteorder,
+            "content-type": self.CONTENT_TYPE,
+            "content-encoding": self.CONTENT_ENCODING,
+            "content-length": 0,
+        })
+        self._header_prefix = header[:header.rindex("0")]
+        self._header_suffix = header[header.rindex("0") + 1:]
+
+    #returns the codec that is shared by all message handlers
+    @classmethod
+    def get_default(cls):
+        if cls._default_codec is None:
+            cls._default_codec = cls()
+
+        return cls._default_codec
+
+    #replaces the shared codec, used to pick a different json library
+    @classmethod
+    def set_default(cls, codec):
+        cls._default_codec = codec
+
+    #returns the first json library in the preference list that is installed
+    @classmethod
+    def _find_library(cls):
+        for library in cls.LIBRARIES:
+            try:
+                cls._load_library(library)
+                return library
+            except ImportError:
+                pass
+
+    #returns functions to encode an object to utf-8 bytes and to decode bytes or a memoryview
+    @staticmethod
+    def _load_library(library):
+        if library == "orjson":
+            import orjson
+            return orjson.dumps, orjson.loads
+        elif library == "ujson":
+            import ujson
+            return (lambda obj: ujson.dumps(obj, ensure_ascii=False).encode("utf-8"),
+                    lambda data: ujson.loads(data if isinstance(data, bytes) else bytes(data)))
+        elif library == "json":
+            return (lambda obj: json.dumps(obj, ensure_ascii=False).encode("utf-8"),
+                    lambda data: json.loads(data if isinstance(data, bytes) else str(data, "utf-8")))
+        else:
+            raise ValueError(f'Unsupported json library "{library}".')
+
+    def encode(self, obj):
+        return self._dumps(obj)
+
+    #decodes utf-8 json from bytes or a memoryview without wrapping it in a stream
+    def decode(self, data):
+        return self._loads(data)
+
+    #decodes a json header. Headers that have already been seen are returned from the cache, so the
+    #returned header must not be modified
+    def decode_header(self, data):
+        header_bytes = bytes(data)
+        header = self._decoded_header_dict.get(header_bytes)
+
+        if header is None:
+            header = self._loads(header_bytes)
+
+            if len(self._decoded_header_dict) < self.MAX_CACHED_HEADERS:
+                self._decoded_header_dict[header_bytes] = header
+
+        return header
+
+    #encodes the message content and returns it framed with the protoheader and json header
+    def create_message(self, content):
+        content_bytes = self._dumps(content)
+        return self._create_header(len(content_bytes)) + content_bytes
+
+    def _create_header(self, content_len):
+        header = self._encoded_header_dict.get(content_len)
+
+        if header is None:
+            jsonheader_bytes = f'{self._header_prefix}{content_len}{self._header_suffix}'.encode("utf-8")
+            header = struct.pack(">H", len(jsonheader_bytes)) + jsonheader_bytes
+
+            if len(self._encoded_header_dict) < self.MAX_CACHED_HEADERS:
+                self._encoded_header_dict[content_len] = header
+
+        return header
\ No newline at end of file
@@ -0,0 +1,6 @@
+from enum import Enum
+
+#wire protocols that can be used between the client and server
+class ProtocolType(Enum):
+    JSON = 1
+    BINARY = 2
\ No newline at end of file
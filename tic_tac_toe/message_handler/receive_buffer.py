@@ -0,0 +1,77 @@
+import struct
+
+#growable receive buffer that sockets read directly into. Data is consumed by moving the start
+#offset forward instead of slicing, and unread data is only moved back to the front of the buffer
+#when there is not enough free space left at the end of it
+class ReceiveBuffer:
+    INITIAL_SIZE = 65536
+    MIN_RECV_SIZE = 4096
+
+    def __init__(self, size=INITIAL_SIZE):
+        self._buffer = bytearray(size)
+        #offset of the first unread byte
+        self._start = 0
+        #offset of the end of the unread data
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    #reads from the socket straight into the free space at the end of the buffer and returns
+    #the number of bytes read (0 when the peer has closed the connection)
+    def recv_from(self, sock):
+        self._reserve(self.MIN_RECV_SIZE)
+
+        with memoryview(self._buffer) as view:
+            with view[self._end:] as free_space:
+                received = sock.recv_into(free_space)
+
+        self._end += received
+        return received
+
+    #copies data that has already been received into the buffer
+    def feed(self, data):
+        self._reserve(len(data))
+        self._buffer[self._end:self._end + len(data)] = data
+        self._end += len(data)
+
+    #returns a view of the next n unread bytes. The view must be released before the buffer is
+    #read into again so that the buffer can be resized
+    def peek(self, n):
+        with memoryview(self._buffer) as view:
+            return view[self._start:self._start + n]
+
+    #unpacks a struct from the start of the unread data without copying it
+    def unpack(self, fmt):
+        return struct.unpack_from(fmt, self._buffer, self._start)
+
+    #marks the next n bytes as read
+    def consume(self, n):
+        self._start += n
+
+        #buffer is empty, reading can start from the front again without moving any data
+        if self._start == self._end:
+            self._start = 0
+            self._end = 0
+
+    #makes sure there are at least n bytes free at the end of the buffer
+    def _reserve(self, n):
+        if len(self._buffer) - self._end >= n:
+            return
+
+        unread = self._end - self._start
+
+        #move unread data to the front of the buffer to reuse the space that has already been read
+        if self._start > 0:
+            self._buffer[:unread] = self._buffer[self._start:self._end]
+            self._start = 0
+            self._end = unread
+
+        #grow the buffer if there is still not enough space
+        if len(self._buffer) - self._end < n:
+            new_size = len(self._buffer)
+
+            while new_size - self._end < n:
+                new_size *= 2
+
+            self._buffer.extend(bytes(new_size - len(self._buffer)))
\ No newline at end of file
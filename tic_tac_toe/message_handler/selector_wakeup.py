@@ -0,0 +1,44 @@
+import logging
+import selectors
+import socket
+
+#wakes up a thread that is waiting in selector.select() from another thread. A byte is written to one
+#end of a socket pair and the other end is watched by the selector, the callback is then ran by the
+#thread that owns the selector so it can safely update what the selector is watching
+class SelectorWakeup:
+    def __init__(self, selector, callback):
+        self.logger = logging.getLogger('app')
+        self.selector = selector
+        self.callback = callback
+        self.addr = "selector wakeup"
+        self._receiver, self._sender = socket.socketpair()
+        self._receiver.setblocking(False)
+        self._sender.setblocking(False)
+        self.selector.register(self._receiver, selectors.EVENT_READ, data=self)
+
+    #can be called from any thread
+    def wake_up(self):
+        try:
+            self._sender.send(b"\0")
+        except (BlockingIOError, OSError):
+            #socket buffer is full so the selector is already going to wake up, or the wakeup has been closed
+            pass
+
+    #called by the selector loop, the mask is always EVENT_READ
+    def process_events(self, mask=selectors.EVENT_READ):
+        try:
+            while self._receiver.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+        self.callback()
+
+    def close(self):
+        try:
+            self.selector.unregister(self._receiver)
+        except Exception as e:
+            self.logger.error(f'error: selector.unregister() exception for {self.addr}: {repr(e)}')
+
+        self._receiver.close()
+        self._sender.close()
@@ -0,0 +1,262 @@
+import asyncio
+from collections import deque
+import logging
+import time
+from tic_tac_toe.message.event_type import EventType
+from tic_tac_toe.message_handler.frame_decoder import FrameDecoder
+from tic_tac_toe.message_handler.message_handler import MessageHandler
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+from tic_tac_toe.message_handler.server.send_buffer_limits import SendBufferLimits
+
+#handles messages to/from a client connected to the asyncio server. Messages are decoded and framed the
+#same way as the selectors server and requests are processed by the same server synchronizer, only the
+#reading and writing of the socket is done with asyncio streams
+class AsyncServerMessageHandler:
+    #max number of bytes read from the stream at once
+    READ_SIZE = 65536
+
+    def __init__(self, reader, writer, server_request_handler, send_buffer_limits=None):
+        self.logger = logging.getLogger('app')
+        self.reader = reader
+        self.writer = writer
+        self.addr = writer.get_extra_info("peername")
+        self.server_request_handler = server_request_handler
+        #protocol used to send messages to the client
+        self.protocol = ProtocolType.JSON
+        #decodes the messages received from the client
+        self.frame_decoder = FrameDecoder()
+        #queue for internal server alerts and framed broadcasts that need to be sent to the client
+        self.request_queue = deque()
+        #the request queue is flushed once per pass of the event loop no matter how many messages are added
+        self._flush_scheduled = False
+        #set when the server stops reading requests from the client to shut down
+        self._stopped = False
+        #feed of the room that the client is watching, None when the client is not a spectator
+        self.spectator_feed = None
+        #set while waiting for the transport's buffer to drain before more spectator updates are read
+        self._drain_scheduled = False
+        #watermarks on the number of bytes waiting to be sent to the client
+        self.send_buffer_limits = SendBufferLimits() if send_buffer_limits is None else send_buffer_limits
+        self.writer.transport.set_write_buffer_limits(high=self.send_buffer_limits.high_watermark,
+                                                      low=self.send_buffer_limits.low_watermark)
+        #set when the client goes over the high watermark and cleared once it is back under the low watermark,
+        #its board updates are coalesced while it is set
+        self.is_throttled = False
+        #set when board updates have been dropped, the client is sent a snapshot when it is no longer throttled
+        self._board_snapshot_pending = False
+        #last time that anything was received from the client, and that a request other than a PONG was received
+        self.last_receive_time = time.monotonic()
+        self.last_request_time = self.last_receive_time
+
+    def add_internal_request(self, request):
+        self.request_queue.append(request)
+        self._schedule_flush()
+
+    #queues a broadcast message that has already been framed. The same bytes are shared by every
+    #client that the broadcast is sent to
+    def send_broadcast(self, broadcast):
+        if self._coalesce_broadcast(broadcast):
+            return
+
+        self.request_queue.append(broadcast.get_message(self.protocol))
+        self._schedule_flush()
+
+    #number of bytes in the transport's buffer that are waiting to be sent
+    def get_buffered_size(self):
+        return self.writer.transport.get_write_buffer_size()
+
+    #the transport is paused once more than the spectator output cap is buffered so that waiting for it to
+    #drain wakes up the spectator when it can be sent more updates
+    def follow_spectator_feed(self, spectator_feed):
+        self.spectator_feed = spectator_feed
+
+        if spectator_feed is not None and spectator_feed.MAX_BUFFERED_BYTES < self.send_buffer_limits.high_watermark:
+            self.writer.transport.set_write_buffer_limits(high=spectator_feed.MAX_BUFFERED_BYTES)
+        else:
+            self.writer.transport.set_write_buffer_limits(high=self.send_buffer_limits.high_watermark,
+                                                          low=self.send_buffer_limits.low_watermark)
+
+    def notify_spectator_feed(self):
+        self._schedule_flush()
+
+    #reads requests from the client until it closes the connection or is evicted
+    async def run(self):
+        while True:
+            data = await self.reader.read(self.READ_SIZE)
+            self.last_receive_time = time.monotonic()
+
+            if not data:
+                if self._stopped:
+                    self.logger.info(f'stopped reading requests from {self.addr}')
+                else:
+                    self.logger.info(f'client {self.addr} has closed its connection')
+                return
+
+            #requests are still read while the client is over the high watermark so that its pongs and requests
+            #such as de-register are not left unread, the client is disconnected if it goes over the max
+            self.frame_decoder.feed(data)
+            self._process_requests(self.frame_decoder.decode_frames())
+
+    #closes the connection of a client that has been idle, has stopped answering heartbeats or has reconnected on
+    #another connection, run returns once the connection has been closed
+    def evict(self):
+        self.writer.transport.abort()
+
+    #stops reading requests, run returns once the requests that have already been received are processed
+    def stop(self):
+        self._stopped = True
+        self.reader.feed_eof()
+
+    #sends everything that is still queued and closes the connection, waiting at most timeout seconds
+    #for the data to be sent
+    async def close(self, timeout=None):
+        self.logger.info(f'closing connection to {self.addr}')
+        self._flush_request_queue()
+
+        if not self.writer.is_closing():
+            try:
+                await asyncio.wait_for(self.writer.drain(), timeout)
+            except (ConnectionError, asyncio.TimeoutError):
+                pass
+
+            self.writer.close()
+
+        #a client that is disconnected while over the high watermark is no longer throttled, it can't be throttled
+        #again once its writer is closing
+        if self.is_throttled:
+            self.is_throttled = False
+            self.send_buffer_limits.throttled_client_count -= 1
+
+        try:
+            await asyncio.wait_for(self.writer.wait_closed(), timeout)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+
+    #process every client request that was received in a single batch
+    def _process_requests(self, requests):
+        #PONGs only let the server know that the connection is still alive
+        requests = [request for request in requests if request.get("action") != EventType.PONG.value]
+
+        if not requests:
+            return
+
+        self.last_request_time = self.last_receive_time
+
+        #respond with the same protocol that the client is using
+        self.protocol = self.frame_decoder.protocol
+
+        for request in requests:
+            self.logger.info(f'received request {repr(request)} from {self.addr}')
+
+        #keep responses in order with updates that were already queued for the client
+        self._flush_request_queue()
+
+        responses = self.server_request_handler.process_client_requests(self.addr, requests)
+        self._send([MessageHandler.frame_content(content, self.protocol) for content in responses])
+        self._check_send_buffer()
+
+    def _schedule_flush(self):
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush_request_queue)
+
+    #creates responses for internal requests and sends broadcast messages in the order they were added
+    def _flush_request_queue(self):
+        self._flush_scheduled = False
+        messages = []
+
+        while self.request_queue:
+            request = self.request_queue.popleft()
+
+            #broadcast messages are queued already framed
+            if isinstance(request, bytes):
+                messages.append(request)
+            else:
+                content = self.server_request_handler.process_client_request(self.addr, request)
+                messages.append(MessageHandler.frame_content(content, self.protocol))
+
+        if self.spectator_feed is not None and not self.writer.is_closing():
+            messages.extend(self.spectator_feed.read_updates(self.addr, self.protocol,
+                                                             self.writer.transport.get_write_buffer_size()))
+
+            #spectator has too much buffered to be sent the rest of the updates yet
+            if self.spectator_feed.has_updates(self.addr):
+                self._schedule_drain()
+
+        self._send(messages)
+        self._check_send_buffer()
+
+    #drops a board update when the client is over the high watermark, the next board update or the snapshot
+    #sent once the client catches up supersedes it. A new game or the end of the game supersedes the board
+    #updates that have been dropped
+    def _coalesce_broadcast(self, broadcast):
+        action = broadcast.content["action"]
+
+        if action == EventType.BOARD_SNAPSHOT.value or action == EventType.FIN.value:
+            self._board_snapshot_pending = False
+        elif action == EventType.BOARD_UPDATE.value and self.is_throttled:
+            self._board_snapshot_pending = True
+            self.send_buffer_limits.coalesced_update_count += 1
+            return True
+
+        return False
+
+    #throttles the client once it goes over the high watermark and disconnects it when it goes over the max.
+    #The connection is aborted since the data that is buffered would not be sent in time anyway
+    def _check_send_buffer(self):
+        if self.writer.is_closing():
+            return
+
+        buffered_size = self.get_buffered_size()
+
+        if not self.is_throttled and buffered_size > self.send_buffer_limits.high_watermark:
+            self.is_throttled = True
+            self.send_buffer_limits.throttled_client_count += 1
+            self.send_buffer_limits.throttle_count += 1
+            metrics = self.send_buffer_limits.get_metrics()
+            self.logger.warning(f'client {self.addr} has {buffered_size} bytes waiting to be sent, send buffer '
+                                f'metrics: {metrics}')
+            self._schedule_drain()
+
+        if buffered_size > self.send_buffer_limits.get_max_buffered_bytes():
+            self.logger.error(f'server: error, client {self.addr} has more than '
+                              f'{self.send_buffer_limits.get_max_buffered_bytes()} bytes waiting to be sent')
+            self.send_buffer_limits.disconnect_count += 1
+            self.writer.transport.abort()
+
+    #the client is back under the low watermark, the board is sent to it if updates were dropped
+    def _release_throttle(self):
+        self.is_throttled = False
+        self.send_buffer_limits.throttled_client_count -= 1
+
+        if self._board_snapshot_pending:
+            self._board_snapshot_pending = False
+            content = self.server_request_handler.create_board_snapshot_response(self.addr)
+
+            if content is not None:
+                self.request_queue.append(MessageHandler.frame_content(content, self.protocol))
+
+    #waits for the transport to go under the low watermark before the client is sent more
+    def _schedule_drain(self):
+        if not self._drain_scheduled:
+            self._drain_scheduled = True
+            asyncio.ensure_future(self._flush_after_drain())
+
+    async def _flush_after_drain(self):
+        try:
+            await self.writer.drain()
+        except ConnectionError:
+            return
+        finally:
+            self._drain_scheduled = False
+
+        if self.is_throttled:
+            self._release_throttle()
+
+        self._schedule_flush()
+
+    #messages are written to the transport's buffer, the transport sends them when the socket is writable
+    def _send(self, messages):
+        if messages and not self.writer.is_closing():
+            self.logger.info(f'sending {len(messages)} message(s) to {self.addr}')
+            self.writer.writelines(messages)
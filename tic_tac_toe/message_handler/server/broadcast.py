@@ -0,0 +1,18 @@
+from tic_tac_toe.message_handler.server.server_message_handler import ServerMessageHandler
+
+#message that is sent to many clients. The content is only encoded and framed once per protocol, the
+#first time it is sent, and the resulting bytes are shared by the send queue of every recipient
+class Broadcast:
+    def __init__(self, content):
+        self.content = content
+        #key: protocol, value: framed message
+        self._message_dict = dict()
+
+    def get_message(self, protocol):
+        message = self._message_dict.get(protocol)
+
+        if message is None:
+            message = ServerMessageHandler.frame_content(self.content, protocol)
+            self._message_dict[protocol] = message
+
+        return message
\ No newline at end of file
@@ -0,0 +1,76 @@
+import logging
+import time
+from tic_tac_toe.message.event_type import EventType
+
+#checks on the connected clients with a timer per connection on the server's timer wheel. Clients that have not
+#sent anything for a heartbeat interval are sent a PING, and clients that have not answered with a PONG by the end of
+#the next interval are evicted since their connection is most likely half-open. Clients that have sent nothing but
+#PONGs for longer than the idle timeout are evicted as well. The heartbeat interval and the idle timeout are
+#disabled when they are None
+class ConnectionMonitor:
+    #seconds between heartbeats used by the server when no heartbeat interval is picked
+    DEFAULT_HEARTBEAT_INTERVAL = 30
+
+    def __init__(self, timer_wheel, server_request_handler, heartbeat_interval=None, idle_timeout=None):
+        self.logger = logging.getLogger('app')
+        self.timer_wheel = timer_wheel
+        self.server_request_handler = server_request_handler
+        self.heartbeat_interval = heartbeat_interval
+        self.idle_timeout = idle_timeout
+        self.eviction_count = 0
+
+    def is_enabled(self):
+        return self.heartbeat_interval is not None or self.idle_timeout is not None
+
+    #starts checking on a client that has connected. The timer is dropped once the client is no longer connected
+    def add(self, message_handler):
+        if self.is_enabled():
+            self.timer_wheel.schedule(self._get_check_delay(message_handler), self._check, message_handler)
+
+    def _check(self, message_handler):
+        #connection has already been closed
+        if self.server_request_handler.connected_player_dict.get(message_handler.addr) is not message_handler:
+            return
+
+        now = time.monotonic()
+
+        if self.idle_timeout is not None and now - message_handler.last_request_time >= self.idle_timeout:
+            self._evict(message_handler, f'client {message_handler.addr} has been idle for {self.idle_timeout} seconds')
+            return
+
+        if self.heartbeat_interval is not None:
+            silent_time = now - message_handler.last_receive_time
+
+            if silent_time >= 2 * self.heartbeat_interval:
+                self._evict(message_handler, f'client {message_handler.addr} has not answered a ping in '
+                                             f'{silent_time:.1f} seconds')
+                return
+            elif silent_time >= self.heartbeat_interval:
+                message_handler.add_internal_request(dict(action=EventType.PING.value, internal_request=True, data=""))
+
+        self.timer_wheel.schedule(self._get_check_delay(message_handler), self._check, message_handler)
+
+    #the client is checked again when a PING is due, when it would go over the time it has to answer the PING or when
+    #it would go over the idle timeout, whichever comes first
+    def _get_check_delay(self, message_handler):
+        now = time.monotonic()
+        delays = []
+
+        if self.heartbeat_interval is not None:
+            ping_time = message_handler.last_receive_time + self.heartbeat_interval
+
+            #the client has already been sent a PING
+            if ping_time <= now:
+                ping_time += self.heartbeat_interval
+
+            delays.append(ping_time - now)
+
+        if self.idle_timeout is not None:
+            delays.append(message_handler.last_request_time + self.idle_timeout - now)
+
+        return max(0, min(delays))
+
+    def _evict(self, message_handler, reason):
+        self.logger.info(f'server: {reason}, closing connection')
+        self.eviction_count += 1
+        message_handler.evict()
@@ -0,0 +1,22 @@
+import secrets
+
+#session of a player that has registered in a room. The token is sent to the player when they register, and when
+#their connection is lost their seat is held for a grace period so that they can reconnect with the token instead
+#of losing the game. Players are keyed by the (ip addr, port) of their connection, so the session keeps track of
+#the address the player is currently connected from
+class PlayerSession:
+    #seconds that a seat is held for when no grace period is picked
+    DEFAULT_GRACE_PERIOD = 30
+
+    def __init__(self, addr, room_id):
+        self.token = secrets.token_urlsafe(16)
+        self.addr = addr
+        self.room_id = room_id
+        #number of events that had been logged in the room when the connection was lost, the events logged after
+        #it are replayed when the player reconnects
+        self.event_count = 0
+        #timer that frees the seat once the grace period is over, None while the player is connected
+        self.grace_timer = None
+
+    def is_connected(self):
+        return self.grace_timer is None
\ No newline at end of file
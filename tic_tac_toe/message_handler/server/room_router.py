@@ -0,0 +1,96 @@
+from tic_tac_toe.game.game_state import GameState
+from tic_tac_toe.message.event_type import EventType
+from tic_tac_toe.message_handler.protocol.protocol_type import ProtocolType
+import json
+import re
+import socket
+import struct
+import zlib
+
+#routes players to the worker process that owns the room they are registering in when the server is run
+#with several worker processes. Every worker has an inbox socket that other workers send the connections
+#of players to, along with the requests and data of the connection that have not been handled yet
+class RoomRouter:
+    #length of the json metadata, the messages waiting to be sent to the client and the data received
+    #from the client that has not been decoded yet
+    HAND_OFF_HEADER = struct.Struct(">III")
+    #max size of a hand off message, also used for the socket buffers of the inboxes
+    MAX_HAND_OFF_SIZE = 1 << 20
+    #rooms created by a worker have the index of the worker in their id so players can join them by id
+    WORKER_ROOM_ID_PATTERN = re.compile(r"room-(\d+)-\d+")
+
+    def __init__(self, worker_index, inbox_sockets):
+        self.worker_index = worker_index
+        self.worker_count = len(inbox_sockets)
+        #index: worker, value: socket the worker receives connections on and socket used to send to it
+        self.inbox_sockets = inbox_sockets
+        self.inbox = inbox_sockets[worker_index][0]
+        self.inbox.setblocking(False)
+
+    #creates a pair of connected sockets for each worker, must be called before the workers are started
+    @classmethod
+    def create_inbox_sockets(cls, worker_count):
+        inbox_sockets = []
+
+        for _ in range(worker_count):
+            inbox_sockets.append(socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM))
+
+            for inbox_socket in inbox_sockets[-1]:
+                inbox_socket.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, cls.MAX_HAND_OFF_SIZE)
+                inbox_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, cls.MAX_HAND_OFF_SIZE)
+
+        return inbox_sockets
+
+    #prefix of the ids of the rooms that are created by this worker
+    def get_room_id_prefix(self):
+        return f'room-{self.worker_index}-'
+
+    #returns the index of the worker that owns the room a request is registering in, would like to watch or is
+    #reconnecting to. Players that are already registered and other requests stay with the current worker
+    def find_worker(self, request, is_registered):
+        action = int(request.get("action"))
+
+        #players that reconnect send the room that holds their seat
+        if is_registered or action not in (EventType.REGISTER.value, EventType.SPECTATE.value, EventType.RESUME.value):
+            return self.worker_index
+
+        room_id = request.get("data") if action == EventType.SPECTATE.value else request.get("room")
+        tournament_id = request.get("tournament")
+
+        #every player of a tournament is hosted by the same worker so the tournament can pair them
+        if tournament_id is not None:
+            key = f'tournament {tournament_id}'
+        #players that don't ask for a room are matched with players that use the same board settings
+        elif room_id is None:
+            key = (f'{int(request.get("board_size", GameState.DEFAULT_SIZE))}x'
+                   f'{int(request.get("win_length", GameState.DEFAULT_WIN_LENGTH))}')
+        else:
+            key = str(room_id)
+            match = self.WORKER_ROOM_ID_PATTERN.fullmatch(key)
+
+            if match is not None and int(match.group(1)) < self.worker_count:
+                return int(match.group(1))
+
+        return zlib.crc32(key.encode("utf-8")) % self.worker_count
+
+    #sends the connection to another worker. The socket can be closed once this returns
+    def hand_off(self, worker_index, sock, protocol, requests, pending_data, buffered_data):
+        metadata = json.dumps(dict(protocol=protocol.value, requests=requests), ensure_ascii=False).encode("utf-8")
+        message = (self.HAND_OFF_HEADER.pack(len(metadata), len(pending_data), len(buffered_data)) +
+                   metadata + pending_data + buffered_data)
+        socket.send_fds(self.inbox_sockets[worker_index][1], [message], [sock.fileno()])
+
+    #receives a connection that another worker has handed off. Returns the socket, the protocol used by
+    #the client, the requests that still need to be processed, the messages that still need to be sent
+    #to the client and the data received from the client that has not been decoded yet
+    def receive_hand_off(self):
+        message, fds, _, _ = socket.recv_fds(self.inbox, self.MAX_HAND_OFF_SIZE, 1)
+        sock = socket.socket(fileno=fds[0])
+        metadata_len, pending_len, buffered_len = self.HAND_OFF_HEADER.unpack_from(message)
+        offset = self.HAND_OFF_HEADER.size
+        metadata = json.loads(message[offset:offset + metadata_len])
+        offset += metadata_len
+        pending_data = message[offset:offset + pending_len]
+        offset += pending_len
+        buffered_data = message[offset:offset + buffered_len]
+        return sock, ProtocolType(metadata["protocol"]), metadata["requests"], pending_data, buffered_data
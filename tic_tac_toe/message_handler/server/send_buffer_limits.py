@@ -0,0 +1,51 @@
+#limits on the number of bytes waiting to be sent to each client, shared by every connection of a server. A client
+#goes over the high watermark when it stops reading while messages keep being sent to it. From then on its board
+#updates are coalesced: they are dropped since the next one supersedes them, and the client is sent a single
+#snapshot of the board once it has read enough to be back under the low watermark. A client that keeps
+#going over the limit is disconnected instead of the server buffering its messages without limit. With the
+#"disconnect" overflow policy clients are disconnected as soon as they go over the high watermark
+class SendBufferLimits:
+    DEFAULT_HIGH_WATERMARK = 256 * 1024
+    DEFAULT_LOW_WATERMARK = 64 * 1024
+    #clients that are coalescing board updates are disconnected once this many times the high watermark is buffered
+    MAX_BUFFERED_FACTOR = 4
+    OVERFLOW_POLICIES = ("coalesce", "disconnect")
+
+    def __init__(self, high_watermark=DEFAULT_HIGH_WATERMARK, low_watermark=None, overflow_policy="coalesce"):
+        if low_watermark is None:
+            low_watermark = min(self.DEFAULT_LOW_WATERMARK, high_watermark)
+
+        if low_watermark < 0 or low_watermark > high_watermark:
+            raise ValueError(f'Invalid watermarks, low watermark {low_watermark} must be between 0 and the high '
+                             f'watermark {high_watermark}')
+
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise ValueError(f'Invalid overflow policy "{overflow_policy}", must be coalesce or disconnect')
+
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self.overflow_policy = overflow_policy
+
+        #number of clients that are over the high watermark, kept up to date by the clients as they are throttled,
+        #released and closed so the metrics don't have to look at every connection
+        self.throttled_client_count = 0
+        #number of times a client went over the high watermark, board updates dropped because a client was over
+        #the high watermark and clients disconnected for buffering too much
+        self.throttle_count = 0
+        self.coalesced_update_count = 0
+        self.disconnect_count = 0
+
+    def get_max_buffered_bytes(self):
+        if self.overflow_policy == "disconnect":
+            return self.high_watermark
+
+        return self.high_watermark * self.MAX_BUFFERED_FACTOR
+
+    #number of clients over the high watermark along with the counters
+    def get_metrics(self):
+        return dict(
+            throttled_clients=self.throttled_client_count,
+            throttles=self.throttle_count,
+            coalesced_updates=self.coalesced_update_count,
+            disconnects=self.disconnect_count,
+        )
@@ -1,62 +1,237 @@
-from queue import Queue
+from collections import deque
+import selectors
+import time
+from tic_tac_toe.message.event_type import EventType
 from tic_tac_toe.message_handler.message_handler import MessageHandler
+from tic_tac_toe.message_handler.server.send_buffer_limits import SendBufferLimits
 
 #handles messages to/from client
 class ServerMessageHandler(MessageHandler):
-    def __init__(self, selector, sock, addr, server_request_handler):
+    def __init__(self, selector, sock, addr, server_request_handler, room_router=None, send_buffer_limits=None):
         super().__init__(selector, sock, addr)
         #queue for internal server alerts that need to be sent to the client
-        self.request_queue = Queue()
+        self.request_queue = deque()
+        #total number of bytes of the broadcast messages in the request queue
+        self._request_queue_size = 0
         self.server_request_handler = server_request_handler
+        #routes players to the worker that owns their room when the server is run with several workers
+        self.room_router = room_router
+        #feed of the room that the client is watching, None when the client is not a spectator
+        self.spectator_feed = None
+        #watermarks on the number of bytes waiting to be sent to the client
+        self.send_buffer_limits = SendBufferLimits() if send_buffer_limits is None else send_buffer_limits
+        #set when the client goes over the high watermark and cleared once it is back under the low watermark.
+        #Its board updates are coalesced while it is set, its requests and heartbeats are still read
+        self.is_throttled = False
+        #set when board updates have been dropped, the client is sent a snapshot when it is no longer throttled
+        self._board_snapshot_pending = False
+        #set when the client has gone over the max number of buffered bytes, it is disconnected on the next write
+        self._is_overflowed = False
+        #last time that anything was received from the client, and that a request other than a PONG was received
+        self.last_receive_time = time.monotonic()
+        self.last_request_time = self.last_receive_time
 
     def add_internal_request(self, request):
-        self.request_queue.put(request)
+        self.request_queue.append(request)
+        self._update_selector_events()
+
+    #queues a broadcast message that has already been framed. The same bytes are shared by every
+    #client that the broadcast is sent to
+    def send_broadcast(self, broadcast):
+        if self._coalesce_broadcast(broadcast):
+            return
+
+        message = broadcast.get_message(self.protocol)
+        self.request_queue.append(message)
+        self._request_queue_size += len(message)
+        self._check_send_buffer()
+        self._update_selector_events()
+
+    #number of bytes waiting to be sent, including broadcasts that have not been added to the send queue yet
+    def get_buffered_size(self):
+        return super().get_buffered_size() + self._request_queue_size
+
+    def follow_spectator_feed(self, spectator_feed):
+        self.spectator_feed = spectator_feed
+
+    #the room that the client is watching has a new update, it is read from the feed when the socket is writable
+    def notify_spectator_feed(self):
+        self._update_selector_events()
 
     def write(self):
-        #process requests and send responses back to client
-        if not self.request_queue.empty():
-            self._create_response(self.request_queue.get())
+        if self._is_overflowed:
+            raise RuntimeError(f'Client has more than {self.send_buffer_limits.get_max_buffered_bytes()} bytes '
+                               f'waiting to be sent.')
+
+        #process all queued requests so their responses are sent together
+        self._process_request_queue()
+
+        if self.spectator_feed is not None:
+            for message in self.spectator_feed.read_updates(self.addr, self.protocol, self.get_buffered_size()):
+                self._queue_message(message)
 
         self._write()
 
+        if self.is_throttled and self.get_buffered_size() <= self.send_buffer_limits.low_watermark:
+            self._release_throttle()
+
+        self._update_selector_events()
+
+    #drops a board update when the client is over the high watermark, the next board update or the snapshot
+    #sent once the client catches up supersedes it. A new game or the end of the game supersedes the board
+    #updates that have been dropped
+    def _coalesce_broadcast(self, broadcast):
+        action = broadcast.content["action"]
+
+        if action == EventType.BOARD_SNAPSHOT.value or action == EventType.FIN.value:
+            self._board_snapshot_pending = False
+        elif action == EventType.BOARD_UPDATE.value and self.is_throttled:
+            self._board_snapshot_pending = True
+            self.send_buffer_limits.coalesced_update_count += 1
+            return True
+
+        return False
+
+    #throttles the client once it goes over the high watermark and disconnects it when it goes over the max
+    def _check_send_buffer(self):
+        buffered_size = self.get_buffered_size()
+
+        if not self.is_throttled and buffered_size > self.send_buffer_limits.high_watermark:
+            self.is_throttled = True
+            self.send_buffer_limits.throttled_client_count += 1
+            self.send_buffer_limits.throttle_count += 1
+            metrics = self.send_buffer_limits.get_metrics()
+            self.logger.warning(f'client {self.addr} has {buffered_size} bytes waiting to be sent, send buffer '
+                                f'metrics: {metrics}')
+
+        if not self._is_overflowed and buffered_size > self.send_buffer_limits.get_max_buffered_bytes():
+            self._is_overflowed = True
+            self.send_buffer_limits.disconnect_count += 1
+
+    #the client is back under the low watermark, the board is sent to it if updates were dropped
+    def _release_throttle(self):
+        self.is_throttled = False
+        self.send_buffer_limits.throttled_client_count -= 1
+
+        if self._board_snapshot_pending:
+            self._board_snapshot_pending = False
+            content = self.server_request_handler.create_board_snapshot_response(self.addr)
+
+            if content is not None:
+                self._queue_message(self.frame_content(content, self.protocol))
+
+    #only watch for the socket to be writable while there are requests to process or data to send. A throttled
+    #client is still read from so that its pongs and requests such as de-register are not left unread
+    def _update_selector_events(self):
+        if (self.is_throttled or self._has_pending_messages() or self.request_queue or
+                (self.spectator_feed is not None and self.spectator_feed.has_updates(self.addr))):
+            self.set_selector_events(selectors.EVENT_READ | selectors.EVENT_WRITE)
+        else:
+            self.set_selector_events(selectors.EVENT_READ)
+
     def read(self):
-        super().read()
+        requests = super().read()
+        self.last_receive_time = time.monotonic()
+
+        #PONGs only let the server know that the connection is still alive
+        requests = [request for request in requests if request.get("action") != EventType.PONG.value]
+
+        #process every client request that was received in a single batch
+        if requests:
+            self.last_request_time = self.last_receive_time
+
+            #respond with the same protocol that the client is using
+            self.protocol = self.frame_decoder.protocol
+
+            for request in requests:
+                self.logger.info(f'received request {repr(request)} from {self.addr}')
 
-        #process client request
-        if self.json_header:
-            self._process_request()
+            #keep responses in order with updates that were already queued for the client
+            self._process_request_queue()
+            self._process_client_requests(requests)
+            self._check_send_buffer()
 
-    def _process_request(self):
-        content_len = self.json_header["content-length"]
-        if not len(self._recv_buffer) >= content_len:
+    def close(self):
+        super().close()
+
+        #a client that is disconnected or handed off while over the high watermark is no longer throttled here
+        if self.is_throttled:
+            self.is_throttled = False
+            self.send_buffer_limits.throttled_client_count -= 1
+
+    #closes the connection of a client that has been idle, has stopped answering heartbeats or has reconnected on
+    #another connection
+    def evict(self):
+        #connection has already been closed
+        if self.sock is None:
             return
 
-        data = self._recv_buffer[:content_len]
-        self._recv_buffer = self._recv_buffer[content_len:]
+        self.server_request_handler.remove_connected_client(self.addr)
+        self.close()
 
-        encoding = self.json_header["content-encoding"]
-        request = self._json_decode(data, encoding)
-        self.logger.info(f'received request {repr(request)} from {self.addr}')
-        self.request_queue.put(request)
+    #continues handling a client that another worker has handed off, see _hand_off
+    def resume(self, protocol, requests, pending_data, buffered_data):
+        self.protocol = protocol
 
-        #clear request contents now that request has been read and queued
-        self.json_header = None
+        if pending_data:
+            self._queue_message(pending_data)
 
-    def _create_response(self, request):
-        response = self._create_response_json_content(request)
-        message = self._create_message(**response)
-        self._send_buffer += message
+        self.frame_decoder.feed(buffered_data)
+        self._process_client_requests(requests + self.frame_decoder.decode_frames())
+        self._update_selector_events()
+
+    #processes the requests and queues the responses. When the server is run with several workers, a
+    #player registering in a room that is owned by another worker is handed off to that worker together
+    #with the requests that have not been processed yet
+    def _process_client_requests(self, requests):
+        if self.room_router is None:
+            responses = self.server_request_handler.process_client_requests(self.addr, requests)
+        else:
+            responses = []
+
+            for index, request in enumerate(requests):
+                worker_index = self.room_router.find_worker(request,
+                                                            self.server_request_handler.is_registered(self.addr))
+
+                if worker_index != self.room_router.worker_index:
+                    self._queue_responses(responses)
+                    self._hand_off(worker_index, requests[index:])
+                    return
+
+                responses.append(self.server_request_handler.process_client_request(self.addr, request))
+
+        self._queue_responses(responses)
+
+    def _queue_responses(self, responses):
+        for content in responses:
+            self._queue_message(self.frame_content(content, self.protocol))
+
+    #sends the connection to another worker along with everything that has not been sent to or
+    #decoded from the client yet, then stops handling the client in this worker
+    def _hand_off(self, worker_index, requests):
+        self.logger.info(f'handing off {self.addr} to worker {worker_index}')
+        self._process_request_queue()
+        pending_data = b"".join(self._send_queue)[self._send_offset:]
+        self._clear_send_queue()
+
+        self.room_router.hand_off(worker_index, self.sock, self.protocol, requests, pending_data,
+                                  self.frame_decoder.take_buffered_data())
+        self.server_request_handler.remove_connected_client(self.addr)
+        self.close()
+
+    #creates responses for internal requests and queues broadcast messages in the order they were added
+    def _process_request_queue(self):
+        while self.request_queue:
+            request = self.request_queue.popleft()
+
+            #broadcast messages are queued already framed
+            if isinstance(request, bytes):
+                self._request_queue_size -= len(request)
+                self._queue_message(request)
+            else:
+                self._create_response(request)
 
     #process request in server request singleton and respond
-    def _create_response_json_content(self, request):
+    def _create_response(self, request):
         content = self.server_request_handler.process_client_request(self.addr, request)
-        return self._create_response_body(content)
-
-    def _create_response_body(self, content):
-        content_encoding = "utf-8"
-        response = {
-            "content_bytes": self._json_encode(content, content_encoding),
-            "content_type": "text/json",
-            "content_encoding": content_encoding,
-        }
-        return response
\ No newline at end of file
+        self._queue_message(self.frame_content(content, self.protocol))
\ No newline at end of file
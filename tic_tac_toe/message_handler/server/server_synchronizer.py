@@ -1,31 +1,89 @@
 from tic_tac_toe.message.event_type import EventType
+from tic_tac_toe.game.room import Room
+from tic_tac_toe.game.game_state import GameState
+from tic_tac_toe.game.bot_player import BotPlayer
+from tic_tac_toe.game.perfect_play_table import PerfectPlayTable
+from tic_tac_toe.matchmaking.matchmaker import Matchmaker
+from tic_tac_toe.tournament.single_elimination_tournament import SingleEliminationTournament
+from tic_tac_toe.tournament.round_robin_tournament import RoundRobinTournament
+from tic_tac_toe.message_handler.server.broadcast import Broadcast
+from tic_tac_toe.message_handler.server.spectator_feed import SpectatorFeed
+from tic_tac_toe.message_handler.server.player_session import PlayerSession
+from tic_tac_toe.record.game_record import GameRecord
 import logging
 import random
+import time
+import traceback
 
 #singleton class to keep game state in sync with all clients
 class ServerSynchronizer:
-    def __init__(self):
+    #matchmaking metrics are logged each time this many rooms have been matched
+    MATCHMAKING_METRICS_INTERVAL = 100
+    #key: tournament format that players ask for when they create a tournament, value: tournament class
+    TOURNAMENT_FORMATS = {SingleEliminationTournament.FORMAT: SingleEliminationTournament,
+                          RoundRobinTournament.FORMAT: RoundRobinTournament}
+
+    def __init__(self, room_id_prefix="room-", matchmaker=None, timer_wheel=None, move_time_limit=None,
+                 session_grace_period=None, game_record_log=None):
         self.logger = logging.getLogger('app')
+        #timers of the server, used for the move clocks and the grace periods of the sessions
+        self.timer_wheel = timer_wheel
+        #number of seconds that players have to play each move, moves are not timed when None
+        self.move_time_limit = move_time_limit
+        #number of seconds that the seat of a player that has lost their connection is held for, players are not
+        #given sessions when None
+        self.session_grace_period = session_grace_period if timer_wheel is not None else None
+        #log that every finished game is written to, games are not recorded when None
+        self.game_record_log = game_record_log
         #dictionary keeping track of clients that are connected
         #key: player that is connected (ip addr, port), value: server message handler for player
         self.connected_player_dict = dict()
 
-        #dictionary keeping track of clients that are registered to play
-        #key: player that is registered (ip addr, port), value: player name
-        self.registered_player_dict = dict()
+        #dictionary keeping track of all of the games being hosted by the server
+        #key: room id, value: room
+        self.room_dict = dict()
 
-        #dictionary keeping track of the turn order for each client (0 or 1)
-        self.player_turn_dict = dict()
+        #dictionary keeping track of which room each registered player is in
+        #key: player that is registered (ip addr, port), value: room id
+        self.player_room_dict = dict()
 
-        #keeps track if the game has started
-        self.game_has_started = False
+        #queue of the rooms that players are placed in when they register without asking for a specific room
+        self.matchmaker = Matchmaker() if matchmaker is None else matchmaker
 
-        #keeps track of the current player's turn. It is updated each time a move is
-        #received from a player
-        self.current_player_turn = 0
+        #used to create unique ids for rooms that are created by the server
+        self.room_id_prefix = room_id_prefix
+        self.room_id_counter = 0
 
-        #current state of tic tac board
-        self.tic_tac_toe_board = self._create_new_board()
+        #dictionary keeping track of the bots playing in rooms, bots are also kept in the connected player
+        #dictionary so that messages sent to their room are handled the same way as for other players
+        #key: bot ("bot", bot number), value: bot player
+        self.bot_dict = dict()
+        self.bot_counter = 0
+
+        #dictionary keeping track of the tournaments being played, each series of a tournament is played in its own room
+        #key: tournament id, value: tournament
+        self.tournament_dict = dict()
+
+        #dictionary keeping track of which tournament each player registered in. Players of a tournament are only
+        #in the player room dictionary while they are playing a series
+        #key: player that is registered (ip addr, port), value: tournament id
+        self.player_tournament_dict = dict()
+
+        #dictionary keeping track of the room that each spectator is watching
+        #key: spectator (ip addr, port), value: room id
+        self.spectator_room_dict = dict()
+
+        #dictionaries keeping track of the sessions of the players registered in rooms
+        #key: session token, value: session
+        self.session_dict = dict()
+        #key: player that is registered (ip addr, port), value: session
+        self.player_session_dict = dict()
+        #memory-map the table of 3x3 bot moves at startup instead of on the first bot move
+        PerfectPlayTable.get_default()
+
+    #processes a batch of requests received from a client and returns the responses in the same order
+    def process_client_requests(self, addr, requests):
+        return [self.process_client_request(addr, request) for request in requests]
 
     def process_client_request(self, addr, request):
         success = True
@@ -40,20 +98,42 @@ class ServerSynchronizer:
             #handle register event
             if EventType.REGISTER.value == action:
                 response_data, success = self._process_register_request(addr, request)
-            #handle de-register event
-            elif EventType.DEREGISTER.value == action:
-                response_data, success = self._process_deregister_request(addr)
-            #handle start event
-            elif EventType.START.value == action:
-                response_data, success = self._process_start_request(addr)
-            #handle stop event
-            elif EventType.STOP.value == action:
-                response_data, success = self._process_stop_request(addr)
-            #handle player move event
-            elif EventType.MOVE.value == action:
-                response_data, success = self._process_player_move_request(addr, request)
+            #handle spectate event
+            elif EventType.SPECTATE.value == action:
+                response_data, success = self._process_spectate_request(addr, request)
+            #handle resume event
+            elif EventType.RESUME.value == action:
+                response_data, success = self._process_resume_request(addr, request)
+            #spectators can only stop watching or ask for the whole board
+            elif addr in self.spectator_room_dict:
+                response_data, success = self._process_spectator_request(addr, action)
+            #players of a tournament that are not playing a series are waiting in the tournament
+            elif addr not in self.player_room_dict and addr in self.player_tournament_dict:
+                response_data, success = self._process_tournament_request(addr, action)
+            #all other events are routed to the room that the player has registered in
+            elif addr not in self.player_room_dict:
+                response_data = f'"{addr}" has not registered in a game yet.'
+                success = False
             else:
-                response_data = f'Error: invalid action "{action}".'
+                room = self.room_dict[self.player_room_dict[addr]]
+
+                #handle de-register event
+                if EventType.DEREGISTER.value == action:
+                    response_data, success = self._process_deregister_request(room, addr)
+                #handle start event
+                elif EventType.START.value == action:
+                    response_data, success = self._process_start_request(room, addr)
+                #handle stop event
+                elif EventType.STOP.value == action:
+                    response_data, success = self._process_stop_request(room, addr)
+                #handle player move event
+                elif EventType.MOVE.value == action:
+                    response_data, success = self._process_player_move_request(room, addr, request)
+                #handle board resync event
+                elif EventType.RESYNC.value == action:
+                    response_data, success = self._process_resync_request(room, addr)
+                else:
+                    response_data = f'Error: invalid action "{action}".'
         #forward message to client
         else:
             response_data = request.get("data")
@@ -62,53 +142,131 @@ class ServerSynchronizer:
 
         return self._create_response(success, action, response_data)
 
+    #checks if the player has registered in a room
+    def is_registered(self, addr):
+        return addr in self.player_room_dict or addr in self.player_tournament_dict or addr in self.spectator_room_dict
+
     #add new client to connected player dictionary for tracking
     def add_new_connected_client(self, addr, server_message_handler):
         self.connected_player_dict[addr] = server_message_handler
 
+    #board of the game being played in the room of the player, sent to a player that has caught up after
+    #its board updates were dropped. None when the player is not playing a game
+    def create_board_snapshot_response(self, addr):
+        room = self.room_dict.get(self.player_room_dict.get(addr))
+
+        if room is None or not room.game_has_started:
+            return None
+
+        return self._create_response(True, EventType.BOARD_SNAPSHOT.value, room.create_board_snapshot())
+
     #remove client from connected player dictionary
     def remove_connected_client(self, addr):
         #remove client from connected players dictionary
         if addr in self.connected_player_dict.keys():
             self.connected_player_dict.pop(addr)
 
-        self._deregister_client(addr)
+        #players with a session keep their seat until the grace period is over
+        if addr in self.player_session_dict:
+            self._hold_seat(self.player_session_dict[addr])
+        else:
+            self._deregister_client(addr)
 
-    #deregisters client if registered and alerts all other clients that the player has disconnected
+    #deregisters client if registered and alerts all other clients in the room that the player has disconnected
     def _deregister_client(self, addr):
+        tournament = None
+        session = self.player_session_dict.pop(addr, None)
+
+        if session is not None:
+            self.session_dict.pop(session.token)
+            self.timer_wheel.cancel(session.grace_timer)
+
+        if addr in self.spectator_room_dict:
+            self._remove_spectator(addr)
+
+        #players that leave a tournament forfeit the series they are playing and every series they still had to play
+        if addr in self.player_tournament_dict:
+            tournament = self.tournament_dict[self.player_tournament_dict.pop(addr)]
+            self.logger.info(f'"{tournament.registered_player_dict[addr]}" has left tournament '
+                             f'"{tournament.tournament_id}".')
+            tournament.remove_player(addr)
+
         #remove client from registered player dictionary if registered
-        if addr in self.registered_player_dict.keys():
-            response_data = f'"{self.registered_player_dict[addr]}" has left the game.'
+        if addr in self.player_room_dict.keys():
+            room = self.room_dict[self.player_room_dict.pop(addr)]
+            response_data = f'"{room.registered_player_dict[addr]}" has left the game.'
             self.logger.info(response_data)
-            self.registered_player_dict.pop(addr)
+            room.registered_player_dict.pop(addr)
+            room.player_rating_dict.pop(addr, None)
+            #the turn and symbol of the last game are kept between games, the room can be joined by another player
+            room.player_turn_dict.pop(addr, None)
+            room.player_index_dict.pop(addr, None)
 
             #finish game as player has left
-            if self.game_has_started:
-                self.player_turn_dict.pop(addr)
-                self._send_fin_message(response_data)
+            if room.game_has_started:
+                #player that is left wins the game
+                self._send_fin_message(room, response_data, GameRecord.END_LEFT,
+                                       next(iter(room.player_turn_dict), None))
             #notify other player that game can't be started anymore now that other player has left
             else:
-                self._send_message_to_clients(addr, EventType.PLAYER_LEFT, response_data)
+                self._send_message_to_clients(room, addr, EventType.PLAYER_LEFT, response_data)
+
+            #bots leave once there are no players left for them to play against
+            if all(player in self.bot_dict for player in room.registered_player_dict):
+                self._remove_bots(room)
+
+            #player that is left wins the series
+            if room.series is not None:
+                room.series.forfeit(addr)
+                self._finish_series(room)
+            else:
+                self._update_room_availability(room)
+
+        if tournament is not None and tournament.is_empty():
+            self.tournament_dict.pop(tournament.tournament_id)
 
     #register method
     def _process_register_request(self, addr, request):
         self.logger.info(f'Processing register request from "{addr}"')
         data = request.get("data")
+        #player would like to play against a bot instead of waiting for another player
+        play_against_bot = bool(request.get("bot", False))
+        #used to pair players with a similar rating when the server matches players by rating
+        rating = int(request.get("rating", Matchmaker.DEFAULT_RATING))
         success = True
 
-        if addr not in self.registered_player_dict:
-            if data not in self.registered_player_dict.values():
-                self.registered_player_dict[addr] = data
+        if not self.is_registered(addr) and request.get("tournament") is not None:
+            response_data, success = self._join_tournament(addr, data, request)
+        elif not self.is_registered(addr):
+            room, response_data = self._find_room(request.get("room"),
+                                                  int(request.get("board_size", GameState.DEFAULT_SIZE)),
+                                                  int(request.get("win_length", GameState.DEFAULT_WIN_LENGTH)),
+                                                  play_against_bot, rating, data)
+
+            if room is None:
+                success = False
+            elif not room.has_player_name(data):
+                room.registered_player_dict[addr] = data
+                room.player_rating_dict[addr] = rating
+                self.player_room_dict[addr] = room.room_id
+                self._update_room_availability(room)
                 response_data = f'"{data}" has joined the game.'
-                self._send_message_to_clients(addr, EventType.PLAYER_JOINED, response_data)
+                self._send_message_to_clients(room, addr, EventType.PLAYER_JOINED, response_data)
 
                 #send newly joined player info on previously joined player to get them in sync
-                for registered_player in self.registered_player_dict.values():
+                for registered_player in room.registered_player_dict.values():
                     if registered_player != data:
                         self.connected_player_dict[addr].add_internal_request(
                             self._create_response(True, EventType.PLAYER_JOINED.value,
                                                   f'"{registered_player}" has joined the game.',
                                                   True))
+
+                #bot takes the other seat if nobody else has joined the room
+                if play_against_bot and not room.is_full():
+                    self._add_bot(room)
+
+                if self.session_grace_period is not None:
+                    self._start_session(addr, room)
             else:
                 response_data = f'"{data}" has already been taken as a player name.'
                 success = False
@@ -119,12 +277,123 @@ class ServerSynchronizer:
         self.logger.info(response_data)
         return response_data, success
 
-    def _process_deregister_request(self, addr):
+    #finds the room that a player will be registered in. If no room id is provided then the matchmaker picks a
+    #room with the same board settings waiting for another player, or a new room is created that waits in the
+    #matchmaking queue. The board settings are only used when a new room is created. Players that would like to
+    #play against a bot are placed in a new room that does not wait in the queue so they are not paired with
+    #another player. The matchmaker skips rooms where the player's name has already been taken since the player
+    #did not pick the room
+    def _find_room(self, room_id, board_size, win_length, play_against_bot=False, rating=Matchmaker.DEFAULT_RATING,
+                   player_name=None):
+        response_data = Room.validate_board_settings(board_size, win_length)
+
+        if response_data is not None:
+            return None, response_data
+
+        response_data = ""
+
+        if room_id is None and play_against_bot:
+            room_id = self._create_room_id()
+            room = Room(room_id, board_size, win_length)
+            self.room_dict[room_id] = room
+        elif room_id is None:
+            room_id = self.matchmaker.find_match(
+                (board_size, win_length), rating,
+                lambda matched_room_id: not self.room_dict[matched_room_id].has_player_name(player_name))
+
+            if room_id is None:
+                room_id = self._create_room_id()
+                self.room_dict[room_id] = Room(room_id, board_size, win_length, is_matchmaking_room=True)
+
+            room = self.room_dict[room_id]
+        else:
+            room_id = str(room_id)
+
+            if room_id not in self.room_dict:
+                self.room_dict[room_id] = Room(room_id, board_size, win_length)
+
+            room = self.room_dict[room_id]
+
+            if room.series is not None:
+                response_data = f'Room "{room_id}" is being used by a tournament.'
+                room = None
+            elif room.is_full():
+                response_data = f'Room "{room_id}" is full.'
+                room = None
+            elif room.game_has_started:
+                response_data = f'The game in room "{room_id}" has already been started.'
+                room = None
+
+        return room, response_data
+
+    #creates unique room id that does not collide with room ids requested by players
+    def _create_room_id(self):
+        room_id = None
+
+        while room_id is None or room_id in self.room_dict:
+            self.room_id_counter += 1
+            room_id = f'{self.room_id_prefix}{self.room_id_counter}'
+
+        return room_id
+
+    #adds a bot to the room that plays against the player waiting in it
+    def _add_bot(self, room):
+        self.bot_counter += 1
+        bot = BotPlayer(("bot", self.bot_counter), f'Bot {self.bot_counter}')
+        self.bot_dict[bot.addr] = bot
+        self.connected_player_dict[bot.addr] = bot
+        room.registered_player_dict[bot.addr] = bot.player_name
+        self.player_room_dict[bot.addr] = room.room_id
+        self._update_room_availability(room)
+
+        response_data = f'"{bot.player_name}" has joined the game.'
+        self.logger.info(response_data)
+        self._send_message_to_clients(room, bot.addr, EventType.PLAYER_JOINED, response_data)
+
+    #removes the bots from a room that no longer has any other players
+    def _remove_bots(self, room):
+        for bot_addr in [player for player in room.registered_player_dict if player in self.bot_dict]:
+            self.logger.info(f'"{room.registered_player_dict[bot_addr]}" has left the game.')
+            self.bot_dict.pop(bot_addr)
+            self.connected_player_dict.pop(bot_addr)
+            self.player_room_dict.pop(bot_addr)
+            room.registered_player_dict.pop(bot_addr)
+            room.player_turn_dict.pop(bot_addr, None)
+            room.player_index_dict.pop(bot_addr, None)
+
+    #plays the bot's move when it is the bot's turn, called after the game starts and after each move
+    def _play_bot_move(self, room):
+        if room.game_has_started and room.current_player_turn in self.bot_dict:
+            bot = self.bot_dict[room.current_player_turn]
+            cell = bot.choose_move(room.game_state, room.player_index_dict[bot.addr])
+            self._process_player_move_request(room, bot.addr, dict(action=EventType.MOVE.value, data=cell))
+
+    #removes rooms that no longer have any players and keeps the matchmaking queue up to date with the
+    #matchmaking rooms that are waiting for another player
+    def _update_room_availability(self, room):
+        if room.is_empty():
+            self.room_dict.pop(room.room_id)
+            self.matchmaker.dequeue(room.room_id)
+            self._close_spectator_feed(room)
+        elif room.is_full():
+            if self.matchmaker.is_waiting(room.room_id):
+                wait_time = self.matchmaker.dequeue(room.room_id, matched=True)
+                self.logger.info(f'Room "{room.room_id}" was matched after waiting {wait_time:.3f}s, '
+                                 f'{self.matchmaker.get_queue_depth()} rooms waiting')
+
+                if self.matchmaker.match_count % self.MATCHMAKING_METRICS_INTERVAL == 0:
+                    self.logger.info(f'Matchmaking metrics: {self.matchmaker.get_metrics()}')
+        elif room.is_matchmaking_room and not room.game_has_started:
+            #rating of the player waiting in the room
+            rating = next(iter(room.player_rating_dict.values()), Matchmaker.DEFAULT_RATING)
+            self.matchmaker.enqueue(room.room_id, room.get_board_settings(), rating)
+
+    def _process_deregister_request(self, room, addr):
         self.logger.info(f'Processing deregister request from "{addr}"')
         success = True
 
-        if addr in self.registered_player_dict.keys():
-            response_data = f'"{self.registered_player_dict[addr]}" has successfully de-registered.'
+        if addr in room.registered_player_dict.keys():
+            response_data = f'"{room.registered_player_dict[addr]}" has successfully de-registered.'
             self._deregister_client(addr)
         else:
             response_data = f'"{addr}" was not already registered.'
@@ -133,19 +402,23 @@ class ServerSynchronizer:
         self.logger.info(response_data)
         return response_data, success
 
-    def _process_start_request(self, addr):
-        self.logger.info(f'Processing start request from "{addr}"')
+    def _process_start_request(self, room, addr):
+        self.logger.info(f'Processing start request from "{addr}" in room "{room.room_id}"')
         success = True
 
         #don't allow the game to start if only 1 player has registered
-        if len(self.registered_player_dict) > 1:
-            if not self.game_has_started:
-                self.game_has_started = True
-                self.tic_tac_toe_board = self._create_new_board()
-                response_data = f'{self.registered_player_dict[addr]} has started the game'
-                self._send_message_to_clients(addr, EventType.START, response_data)
-                self._determine_player_order()
-                self._send_message_to_clients("", EventType.BOARD_UPDATE, self.tic_tac_toe_board)
+        if len(room.registered_player_dict) > 1:
+            #players whose seat is being held are not connected
+            held_players = [player for player in room.registered_player_dict
+                            if player not in self.connected_player_dict]
+
+            if held_players:
+                response_data = f'Waiting for "{room.registered_player_dict[held_players[0]]}" to reconnect.'
+                success = False
+            elif not room.game_has_started:
+                response_data = (f'{room.registered_player_dict[addr]} has started the game on a '
+                                 f'{room.board_size}x{room.board_size} board, get {room.win_length} in a row to win')
+                self._start_game(room, addr, response_data)
             else:
                 response_data = "The game has already been started"
                 success = False
@@ -156,14 +429,17 @@ class ServerSynchronizer:
         self.logger.info(response_data)
         return response_data, success
 
-    def _process_stop_request(self, addr):
-        self.logger.info(f'Processing stop request from "{addr}"')
+    def _process_stop_request(self, room, addr):
+        self.logger.info(f'Processing stop request from "{addr}" in room "{room.room_id}"')
         success = True
 
-        if self.game_has_started:
+        if room.series is not None:
+            response_data = "Tournament games can't be stopped, de-register to leave the tournament"
+            success = False
+        elif room.game_has_started:
             # send fin message to all players since game has been stopped
-            response_data = f'{self.registered_player_dict[addr]} has stopped the game'
-            self._send_fin_message(response_data)
+            response_data = f'{room.registered_player_dict[addr]} has stopped the game'
+            self._send_fin_message(room, response_data)
         else:
             response_data = "The game has not been started yet"
             success = False
@@ -171,8 +447,31 @@ class ServerSynchronizer:
         self.logger.info(response_data)
         return response_data, success
 
+    #starts a new game in the room, the start message is sent to every player in the room except addr
+    def _start_game(self, room, addr, response_data):
+        room.game_has_started = True
+        room.game_state = room.create_game_state()
+        self._send_message_to_clients(room, addr, EventType.START, response_data)
+        self._determine_player_order(room)
+
+        if self.game_record_log is not None:
+            player_names = [None, None]
+
+            for player, name in room.registered_player_dict.items():
+                player_names[room.player_index_dict[player]] = name
+
+            room.game_record = GameRecord(time.time(), room.board_size, room.win_length,
+                                          room.player_index_dict[room.current_player_turn], player_names)
+
+        self._send_message_to_clients(room, "", EventType.BOARD_SNAPSHOT, room.create_board_snapshot())
+        self._start_move_clock(room)
+        self._play_bot_move(room)
+
     #determines which player will go first and what symbol they will be using
-    def _determine_player_order(self):
+    def _determine_player_order(self, room):
+        #players of the room's previous game may have left since it ended
+        room.player_turn_dict.clear()
+        room.player_index_dict.clear()
         player_one_turn = random.randint(0, 1)
 
         if player_one_turn == 0:
@@ -183,96 +482,495 @@ class ServerSynchronizer:
         player_one_turn_set = False
 
         #assign each player their order and symbol
-        for registered_player in self.registered_player_dict:
+        for registered_player in room.registered_player_dict:
             if not player_one_turn_set:
-                self.player_turn_dict[registered_player] = str(player_one_turn) + ":X"
+                room.player_turn_dict[registered_player] = str(player_one_turn) + ":X"
+                room.player_index_dict[registered_player] = GameState.get_player_index("X")
                 player_one_turn_set = True
 
                 if player_one_turn == 0:
-                    self.current_player_turn = registered_player
+                    room.current_player_turn = registered_player
             else:
-                self.player_turn_dict[registered_player] = str(player_two_turn) + ":O"
+                room.player_turn_dict[registered_player] = str(player_two_turn) + ":O"
+                room.player_index_dict[registered_player] = GameState.get_player_index("O")
 
                 if player_two_turn == 0:
-                    self.current_player_turn = registered_player
+                    room.current_player_turn = registered_player
 
             #send player turn info to each client
             player_turn_response = self._create_response(True, EventType.ORDER.value,
-                                                         self.player_turn_dict[registered_player], True)
+                                                         room.player_turn_dict[registered_player], True)
             self.connected_player_dict[registered_player].add_internal_request(player_turn_response)
 
     #processes each move request made by the players
-    def _process_player_move_request(self, addr, request):
-        self.logger.info(f'Processing player move request from "{addr}"')
+    def _process_player_move_request(self, room, addr, request):
+        self.logger.info(f'Processing player move request from "{addr}" in room "{room.room_id}"')
         data = int(request.get("data"))
         success = True
         response = ""
 
-        if self.current_player_turn == addr:
+        if not room.game_has_started or room.current_player_turn != addr:
+            success = False
+            response = "It is not your turn"
+        elif not room.game_state.is_valid_move(data):
+            success = False
+            response = f'"{data}" is not a valid move'
+        else:
             #update board with symbol in position requested by player
-            symbol = self.player_turn_dict[addr].split(":")[1]
-            self.tic_tac_toe_board[data] = symbol
-            self._send_message_to_clients("", EventType.BOARD_UPDATE, self.tic_tac_toe_board)
+            result = room.game_state.play(data, room.player_index_dict[addr])
 
-            #player has won, game over
-            if self._player_has_won(symbol):
-                self._send_fin_message(f'{self.registered_player_dict[addr]} has won. Game over.')
-            #game has resulted in a draw, game over
-            elif self._is_draw():
-                self._send_fin_message("DRAW! Game over.")
-            else:
+            if room.game_record is not None:
+                room.game_record.moves.append(data)
+
+            if result == GameState.IN_PROGRESS:
                 #update current player's turn
-                for player in self.player_turn_dict:
+                for player in room.player_turn_dict:
                     if player != addr:
-                        self.current_player_turn = player
+                        room.current_player_turn = player
                         break
+
+                self._start_move_clock(room)
+            else:
+                #game is over, nobody moves next
+                room.game_has_started = False
+
+            #only send the cell that was played instead of the whole board
+            self._send_message_to_clients(room, "", EventType.BOARD_UPDATE, room.create_board_delta(data))
+
+            #player has won, game over
+            if result == GameState.WIN:
+                self._send_fin_message(room, f'{room.registered_player_dict[addr]} has won. Game over.',
+                                       GameRecord.END_WIN, addr)
+            #game has resulted in a draw, game over
+            elif result == GameState.DRAW:
+                self._send_fin_message(room, "DRAW! Game over.", GameRecord.END_DRAW)
+
+            #next game of the series is started straight away
+            if result != GameState.IN_PROGRESS and room.series is not None:
+                self._record_series_game(room, addr if result == GameState.WIN else None)
+
+            self._play_bot_move(room)
+
+        return response, success
+
+    #gives the player whose turn it is move_time_limit seconds to play. Bots move straight away so they are not timed
+    def _start_move_clock(self, room):
+        self._stop_move_clock(room)
+
+        if (self.timer_wheel is not None and self.move_time_limit is not None and room.game_has_started and
+                room.current_player_turn not in self.bot_dict):
+            room.move_timer = self.timer_wheel.schedule(self.move_time_limit, self._expire_move_clock, room)
+
+    def _stop_move_clock(self, room):
+        if room.move_timer is not None:
+            self.timer_wheel.cancel(room.move_timer)
+            room.move_timer = None
+
+    #the player whose turn it is has run out of time and loses the game
+    def _expire_move_clock(self, room):
+        room.move_timer = None
+
+        if not room.game_has_started:
+            return
+
+        loser = room.current_player_turn
+        winner = next(player for player in room.player_turn_dict if player != loser)
+        self._send_fin_message(room, f'{room.registered_player_dict[loser]} ran out of time, '
+                                     f'{room.registered_player_dict[winner]} has won. Game over.',
+                                GameRecord.END_TIME, winner)
+
+        #next game of the series is started straight away
+        if room.series is not None:
+            self._record_series_game(room, winner)
+
+    #sends the full board to a client that has missed a board update
+    def _process_resync_request(self, room, addr):
+        self.logger.info(f'Processing resync request from "{addr}" in room "{room.room_id}"')
+
+        if room.game_has_started:
+            return room.create_board_snapshot(), True
         else:
+            return "The game has not been started yet", False
+
+    #gives the player a session that they can use to get their seat back if they lose their connection
+    def _start_session(self, addr, room):
+        session = PlayerSession(addr, room.room_id)
+        self.session_dict[session.token] = session
+        self.player_session_dict[addr] = session
+        self.connected_player_dict[addr].add_internal_request(
+            self._create_response(True, EventType.SESSION.value,
+                                  dict(token=session.token, room=room.room_id, grace_period=self.session_grace_period),
+                                  True))
+
+    #holds the seat of a player that has lost their connection until the grace period is over, the other players
+    #are told that the player has left while the seat is held
+    def _hold_seat(self, session):
+        room = self.room_dict[session.room_id]
+        player_name = room.registered_player_dict[session.addr]
+        session.event_count = room.event_count
+        session.grace_timer = self.timer_wheel.schedule(self.session_grace_period, self._expire_session, session)
+
+        response_data = (f'"{player_name}" has lost their connection, their seat is held for '
+                         f'{self.session_grace_period:g} seconds.')
+        self.logger.info(response_data)
+        self._send_message_to_clients(room, session.addr, EventType.PLAYER_LEFT, response_data)
+
+    #the player did not reconnect in time and leaves the room
+    def _expire_session(self, session):
+        session.grace_timer = None
+        self.logger.info(f'Session of "{session.addr}" in room "{session.room_id}" has expired')
+        self._deregister_client(session.addr)
+
+    #gives a player that has reconnected their seat back. The events logged in the room since the connection was
+    #lost are sent to the player, followed by their order and the board when a game is being played in case an
+    #update that was sent before the connection was lost never reached them
+    def _process_resume_request(self, addr, request):
+        self.logger.info(f'Processing resume request from "{addr}"')
+        session = self.session_dict.get(str(request.get("data")))
+
+        if self.is_registered(addr):
+            response_data = f'"{addr}" has already been registered.'
+            self.logger.info(response_data)
+            return response_data, False
+        elif session is None:
+            response_data = "The session has expired, register again to play."
+            self.logger.info(response_data)
+            return response_data, False
+
+        room = self.room_dict[session.room_id]
+        old_addr = session.addr
+
+        #the server has not noticed yet that the old connection was lost. It is closed once the request has been
+        #processed, the player has already been moved to the new connection by then so their seat is kept
+        if session.is_connected():
+            self.timer_wheel.schedule(0, self.connected_player_dict.pop(old_addr).evict)
+            session.event_count = room.event_count
+        else:
+            self.timer_wheel.cancel(session.grace_timer)
+            session.grace_timer = None
+
+        room.replace_player(old_addr, addr)
+        self.player_room_dict[addr] = self.player_room_dict.pop(old_addr)
+        self.player_session_dict[addr] = self.player_session_dict.pop(old_addr)
+        session.addr = addr
+        player_name = room.registered_player_dict[addr]
+        message_handler = self.connected_player_dict[addr]
+        events = room.get_events_since(session.event_count)
+
+        if events is None:
+            self.logger.info(f'Event log of room "{room.room_id}" no longer holds every event missed by '
+                             f'"{player_name}"')
+            events = []
+
+        events = [broadcast for broadcast, excluded_player_name in events if excluded_player_name != player_name]
+
+        for broadcast in events:
+            message_handler.send_broadcast(broadcast)
+
+        if room.game_has_started:
+            message_handler.add_internal_request(
+                self._create_response(True, EventType.ORDER.value, room.player_turn_dict[addr], True))
+            message_handler.add_internal_request(
+                self._create_response(True, EventType.BOARD_SNAPSHOT.value, room.create_board_snapshot(), True))
+
+        response_data = f'"{player_name}" has reconnected to room "{room.room_id}", {len(events)} missed event(s).'
+        self.logger.info(response_data)
+        self._send_message_to_clients(room, addr, EventType.PLAYER_JOINED, f'"{player_name}" has reconnected.')
+        return response_data, True
+
+    #adds the client to the spectators of a room, the response holds the board when a game is being played
+    def _process_spectate_request(self, addr, request):
+        room_id = str(request.get("data"))
+        self.logger.info(f'Processing spectate request from "{addr}" for room "{room_id}"')
+        success = True
+
+        if self.is_registered(addr):
+            response_data = f'"{addr}" has already been registered.'
             success = False
-            response = "It is not your turn"
+        elif room_id not in self.room_dict:
+            response_data = f'Room "{room_id}" does not exist.'
+            success = False
+        else:
+            room = self.room_dict[room_id]
 
-        return response, success
+            if room.spectator_feed is None:
+                room.spectator_feed = SpectatorFeed(room)
 
-    #end the game
-    def _send_fin_message(self, fin_message):
-        #reset game state
-        self.game_has_started = False
-        self._send_message_to_clients("", EventType.FIN, fin_message)
+            room.spectator_feed.add_spectator(addr, self.connected_player_dict[addr])
+            self.spectator_room_dict[addr] = room_id
+
+            if room.game_has_started:
+                response_data = room.create_board_snapshot()
+            else:
+                response_data = f'Watching room "{room_id}", the game has not been started yet.'
+
+        self.logger.info(response_data)
+        return response_data, success
 
-    #method to send message to all clients except to the one that is specified. A blank string can
-    #be provided to send a message to all clients
-    def _send_message_to_clients(self, addr, event_type, message):
-        self.logger.info(f'Sending {event_type.name} to clients: {message}')
+    def _process_spectator_request(self, addr, action):
+        room = self.room_dict[self.spectator_room_dict[addr]]
 
-        for key in self.registered_player_dict.keys():
-            response_data = self._create_response(True, event_type.value, message, True)
+        if EventType.DEREGISTER.value == action:
+            self.logger.info(f'Processing deregister request from spectator "{addr}"')
+            self._remove_spectator(addr)
+            return f'Stopped watching room "{room.room_id}".', True
+        elif EventType.RESYNC.value == action:
+            return self._process_resync_request(room, addr)
 
-            if addr != key:
-                self.connected_player_dict[key].add_internal_request(response_data)
+        return "Spectators can only stop watching or ask for the board.", False
 
-    def _create_response(self, success, action, response_data, internal_request=False):
-        return dict(success=success, action=action, internal_request=internal_request, data=response_data)
-
-    #method to create new board when new game is started
-    def _create_new_board(self):
-        return [" " for _ in range(9)]
-
-    #logic to determine when the game is won
-    def _player_has_won(self, symbol):
-        if (self.tic_tac_toe_board[0] == symbol and self.tic_tac_toe_board[1] == symbol and self.tic_tac_toe_board[2] == symbol) or \
-                (self.tic_tac_toe_board[3] == symbol and self.tic_tac_toe_board[4] == symbol and self.tic_tac_toe_board[5] == symbol) or \
-                (self.tic_tac_toe_board[6] == symbol and self.tic_tac_toe_board[7] == symbol and self.tic_tac_toe_board[8] == symbol) or \
-                (self.tic_tac_toe_board[0] == symbol and self.tic_tac_toe_board[3] == symbol and self.tic_tac_toe_board[6] == symbol) or \
-                (self.tic_tac_toe_board[1] == symbol and self.tic_tac_toe_board[4] == symbol and self.tic_tac_toe_board[7] == symbol) or \
-                (self.tic_tac_toe_board[2] == symbol and self.tic_tac_toe_board[5] == symbol and self.tic_tac_toe_board[8] == symbol) or \
-                (self.tic_tac_toe_board[0] == symbol and self.tic_tac_toe_board[4] == symbol and self.tic_tac_toe_board[8] == symbol) or \
-                (self.tic_tac_toe_board[2] == symbol and self.tic_tac_toe_board[4] == symbol and self.tic_tac_toe_board[6] == symbol):
-            return True
+    def _remove_spectator(self, addr):
+        room = self.room_dict[self.spectator_room_dict.pop(addr)]
+        room.spectator_feed.remove_spectator(addr)
+
+        if room.spectator_feed.get_spectator_count() == 0:
+            self._close_spectator_feed(room)
+
+    #lets the spectators know that the room has been closed and stops sending them updates
+    def _close_spectator_feed(self, room):
+        spectator_feed = room.spectator_feed
+
+        if spectator_feed is None:
+            return
+
+        room.spectator_feed = None
+        self.logger.info(f'Closing spectator feed of room "{room.room_id}", {spectator_feed.skip_count} '
+                         f'spectator(s) skipped ahead to a snapshot')
+
+        for spectator in list(spectator_feed.spectator_dict):
+            spectator_feed.remove_spectator(spectator)
+            self.spectator_room_dict.pop(spectator)
+            self.connected_player_dict[spectator].add_internal_request(
+                self._create_response(True, EventType.FIN.value, f'Room "{room.room_id}" has been closed.', True))
+
+    #handles requests from a player of a tournament that is waiting for the tournament to start or for their next series
+    def _process_tournament_request(self, addr, action):
+        tournament = self.tournament_dict[self.player_tournament_dict[addr]]
+        success = True
+
+        if EventType.DEREGISTER.value == action:
+            self.logger.info(f'Processing deregister request from "{addr}"')
+            response_data = f'"{tournament.registered_player_dict[addr]}" has successfully de-registered.'
+            self._deregister_client(addr)
+        elif EventType.START.value == action:
+            self.logger.info(f'Processing start request from "{addr}" in tournament "{tournament.tournament_id}"')
+
+            if tournament.has_started:
+                response_data = f'Tournament "{tournament.tournament_id}" has already been started.'
+                success = False
+            elif tournament.get_player_count() < tournament.MIN_PLAYERS:
+                response_data = "Not enough players have registered to start the tournament."
+                success = False
+            else:
+                response_data = f'{tournament.registered_player_dict[addr]} has started the tournament'
+                self._start_tournament(tournament, response_data)
+        elif tournament.is_finished:
+            response_data = f'Tournament "{tournament.tournament_id}" is over.'
+            success = False
+        elif tournament.has_started:
+            response_data = f'Waiting for the next series of tournament "{tournament.tournament_id}".'
+            success = False
         else:
-            return False
+            response_data = f'Tournament "{tournament.tournament_id}" has not been started yet.'
+            success = False
+
+        self.logger.info(response_data)
+        return response_data, success
 
-    #logic to determine when the game is at a draw
-    def _is_draw(self):
-        if " " not in self.tic_tac_toe_board:
-            return True
+    #registers the player in a tournament. The tournament is created with the board settings, format and number
+    #of games in each series of the request if it does not exist yet
+    def _join_tournament(self, addr, player_name, request):
+        tournament_id = str(request.get("tournament"))
+        tournament = self.tournament_dict.get(tournament_id)
+
+        if tournament is None:
+            board_size = int(request.get("board_size", GameState.DEFAULT_SIZE))
+            win_length = int(request.get("win_length", GameState.DEFAULT_WIN_LENGTH))
+            tournament_format = str(request.get("tournament_format", SingleEliminationTournament.FORMAT))
+            best_of = int(request.get("best_of", 1))
+            #tournament starts by itself once this many players have joined
+            size = request.get("tournament_size")
+            size = None if size is None else int(size)
+            tournament_class = self.TOURNAMENT_FORMATS.get(tournament_format)
+            response_data = Room.validate_board_settings(board_size, win_length)
+
+            if response_data is not None:
+                return response_data, False
+            elif tournament_class is None:
+                return (f'Invalid tournament format "{tournament_format}", must be one of '
+                        f'{", ".join(self.TOURNAMENT_FORMATS)}.'), False
+            elif best_of < 1:
+                return "Series must be at least 1 game long.", False
+            elif size is not None and size < tournament_class.MIN_PLAYERS:
+                return f'Tournaments need at least {tournament_class.MIN_PLAYERS} players.', False
+
+            tournament = tournament_class(tournament_id, (board_size, win_length), best_of, size)
+            self.tournament_dict[tournament_id] = tournament
+
+        if tournament.has_started:
+            return f'Tournament "{tournament_id}" has already been started.', False
+        elif tournament.has_player_name(player_name):
+            return f'"{player_name}" has already been taken as a player name.', False
+
+        tournament.add_player(addr, player_name)
+        self.player_tournament_dict[addr] = tournament_id
+        player_count = tournament.get_player_count()
+
+        #the tournament can be started once a second player has joined. Players are told how many players are
+        #waiting when they join instead of being sent every player that joins after them
+        if player_count == tournament.MIN_PLAYERS:
+            first_player = next(iter(tournament.registered_player_dict))
+            self.connected_player_dict[first_player].add_internal_request(
+                self._create_response(True, EventType.PLAYER_JOINED.value,
+                                      f'"{player_name}" has joined tournament "{tournament_id}".', True))
+
+        if player_count >= tournament.MIN_PLAYERS:
+            self.connected_player_dict[addr].add_internal_request(
+                self._create_response(True, EventType.PLAYER_JOINED.value,
+                                      f'{player_count} players have joined tournament "{tournament_id}".', True))
+
+        if tournament.is_full():
+            self._start_tournament(tournament, f'Tournament "{tournament_id}" is full and has started')
+
+        return f'"{player_name}" has joined tournament "{tournament_id}".', True
+
+    def _start_tournament(self, tournament, message):
+        self._send_message_to_tournament(tournament, EventType.TOURNAMENT,
+                                         f'{message}: {tournament.get_player_count()} players, '
+                                         f'{tournament.FORMAT.replace("_", " ")}, best of {tournament.best_of}')
+        self._start_series(tournament, tournament.start())
+
+        if tournament.is_finished:
+            self._finish_tournament(tournament)
+
+    #creates a room for each series and starts the first game of the series
+    def _start_series(self, tournament, series_list):
+        board_size, win_length = tournament.board_settings
+
+        for series in series_list:
+            room_id = self._create_room_id()
+            room = Room(room_id, board_size, win_length, series=series)
+            self.room_dict[room_id] = room
+
+            for player in series.players:
+                room.registered_player_dict[player] = tournament.registered_player_dict[player]
+                self.player_room_dict[player] = room_id
+
+            player_names = [room.registered_player_dict[player] for player in series.players]
+            self._send_message_to_clients(room, "", EventType.TOURNAMENT,
+                                          f'Round {series.round_number} of tournament "{tournament.tournament_id}": '
+                                          f'"{player_names[0]}" against "{player_names[1]}", best of {series.best_of}')
+            self._start_series_game(room)
+
+    def _start_series_game(self, room):
+        series = room.series
+        self._start_game(room, "", f'Game {series.games_played + 1} of the series has started on a '
+                                   f'{room.board_size}x{room.board_size} board, get {room.win_length} in a row to win')
+
+    #records the result of a game played in a series, winner is None when the game was a draw
+    def _record_series_game(self, room, winner):
+        if room.series.record_game(winner):
+            self._finish_series(room)
+        else:
+            self._start_series_game(room)
+
+    #closes the room of a series that is over. Its players go back to waiting in the tournament and the series
+    #that can be played now that the result is known are started
+    def _finish_series(self, room):
+        series = room.series
+        tournament = self.tournament_dict[series.tournament_id]
+        player_names = tournament.registered_player_dict
+
+        if series.winner is None:
+            message = (f'The series between "{player_names[series.players[0]]}" and '
+                       f'"{player_names[series.players[1]]}" ended in a draw {series.get_score(series.players[0])}')
         else:
-            return False
\ No newline at end of file
+            message = (f'"{player_names[series.winner]}" has won the series against '
+                       f'"{player_names[series.get_loser()]}" {series.get_score(series.winner)}')
+
+        self.logger.info(message)
+        self._send_message_to_clients(room, "", EventType.TOURNAMENT, message)
+
+        for player in list(room.registered_player_dict):
+            room.registered_player_dict.pop(player)
+            room.player_turn_dict.pop(player, None)
+            room.player_index_dict.pop(player, None)
+            self.player_room_dict.pop(player)
+
+        self._update_room_availability(room)
+        self._start_series(tournament, tournament.finish_series(series))
+
+        if tournament.is_finished:
+            self._finish_tournament(tournament)
+
+    #lets every player that is still in the tournament know where they finished
+    def _finish_tournament(self, tournament):
+        standings = tournament.get_standings()
+        player_names = tournament.registered_player_dict
+        self.logger.info(f'Tournament "{tournament.tournament_id}" is over, "{player_names[standings[0]]}" has won')
+
+        for place, player in enumerate(standings, 1):
+            if player not in tournament.withdrawn_players:
+                self.connected_player_dict[player].add_internal_request(
+                    self._create_response(True, EventType.TOURNAMENT.value,
+                                          f'Tournament "{tournament.tournament_id}" is over, '
+                                          f'"{player_names[standings[0]]}" has won. You finished in place {place} '
+                                          f'of {len(standings)}.', True))
+
+    #sends a message to every player in the tournament that has not left
+    def _send_message_to_tournament(self, tournament, event_type, message):
+        self.logger.info(f'Sending {event_type.name} to players in tournament "{tournament.tournament_id}": {message}')
+        broadcast = Broadcast(self._create_response(True, event_type.value, message))
+
+        for player in tournament.registered_player_dict:
+            if player not in tournament.withdrawn_players:
+                self.connected_player_dict[player].send_broadcast(broadcast)
+
+    #end the game, the winner is the player that won the game or None when nobody won
+    def _send_fin_message(self, room, fin_message, end_reason=GameRecord.END_STOPPED, winner=None):
+        #reset game state
+        room.game_has_started = False
+        self._stop_move_clock(room)
+        self._record_game(room, end_reason, winner)
+        self._send_message_to_clients(room, "", EventType.FIN, fin_message)
+
+    #writes the record of the game that has ended to the game record log
+    def _record_game(self, room, end_reason, winner):
+        game_record = room.game_record
+        room.game_record = None
+
+        if game_record is None:
+            return
+
+        game_record.finish(end_reason, GameRecord.NO_WINNER if winner is None else room.player_index_dict[winner])
+
+        #the game is still over for the players when its record can't be written
+        try:
+            self.game_record_log.append(game_record)
+        except OSError:
+            self.logger.error(f'server: error: could not record the game played in room "{room.room_id}":\n'
+                              f'{traceback.format_exc()}')
+
+    #method to send message to all clients in the room except to the one that is specified. A blank
+    #string can be provided to send a message to all clients in the room
+    def _send_message_to_clients(self, room, addr, event_type, message):
+        self.logger.info(f'Sending {event_type.name} to clients in room "{room.room_id}": {message}')
+
+        #message is only encoded once no matter how many clients it is sent to
+        broadcast = Broadcast(self._create_response(True, event_type.value, message))
+
+        #players that lose their connection are sent the events they missed when they reconnect
+        if self.session_grace_period is not None:
+            room.log_event(broadcast, room.registered_player_dict.get(addr))
+
+        for key in room.registered_player_dict.keys():
+            #players whose seat is being held are not connected
+            if addr != key and key in self.connected_player_dict:
+                self.connected_player_dict[key].send_broadcast(broadcast)
+
+        #spectators read the broadcast from the room's feed when they can be sent more updates
+        if room.spectator_feed is not None and event_type in SpectatorFeed.EVENT_TYPES:
+            room.spectator_feed.publish(broadcast)
+
+    def _create_response(self, success, action, response_data, internal_request=False):
+        return dict(success=success, action=action, internal_request=internal_request, data=response_data)
\ No newline at end of file
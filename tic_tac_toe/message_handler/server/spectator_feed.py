@@ -0,0 +1,99 @@
+from collections import deque
+from tic_tac_toe.message.event_type import EventType
+from tic_tac_toe.message_handler.server.broadcast import Broadcast
+
+#stream of the game updates of a room that is shared by every spectator watching the room. Updates are framed
+#once and the most recent ones are kept in a window, each spectator only keeps the position of the next update
+#it needs. Publishing an update only wakes up the spectators that are caught up, the updates are copied to a
+#spectator's send queue when its socket is writable and only while it has at most MAX_BUFFERED_BYTES waiting to be
+#sent. A spectator that falls further behind than the window is skipped ahead to a snapshot of the board instead of
+#its send queue growing without limit
+class SpectatorFeed:
+    #number of the most recent updates kept for spectators that have not been sent them yet
+    MAX_UPDATES = 64
+    #spectators are not sent more updates while they have more than this many bytes waiting to be sent
+    MAX_BUFFERED_BYTES = 64 * 1024
+    #events of the room that are sent to spectators
+    EVENT_TYPES = (EventType.START, EventType.BOARD_SNAPSHOT, EventType.BOARD_UPDATE, EventType.FIN)
+
+    def __init__(self, room):
+        self.room = room
+        #framed updates in the window, the oldest update is dropped once the window is full
+        self.updates = deque(maxlen=self.MAX_UPDATES)
+        #position of the oldest update of the window in the stream of updates of the room
+        self.first_position = 0
+
+        #key: spectator (ip addr, port), value: message handler of the spectator
+        self.spectator_dict = dict()
+        #key: spectator (ip addr, port), value: position of the next update to send to the spectator
+        self.position_dict = dict()
+
+        #snapshot sent to the spectators that fall behind, shared by every spectator that falls behind
+        #before the next update. (position, broadcast)
+        self._snapshot = None
+        #number of times a spectator has been skipped ahead to a snapshot
+        self.skip_count = 0
+
+    def get_end_position(self):
+        return self.first_position + len(self.updates)
+
+    def get_spectator_count(self):
+        return len(self.spectator_dict)
+
+    #spectators are sent the updates published after they started watching
+    def add_spectator(self, addr, message_handler):
+        self.spectator_dict[addr] = message_handler
+        self.position_dict[addr] = self.get_end_position()
+        message_handler.follow_spectator_feed(self)
+
+    def remove_spectator(self, addr):
+        message_handler = self.spectator_dict.pop(addr, None)
+        self.position_dict.pop(addr, None)
+
+        if message_handler is not None:
+            message_handler.follow_spectator_feed(None)
+
+    #adds an update to the window and wakes up the spectators that had been sent every update so that they are sent
+    #the update when their socket is writable. Spectators that are behind are already waiting for their socket to
+    #be writable or for their send buffer to drain, and are sent the update with the ones they have not been sent
+    def publish(self, broadcast):
+        end_position = self.get_end_position()
+
+        if len(self.updates) == self.MAX_UPDATES:
+            self.first_position += 1
+
+        self.updates.append(broadcast)
+
+        for addr, message_handler in self.spectator_dict.items():
+            if self.position_dict[addr] == end_position:
+                message_handler.notify_spectator_feed()
+
+    def has_updates(self, addr):
+        return self.position_dict[addr] < self.get_end_position()
+
+    #returns the framed updates that have not been sent to the spectator yet. Nothing is returned while the
+    #spectator has more than MAX_BUFFERED_BYTES waiting to be sent, and a snapshot of the board is returned
+    #instead of the updates once the spectator has missed updates that are no longer in the window
+    def read_updates(self, addr, protocol, buffered_bytes):
+        position = self.position_dict[addr]
+        end_position = self.get_end_position()
+
+        if position == end_position or buffered_bytes > self.MAX_BUFFERED_BYTES:
+            return []
+
+        self.position_dict[addr] = end_position
+
+        if position < self.first_position:
+            self.skip_count += 1
+            return [self._get_snapshot(end_position).get_message(protocol)]
+
+        return [self.updates[index].get_message(protocol)
+                for index in range(position - self.first_position, end_position - self.first_position)]
+
+    def _get_snapshot(self, position):
+        if self._snapshot is None or self._snapshot[0] != position:
+            self._snapshot = (position, Broadcast(dict(success=True, action=EventType.BOARD_SNAPSHOT.value,
+                                                       internal_request=False,
+                                                       data=self.room.create_board_snapshot())))
+
+        return self._snapshot[1]
@@ -0,0 +1,136 @@
+import logging
+import math
+import time
+import traceback
+
+#callback scheduled on a timer wheel, see TimerWheel.schedule
+class Timer:
+    __slots__ = ("expiry_tick", "callback", "args", "slot")
+
+    def __init__(self, expiry_tick, callback, args):
+        self.expiry_tick = expiry_tick
+        self.callback = callback
+        self.args = args
+        #slot of the wheel that the timer is in, None once the timer has expired or has been cancelled
+        self.slot = None
+
+    def is_active(self):
+        return self.slot is not None
+
+#hierarchical timer wheel. Time is split into ticks and every level of the wheel has SLOT_COUNT slots, a slot of the
+#first level holds the timers that expire on one tick and a slot of each following level covers SLOT_COUNT times as
+#many ticks as a slot of the level below it. Timers are placed in the lowest level that covers their expiry, and the
+#timers of a higher level slot are moved down into the levels below once the wheel reaches that slot. Scheduling and
+#cancelling a timer only adds it to or removes it from a slot, so both take constant time no matter how many timers
+#are waiting, and timers expire at most one tick late
+class TimerWheel:
+    SLOT_COUNT = 64
+    LEVEL_COUNT = 4
+    #seconds in a tick
+    DEFAULT_TICK = 0.1
+
+    def __init__(self, tick=DEFAULT_TICK, clock=time.monotonic):
+        self.logger = logging.getLogger('app')
+        self.tick = tick
+        self.clock = clock
+        self.start_time = clock()
+        #number of ticks that the wheel has advanced since it was created
+        self.current_tick = 0
+        #index: level, value: slots of the level. Each slot is a dictionary used as an ordered set of timers
+        self.levels = [[dict() for _ in range(self.SLOT_COUNT)] for _ in range(self.LEVEL_COUNT)]
+        self.timer_count = 0
+
+    def __len__(self):
+        return self.timer_count
+
+    #calls callback with args once delay seconds have passed and returns the timer, which can be cancelled
+    def schedule(self, delay, callback, *args):
+        expiry_tick = max(self.current_tick + 1,
+                          math.ceil((self.clock() + delay - self.start_time) / self.tick))
+        timer = Timer(expiry_tick, callback, args)
+        self._insert(timer)
+        self.timer_count += 1
+        return timer
+
+    def cancel(self, timer):
+        if timer is not None and timer.slot is not None:
+            del timer.slot[timer]
+            timer.slot = None
+            self.timer_count -= 1
+
+    #number of seconds until the wheel has to be advanced, or None when there are no timers so that the caller can
+    #wait until something else happens. That is the next tick with timers in the first level, or the next time
+    #that timers are moved down from the level above when that comes first
+    def get_timeout(self):
+        if self.timer_count == 0:
+            return None
+
+        ticks = self.SLOT_COUNT - self.current_tick % self.SLOT_COUNT
+
+        for offset in range(1, ticks):
+            if self.levels[0][(self.current_tick + offset) % self.SLOT_COUNT]:
+                ticks = offset
+                break
+
+        return max(0, self.start_time + (self.current_tick + ticks) * self.tick - self.clock())
+
+    #moves the wheel forward to the current time and calls the callbacks of the timers that have expired
+    def advance(self):
+        target_tick = int((self.clock() - self.start_time) / self.tick)
+
+        while self.current_tick < target_tick:
+            #nothing can expire until a new timer is scheduled
+            if self.timer_count == 0:
+                self.current_tick = target_tick
+                break
+
+            self.current_tick += 1
+            self._cascade()
+
+            slot = self.levels[0][self.current_tick % self.SLOT_COUNT]
+
+            while slot:
+                timer = next(iter(slot))
+                del slot[timer]
+                timer.slot = None
+                self.timer_count -= 1
+                self._run(timer)
+
+    #timers expire in the slot of the level 0 tick they are due on. Timers that are further away than a level can
+    #hold are placed in the level that covers the most ticks and are placed again when the wheel reaches their slot
+    def _insert(self, timer):
+        ticks_left = timer.expiry_tick - self.current_tick
+        level = 0
+        level_ticks = self.SLOT_COUNT
+
+        while ticks_left >= level_ticks and level < self.LEVEL_COUNT - 1:
+            level += 1
+            level_ticks *= self.SLOT_COUNT
+
+        #the last level is only a full turn of the wheel ahead
+        slot_tick = min(timer.expiry_tick, self.current_tick + level_ticks - 1)
+        timer.slot = self.levels[level][(slot_tick // (level_ticks // self.SLOT_COUNT)) % self.SLOT_COUNT]
+        timer.slot[timer] = None
+
+    #when a level comes back to its first slot, the timers in the current slot of the level above are moved down
+    def _cascade(self):
+        level_ticks = 1
+
+        for level in range(1, self.LEVEL_COUNT):
+            level_ticks *= self.SLOT_COUNT
+
+            if self.current_tick % level_ticks != 0:
+                break
+
+            slot = self.levels[level][(self.current_tick // level_ticks) % self.SLOT_COUNT]
+            timers = list(slot)
+            slot.clear()
+
+            for timer in timers:
+                self._insert(timer)
+
+    def _run(self, timer):
+        try:
+            timer.callback(*timer.args)
+        except Exception:
+            self.logger.error(f'timer: error: exception in {timer.callback}:\n{traceback.format_exc()}')
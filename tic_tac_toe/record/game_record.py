@@ -0,0 +1,80 @@
+import struct
+
+#record of a finished game, written to the game record log when the game is over. Records are encoded as a fixed
+#header followed by the moves and the names of the players:
+#length (2 bytes) | start time (8 bytes) | board size (1 byte) | win length (1 byte) | first player (1 byte) |
+#winner (1 byte) | end reason (1 byte) | X name length (1 byte) | O name length (1 byte) | move count (2 bytes)
+#
+#the moves are the indexes of the cells that were played in order, one byte each when every cell of the board fits in
+#a byte and two bytes each otherwise. The player that moved first played the even moves. The moves come straight
+#after the header so that the first move can be read without decoding the rest of the record
+class GameRecord:
+    HEADER = struct.Struct(">HdBBBBBBBH")
+    #boards with more cells than this need two bytes for each move
+    MAX_BYTE_CELLS = 256
+    #names are cut to this many bytes of utf-8
+    MAX_NAME_LENGTH = 255
+
+    #how the game ended
+    END_WIN = 0
+    END_DRAW = 1
+    #player to move ran out of time, the other player won
+    END_TIME = 2
+    #a player left during the game, the other player won
+    END_LEFT = 3
+    #a player stopped the game, nobody won
+    END_STOPPED = 4
+    END_REASON_NAMES = ("win", "draw", "time", "left", "stopped")
+    #winner of a game that was a draw or was stopped
+    NO_WINNER = 0xFF
+
+    def __init__(self, start_time, board_size, win_length, first_player, player_names, moves=None,
+                 winner=NO_WINNER, end_reason=END_STOPPED):
+        #seconds since the epoch when the game was started
+        self.start_time = start_time
+        self.board_size = board_size
+        self.win_length = win_length
+        #index of the symbol of the player that moved first, see GameState.SYMBOLS
+        self.first_player = first_player
+        #index: symbol index, value: name of the player using the symbol
+        self.player_names = player_names
+        #cells played in order
+        self.moves = [] if moves is None else moves
+        #index of the symbol of the player that won, NO_WINNER when nobody won
+        self.winner = winner
+        self.end_reason = end_reason
+
+    def finish(self, end_reason, winner=NO_WINNER):
+        self.end_reason = end_reason
+        self.winner = winner
+
+    #encodes the record, it is written to the log in a single write
+    def encode(self):
+        #names are cut to fit their length byte without splitting a character
+        names = [name.encode("utf-8")[:self.MAX_NAME_LENGTH].decode("utf-8", "ignore").encode("utf-8")
+                 for name in self.player_names]
+        move_format = self.get_move_format(self.board_size)
+        moves = struct.pack(f'>{len(self.moves)}{move_format}', *self.moves)
+        length = self.HEADER.size + len(moves) + len(names[0]) + len(names[1])
+        header = self.HEADER.pack(length, self.start_time, self.board_size, self.win_length, self.first_player,
+                                  self.winner, self.end_reason, len(names[0]), len(names[1]), len(self.moves))
+        return header + moves + names[0] + names[1]
+
+    #decodes the record at the offset of the buffer
+    @classmethod
+    def decode(cls, buffer, offset=0):
+        (_, start_time, board_size, win_length, first_player, winner, end_reason, x_name_length, o_name_length,
+         move_count) = cls.HEADER.unpack_from(buffer, offset)
+        move_format = cls.get_move_format(board_size)
+        offset += cls.HEADER.size
+        moves = list(struct.unpack_from(f'>{move_count}{move_format}', buffer, offset))
+        offset += move_count * struct.calcsize(move_format)
+        x_name = str(buffer[offset:offset + x_name_length], "utf-8")
+        offset += x_name_length
+        o_name = str(buffer[offset:offset + o_name_length], "utf-8")
+        return cls(start_time, board_size, win_length, first_player, [x_name, o_name], moves, winner, end_reason)
+
+    #struct format of a single move on a board of the size
+    @classmethod
+    def get_move_format(cls, board_size):
+        return "B" if board_size * board_size <= cls.MAX_BYTE_CELLS else "H"
@@ -0,0 +1,289 @@
+from tic_tac_toe.record.game_record import GameRecord
+import logging
+import mmap
+import os
+import re
+import struct
+
+#append-only log of the games finished on the server. Records are appended to segment files that are closed once
+#they reach the segment size, so a segment is never written again after the next one has been started and old
+#segments can be copied or removed while the server is running. Each record is written to its segment with a single
+#write, a record cut short by a crash is dropped when the log is opened again.
+#
+#the index file holds an entry for the first record of every segment and for every INDEX_INTERVAL games, so a game
+#can be found by its number without reading the segments before it. Entries are written before their record, an
+#entry of a record that was never written points to the end of its segment. Segments and the index are read with
+#memory-mapped reads so scanning the log does not copy the records into the process
+class GameRecordLog:
+    MAGIC = b"TTTG"
+    INDEX_MAGIC = b"TTTI"
+    VERSION = 1
+    #magic and version at the start of every segment and of the index
+    FILE_HEADER = struct.Struct(">4sB")
+    #segment number, offset of the record in the segment, game number and start time of the game
+    INDEX_ENTRY = struct.Struct(">IIQd")
+    #games between index entries
+    INDEX_INTERVAL = 1024
+    DEFAULT_SEGMENT_SIZE = 64 * 1024 * 1024
+    SEGMENT_NAME_PATTERN = re.compile(r"games-(\d+)\.seg")
+    INDEX_NAME = "games.idx"
+
+    def __init__(self, directory, segment_size=DEFAULT_SEGMENT_SIZE):
+        self.logger = logging.getLogger('app')
+        self.directory = directory
+        self.segment_size = segment_size
+        #number of games in the log, also the number of the next game
+        self.game_count = 0
+        self.segment_number = 0
+        #number of bytes in the segment being written
+        self.segment_offset = 0
+        self._segment_fd = None
+        os.makedirs(directory, exist_ok=True)
+        self._index_fd = self._open_file(os.path.join(directory, self.INDEX_NAME), self.INDEX_MAGIC)
+        self._recover()
+
+    #appends a finished game to the log, a new segment is started when the record does not fit in the current one
+    def append(self, record):
+        data = record.encode()
+
+        if self.segment_offset + len(data) > self.segment_size and self.segment_offset > self.FILE_HEADER.size:
+            self._open_segment(self.segment_number + 1)
+
+        if self.game_count % self.INDEX_INTERVAL == 0 or self.segment_offset == self.FILE_HEADER.size:
+            os.write(self._index_fd, self.INDEX_ENTRY.pack(self.segment_number, self.segment_offset,
+                                                           self.game_count, record.start_time))
+
+        os.write(self._segment_fd, data)
+        self.segment_offset += len(data)
+        self.game_count += 1
+
+    def close(self):
+        for fd in (self._segment_fd, self._index_fd):
+            if fd is not None:
+                os.close(fd)
+
+        self._segment_fd = None
+        self._index_fd = None
+
+    #counts the games in the log from the last index entry and drops a record or index entry at the end of the log
+    #that was cut short, then continues writing the last segment
+    def _recover(self):
+        segments = self.list_segments(self.directory)
+        index_entries = self.read_index(self.directory)
+        index_size = self.FILE_HEADER.size + len(index_entries) * self.INDEX_ENTRY.size
+
+        if index_size < os.fstat(self._index_fd).st_size:
+            os.ftruncate(self._index_fd, index_size)
+
+        if not segments:
+            self._open_segment(1)
+            return
+
+        if index_entries:
+            segment_number, offset, game_number, _ = index_entries[-1]
+            path = self.get_segment_path(self.directory, segment_number)
+            buffer = self.map_file(path)
+            record_count, end_offset = self.scan(buffer, offset)
+            self.game_count = game_number + record_count
+
+            if buffer is not None:
+                buffer.close()
+
+            if end_offset < os.path.getsize(path):
+                self.logger.error(f'error: dropping {os.path.getsize(path) - end_offset} bytes of a record that was '
+                                  f'cut short at the end of {path}')
+                os.truncate(path, end_offset)
+
+        self._open_segment(segments[-1][0])
+
+    def _open_segment(self, segment_number):
+        if self._segment_fd is not None:
+            os.close(self._segment_fd)
+
+        self.segment_number = segment_number
+        path = self.get_segment_path(self.directory, segment_number)
+        self._segment_fd = self._open_file(path, self.MAGIC)
+        self.segment_offset = os.fstat(self._segment_fd).st_size
+
+    #opens a file for appending, the header is written when the file is new or was cut short before its header
+    #was written
+    @classmethod
+    def _open_file(cls, path, magic):
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+        if os.fstat(fd).st_size < cls.FILE_HEADER.size:
+            os.ftruncate(fd, 0)
+            os.write(fd, cls.FILE_HEADER.pack(magic, cls.VERSION))
+
+        return fd
+
+    @classmethod
+    def get_segment_path(cls, directory, segment_number):
+        return os.path.join(directory, f'games-{segment_number:06d}.seg')
+
+    #segments of the log in order, as (segment number, path)
+    @classmethod
+    def list_segments(cls, directory):
+        segments = []
+
+        for name in os.listdir(directory):
+            match = cls.SEGMENT_NAME_PATTERN.fullmatch(name)
+
+            if match is not None:
+                segments.append((int(match.group(1)), os.path.join(directory, name)))
+
+        return sorted(segments)
+
+    #directories under the directory that hold a log, including the directory itself. The workers of the server
+    #each write their own log
+    @classmethod
+    def find_logs(cls, directory):
+        directories = []
+
+        for path, _, names in sorted(os.walk(directory)):
+            if any(cls.SEGMENT_NAME_PATTERN.fullmatch(name) for name in names):
+                directories.append(path)
+
+        return directories
+
+    #memory-maps a file for reading, None when the file only has a header. Raises ValueError when the file was not
+    #written by this version of the log
+    @classmethod
+    def map_file(cls, path, magic=MAGIC):
+        with open(path, "rb") as log_file:
+            size = os.fstat(log_file.fileno()).st_size
+
+            if size < cls.FILE_HEADER.size:
+                return None
+
+            buffer = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if cls.FILE_HEADER.unpack_from(buffer) != (magic, cls.VERSION):
+            buffer.close()
+            raise ValueError(f'{path} is not a version {cls.VERSION} game record file')
+
+        if size == cls.FILE_HEADER.size:
+            buffer.close()
+            return None
+
+        return buffer
+
+    #index entries as (segment number, offset, game number, start time). An entry that was cut short is left out
+    @classmethod
+    def read_index(cls, directory):
+        path = os.path.join(directory, cls.INDEX_NAME)
+
+        if not os.path.exists(path):
+            return []
+
+        buffer = cls.map_file(path, cls.INDEX_MAGIC)
+
+        if buffer is None:
+            return []
+
+        entry_size = cls.INDEX_ENTRY.size
+        end = cls.FILE_HEADER.size + (len(buffer) - cls.FILE_HEADER.size) // entry_size * entry_size
+        entries = list(cls.INDEX_ENTRY.iter_unpack(buffer[cls.FILE_HEADER.size:end]))
+        buffer.close()
+        return entries
+
+    #number of whole records in the buffer from the offset and the offset after the last of them
+    @classmethod
+    def scan(cls, buffer, offset):
+        if buffer is None:
+            return 0, cls.FILE_HEADER.size
+
+        size = len(buffer)
+        header_size = GameRecord.HEADER.size
+        unpack_length = struct.Struct(">H").unpack_from
+        record_count = 0
+
+        while offset + header_size <= size:
+            length = unpack_length(buffer, offset)[0]
+
+            if length < header_size or offset + length > size:
+                break
+
+            offset += length
+            record_count += 1
+
+        return record_count, offset
+
+    #returns (game number, record) for every game in the log from the first game. The index is used to start
+    #reading at the closest entry before the first game
+    @classmethod
+    def iter_records(cls, directory, first_game=0):
+        segment_number, offset, game_number = 1, cls.FILE_HEADER.size, 0
+
+        for entry in cls.read_index(directory):
+            if entry[2] > first_game:
+                break
+
+            segment_number, offset, game_number, _ = entry
+
+        for number, path in cls.list_segments(directory):
+            if number < segment_number:
+                continue
+            elif number > segment_number:
+                offset = cls.FILE_HEADER.size
+
+            buffer = cls.map_file(path)
+
+            if buffer is None:
+                continue
+
+            try:
+                size = len(buffer)
+
+                while offset + GameRecord.HEADER.size <= size:
+                    length = struct.unpack_from(">H", buffer, offset)[0]
+
+                    if length < GameRecord.HEADER.size or offset + length > size:
+                        break
+
+                    if game_number >= first_game:
+                        yield game_number, GameRecord.decode(buffer, offset)
+
+                    offset += length
+                    game_number += 1
+            finally:
+                buffer.close()
+
+    #returns (board size, win length, first player, winner, end reason, move count, first move) for every game in
+    #the log. Only the header and the first move of each record are read, the first move is None when no move was
+    #played
+    @classmethod
+    def iter_summaries(cls, directory):
+        header_size = GameRecord.HEADER.size
+        unpack_header = GameRecord.HEADER.unpack_from
+        unpack_short = struct.Struct(">H").unpack_from
+        max_byte_cells = GameRecord.MAX_BYTE_CELLS
+
+        for _, path in cls.list_segments(directory):
+            buffer = cls.map_file(path)
+
+            if buffer is None:
+                continue
+
+            try:
+                offset = cls.FILE_HEADER.size
+                size = len(buffer)
+
+                while offset + header_size <= size:
+                    (length, _, board_size, win_length, first_player, winner, end_reason, _, _,
+                     move_count) = unpack_header(buffer, offset)
+
+                    if length < header_size or offset + length > size:
+                        break
+
+                    if move_count == 0:
+                        first_move = None
+                    elif board_size * board_size <= max_byte_cells:
+                        first_move = buffer[offset + header_size]
+                    else:
+                        first_move = unpack_short(buffer, offset + header_size)[0]
+
+                    yield board_size, win_length, first_player, winner, end_reason, move_count, first_move
+                    offset += length
+            finally:
+                buffer.close()
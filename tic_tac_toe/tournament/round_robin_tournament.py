@@ -0,0 +1,76 @@
+from tic_tac_toe.tournament.tournament import Tournament
+
+#every player plays a series against every other player. Rounds are scheduled with the circle method: the first
+#player stays in place while the others rotate one position each round, so every player plays at most once per
+#round and a player gets a bye each round when there is an odd number of players. Every series of a round is
+#played at the same time and the next round starts once they are all over. A series win is worth
+#SERIES_WIN_POINTS and a drawn series SERIES_DRAW_POINTS, ties in the standings are broken by games won
+class RoundRobinTournament(Tournament):
+    FORMAT = "round_robin"
+    SERIES_WIN_POINTS = 2
+    SERIES_DRAW_POINTS = 1
+
+    def __init__(self, tournament_id, board_settings, best_of=1, size=None):
+        super().__init__(tournament_id, board_settings, best_of, size)
+        #players in the positions of the circle, None is the bye when there is an odd number of players
+        self.circle = []
+        self.round_number = 0
+        #key: player, value: points and number of games won
+        self.points_dict = dict()
+        self.game_wins_dict = dict()
+
+    def get_round_count(self):
+        return len(self.circle) - 1
+
+    def get_points(self, player):
+        return self.points_dict[player]
+
+    def get_standings(self):
+        return sorted(self.points_dict, key=lambda player: (-self.points_dict[player], -self.game_wins_dict[player]))
+
+    def _create_first_series(self):
+        self.circle = list(self.registered_player_dict)
+
+        if len(self.circle) % 2 == 1:
+            self.circle.append(None)
+
+        self.points_dict = dict.fromkeys(self.registered_player_dict, 0)
+        self.game_wins_dict = dict.fromkeys(self.registered_player_dict, 0)
+        return self._create_next_round()
+
+    def _record_series(self, series):
+        for index, player in enumerate(series.players):
+            self.game_wins_dict[player] += series.wins[index]
+
+            if series.winner is None:
+                self.points_dict[player] += self.SERIES_DRAW_POINTS
+            elif series.winner == player:
+                self.points_dict[player] += self.SERIES_WIN_POINTS
+
+        if self.active_series_count == 0:
+            return self._create_next_round()
+
+        return []
+
+    #pairs the players of the next round, the players across from each other in the circle play each other
+    def _create_next_round(self):
+        if self.round_number == self.get_round_count():
+            self.is_finished = True
+            return []
+
+        self.round_number += 1
+
+        if self.round_number > 1:
+            #rotate every player but the first one position
+            self.circle.insert(1, self.circle.pop())
+
+        half = len(self.circle) // 2
+        new_series = []
+
+        for index in range(half):
+            players = self.circle[index], self.circle[-1 - index]
+
+            if players[0] is not None and players[1] is not None:
+                new_series.append(self._create_series(self.round_number, players))
+
+        return new_series
@@ -0,0 +1,62 @@
+#best-of-N series played between two players of a tournament in a single room. The series is over once a
+#player has won more than half of the games, or once all of the games have been played
+class Series:
+    def __init__(self, tournament_id, series_id, round_number, players, best_of=1):
+        self.tournament_id = tournament_id
+        self.series_id = series_id
+        #round of the tournament that the series is played in, starting at 1
+        self.round_number = round_number
+        #the two players (ip addr, port) playing the series
+        self.players = players
+        self.best_of = best_of
+        self.wins_needed = best_of // 2 + 1
+
+        #index: player's position in players, value: number of games the player has won
+        self.wins = [0, 0]
+        self.games_played = 0
+        self.is_finished = False
+        #player that won the series, None when the series is not over or ended in a draw
+        self.winner = None
+        #player that left the tournament before the series was over
+        self.forfeited_player = None
+
+    #records the result of a game, winner is None when the game was a draw. Returns True when the series is over
+    def record_game(self, winner):
+        self.games_played += 1
+
+        if winner is not None:
+            index = self.players.index(winner)
+            self.wins[index] += 1
+
+            if self.wins[index] >= self.wins_needed:
+                self._finish(winner)
+                return True
+
+        if self.games_played >= self.best_of:
+            if self.wins[0] != self.wins[1]:
+                self._finish(self.players[0] if self.wins[0] > self.wins[1] else self.players[1])
+            else:
+                self._finish(None)
+
+        return self.is_finished
+
+    #the other player wins the series when a player leaves the tournament
+    def forfeit(self, player):
+        self.forfeited_player = player
+        self._finish(self.get_opponent(player))
+
+    def get_opponent(self, player):
+        return self.players[1] if player == self.players[0] else self.players[0]
+
+    #player that lost the series, None when the series is not over or ended in a draw
+    def get_loser(self):
+        return None if self.winner is None else self.get_opponent(self.winner)
+
+    #number of games won by the player and by their opponent, for example "2-1"
+    def get_score(self, player):
+        index = self.players.index(player)
+        return f'{self.wins[index]}-{self.wins[1 - index]}'
+
+    def _finish(self, winner):
+        self.is_finished = True
+        self.winner = winner
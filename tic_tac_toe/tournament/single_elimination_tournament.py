@@ -0,0 +1,105 @@
+from tic_tac_toe.tournament.tournament import Tournament
+
+#returns the seeds in the order they are placed in a bracket of the size, so that the best seeds only meet in
+#the last rounds. For a bracket of 8: 1, 8, 4, 5, 2, 7, 3, 6
+def _create_bracket_order(bracket_size):
+    order = [1]
+
+    while len(order) < bracket_size:
+        order = [seed for current_seed in order for seed in (current_seed, 2 * len(order) + 1 - current_seed)]
+
+    return order
+
+#players are placed in a bracket and the winner of each series moves on to the next round until one player
+#is left. The bracket size is the next power of two and the best seeds get a bye in the first round when there
+#are not enough players to fill it. A series is started as soon as both of its players have won their
+#previous series, without waiting for the rest of the round. Series that end in a draw are won by the better seed
+class SingleEliminationTournament(Tournament):
+    FORMAT = "elimination"
+
+    def __init__(self, tournament_id, board_settings, best_of=1, size=None):
+        super().__init__(tournament_id, board_settings, best_of, size)
+        #index: round - 1, value: players that have reached each slot of the round, None until the slot is filled.
+        #The players of slots 2 * i and 2 * i + 1 play series i of the round and the winner moves on to slot i of
+        #the next round. The last round has a single slot that holds the winner of the tournament
+        self.rounds = []
+        #key: series, value: (round, series index in the round)
+        self.series_position_dict = dict()
+        #key: player, value: seed starting at 1
+        self.seed_dict = dict()
+        #key: player, value: last round that the player played in
+        self.eliminated_round_dict = dict()
+        self.winner = None
+
+    def get_round_count(self):
+        return len(self.rounds) - 1
+
+    #the winner first, then players that went out in a later round before players that went out in an earlier one
+    def get_standings(self):
+        standings = [] if self.winner is None else [self.winner]
+        standings.extend(sorted(self.eliminated_round_dict,
+                                key=lambda player: (-self.eliminated_round_dict[player], self.seed_dict[player])))
+        return standings
+
+    def _create_first_series(self):
+        players = list(self.registered_player_dict)
+        self.seed_dict = dict((player, seed) for seed, player in enumerate(players, 1))
+        bracket_size = 1
+
+        while bracket_size < len(players):
+            bracket_size *= 2
+
+        while bracket_size >= 1:
+            self.rounds.append([None] * bracket_size)
+            bracket_size //= 2
+
+        new_series = []
+
+        for slot, seed in enumerate(_create_bracket_order(len(self.rounds[0]))):
+            #seeds past the number of players are byes
+            if seed <= len(players):
+                self.rounds[0][slot] = players[seed - 1]
+
+        for index in range(len(self.rounds[0]) // 2):
+            new_series.extend(self._create_round_series(0, index))
+
+        return new_series
+
+    def _record_series(self, series):
+        round_index, index = self.series_position_dict.pop(series)
+        winner = series.winner
+
+        if winner is None:
+            winner = min(series.players, key=lambda player: self.seed_dict[player])
+
+        loser = series.get_opponent(winner)
+        self.eliminated_round_dict[loser] = round_index + 1
+        return self._advance(round_index + 1, index, winner)
+
+    #places the player in a slot of the round and returns the series that can be played because of it
+    def _advance(self, round_index, slot, player):
+        self.rounds[round_index][slot] = player
+
+        if round_index == len(self.rounds) - 1:
+            self.winner = player
+            self.is_finished = True
+            return []
+
+        return self._create_round_series(round_index, slot // 2)
+
+    #creates the series of the round once both of its players are known. A player whose opponent is a bye in
+    #the first round moves on to the next round without playing
+    def _create_round_series(self, round_index, index):
+        players = self.rounds[round_index][2 * index], self.rounds[round_index][2 * index + 1]
+
+        if round_index == 0 and (players[0] is None or players[1] is None):
+            if players[0] is None and players[1] is None:
+                return []
+
+            return self._advance(1, index, players[0] if players[1] is None else players[1])
+        elif players[0] is None or players[1] is None:
+            return []
+
+        series = self._create_series(round_index + 1, players)
+        self.series_position_dict[series] = (round_index, index)
+        return [series]
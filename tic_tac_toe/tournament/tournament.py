@@ -0,0 +1,112 @@
+from abc import ABC, abstractmethod
+from collections import deque
+from tic_tac_toe.tournament.series import Series
+
+#tournament played by the players that registered in it before it was started. Subclasses decide which series
+#are played, the tournament keeps track of the series being played and of the players that have left. Series
+#are handed to the server as soon as both of their players are known so that every series of a round is
+#played at the same time, and finishing a series only schedules the series that depend on it
+class Tournament(ABC):
+    #name of the format that players ask for when they create the tournament
+    FORMAT = None
+    MIN_PLAYERS = 2
+
+    def __init__(self, tournament_id, board_settings, best_of=1, size=None):
+        self.tournament_id = tournament_id
+        #(board size, win length) used by every game of the tournament
+        self.board_settings = board_settings
+        #number of games in each series
+        self.best_of = best_of
+        #tournament starts by itself once this many players have registered, None when a player starts it
+        self.size = size
+
+        #dictionary keeping track of the players that registered in the tournament, in the order they registered
+        #which is also their seed. Players are kept once the tournament has started so results can be reported
+        #key: player (ip addr, port), value: player name
+        self.registered_player_dict = dict()
+        #players that have left the tournament after it started, their series are forfeited
+        self.withdrawn_players = set()
+
+        self.has_started = False
+        self.is_finished = False
+        #number of series that have been scheduled and are not over yet
+        self.active_series_count = 0
+        self.series_counter = 0
+
+    def add_player(self, player, player_name):
+        self.registered_player_dict[player] = player_name
+
+    #removes a player that leaves before the tournament starts, players that leave after it started are
+    #withdrawn instead so the series they still had to play are forfeited
+    def remove_player(self, player):
+        if self.has_started:
+            self.withdrawn_players.add(player)
+        else:
+            self.registered_player_dict.pop(player, None)
+
+    def has_player_name(self, player_name):
+        return player_name in self.registered_player_dict.values()
+
+    def get_player_count(self):
+        return len(self.registered_player_dict)
+
+    def is_full(self):
+        return self.size is not None and len(self.registered_player_dict) >= self.size
+
+    #checks if every player has left the tournament
+    def is_empty(self):
+        return len(self.withdrawn_players) >= len(self.registered_player_dict)
+
+    #starts the tournament and returns the series that can be played
+    def start(self):
+        self.has_started = True
+        return self._schedule(self._create_first_series())
+
+    #records the result of a series that is over and returns the series that can be played because of it
+    def finish_series(self, series):
+        return self._schedule([series])
+
+    #players in the order they finished the tournament, only valid once the tournament is over
+    @abstractmethod
+    def get_standings(self):
+        ...
+
+    #returns the series that can be played when the tournament starts
+    @abstractmethod
+    def _create_first_series(self):
+        ...
+
+    #updates the tournament with the result of a series that is over and returns the new series that can be played
+    @abstractmethod
+    def _record_series(self, series):
+        ...
+
+    #creates a series, series with a player that has left are forfeited straight away
+    def _create_series(self, round_number, players):
+        self.series_counter += 1
+        self.active_series_count += 1
+        series = Series(self.tournament_id, f'{round_number}-{self.series_counter}', round_number, players,
+                        self.best_of)
+
+        for player in players:
+            if player in self.withdrawn_players:
+                series.forfeit(player)
+                break
+
+        return series
+
+    #records the series that are over until only series that still have to be played are left
+    def _schedule(self, new_series):
+        new_series = deque(new_series)
+        playable_series = []
+
+        while new_series:
+            series = new_series.popleft()
+
+            if series.is_finished:
+                self.active_series_count -= 1
+                new_series.extend(self._record_series(series))
+            else:
+                playable_series.append(series)
+
+        return playable_series